@@ -0,0 +1,209 @@
+"""
+Benchmark suite for the IP-XACT importer and exporter.
+
+Measures export throughput, import throughput and round-trip latency of
+synthetic register models, and compares the results against a stored
+baseline. Run from the repository root::
+
+    python -m benchmarks.bench
+
+Exits with a non-zero status if any measurement regressed by more than the
+threshold. Use ``--update-baseline`` to record new baseline results after an
+intentional change, or when switching to a different machine.
+"""
+from typing import Any, Callable, Dict, List
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from systemrdl import RDLCompiler
+from systemrdl.messages import MessagePrinter
+from systemrdl.node import RootNode
+
+from peakrdl_ipxact import IPXACTExporter, IPXACTImporter, profile_export, profile_import
+from peakrdl_ipxact.exporter import Standard
+
+from .generators import ModelSpec, generate_model
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(THIS_DIR, "baseline.json")
+
+SCENARIOS = {
+    "flat": ModelSpec(blocks=8, registers=64, fields=8),
+    "nested": ModelSpec(blocks=4, registers=32, fields=8, regfile_depth=3),
+    "arrays": ModelSpec(blocks=4, registers=32, fields=8, array_size=16),
+    "enums": ModelSpec(blocks=4, registers=64, fields=8, enums=True),
+}
+
+STANDARDS = {
+    "2009": Standard.IEEE_1685_2009,
+    "2014": Standard.IEEE_1685_2014,
+}
+
+# Measurements for which a larger value is a regression
+COMPARED = ("export_s", "import_s", "roundtrip_s", "export_peak_bytes", "import_peak_bytes")
+
+
+class QuietPrinter(MessagePrinter):
+    def print_message(self, severity: Any, text: str, src_ref: Any) -> None:
+        pass
+
+
+def best_time(func: Callable[[], Any], repeat: int) -> float:
+    """
+    Returns the fastest of several runs, which is the least affected by
+    other activity on the machine.
+
+    Like :mod:`timeit`, garbage collection is disabled while timing.
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return min(times)
+
+
+def run_scenario(root: RootNode, spec: ModelSpec, standard: Standard, repeat: int, memory: bool, tmpdir: str) -> Dict[str, float]:
+    path = os.path.join(tmpdir, "bench.xml")
+
+    def do_export() -> None:
+        IPXACTExporter(standard=standard).export(root, path, component_name="bench")
+
+    def do_import() -> RDLCompiler:
+        rdlc = RDLCompiler(message_printer=QuietPrinter())
+        IPXACTImporter(rdlc).import_file(path)
+        return rdlc
+
+    def do_round_trip() -> None:
+        do_export()
+        do_import().elaborate()
+
+    do_export()
+    results = {
+        "export_s": best_time(do_export, repeat),
+        "import_s": best_time(do_import, repeat),
+        "roundtrip_s": best_time(do_round_trip, repeat),
+    }
+    # Throughput is based on the fields that are actually written and read,
+    # which for register arrays is not the number of array elements
+    results["export_fields_per_s"] = spec.n_exported_fields / results["export_s"]
+    results["import_fields_per_s"] = spec.n_exported_fields / results["import_s"]
+
+    if memory:
+        results["export_peak_bytes"] = profile_export(root, path, component_name="bench", standard=standard).peak
+        rdlc = RDLCompiler(message_printer=QuietPrinter())
+        results["import_peak_bytes"] = profile_import(rdlc, path).peak
+    return results
+
+
+def run(scenarios: List[str], repeat: int, memory: bool) -> Dict[str, Dict[str, float]]:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for scenario in scenarios:
+            spec = SCENARIOS[scenario]
+            root = generate_model(spec)
+            for std_name, standard in STANDARDS.items():
+                name = "%s/%s" % (scenario, std_name)
+                print("Running %s..." % name, file=sys.stderr)
+                results[name] = run_scenario(root, spec, standard, repeat, memory, tmpdir)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    """
+    Returns a description of each measurement that is worse than its
+    baseline by more than the threshold.
+    """
+    regressions = []
+    for name, measurements in sorted(results.items()):
+        for key, value in sorted(measurements.items()):
+            if key not in COMPARED:
+                continue
+            ref = baseline.get(name, {}).get(key, None)
+            if not ref:
+                continue
+            if value > ref * (1 + threshold):
+                regressions.append("%s %s: %.4g -> %.4g (+%.0f%%)" % (
+                    name, key, ref, value, (value / ref - 1) * 100
+                ))
+    return regressions
+
+
+def print_results(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]]) -> None:
+    for name, measurements in sorted(results.items()):
+        print(name)
+        for key, value in sorted(measurements.items()):
+            ref = baseline.get(name, {}).get(key, None)
+            if ref:
+                print("    %-22s %12.4g  (baseline %.4g, %+.0f%%)" % (key, value, ref, (value / ref - 1) * 100))
+            else:
+                print("    %-22s %12.4g" % (key, value))
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "scenarios", nargs="*", metavar="SCENARIO", default=sorted(SCENARIOS),
+        help="Scenarios to run: %s. [all]" % ", ".join(sorted(SCENARIOS))
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs of each measurement. [5]")
+    parser.add_argument("--memory", action="store_true", help="Also measure peak memory usage")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results file. [benchmarks/baseline.json]")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative regression. [0.25]")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--output", default=None, help="Also write the results to a JSON file")
+    options = parser.parse_args(argv)
+
+    for scenario in options.scenarios:
+        if scenario not in SCENARIOS:
+            parser.error("Unknown scenario '%s'" % scenario)
+
+    baseline = {} # type: Dict[str, Dict[str, float]]
+    if os.path.exists(options.baseline):
+        with open(options.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    results = run(options.scenarios, options.repeat, options.memory)
+    print_results(results, baseline)
+
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if options.update_baseline:
+        # Keep baseline results of scenarios that were not run
+        baseline.update(results)
+        data["results"] = baseline
+        with open(options.baseline, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+            f.write("\n")
+        return 0
+
+    regressions = compare(results, baseline, options.threshold)
+    if regressions:
+        print("\nRegressions beyond %.0f%%:" % (options.threshold * 100))
+        for regression in regressions:
+            print("    " + regression)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
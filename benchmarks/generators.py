@@ -0,0 +1,126 @@
+"""
+Generators for synthetic SystemRDL register models of arbitrary size.
+"""
+from typing import Optional, List
+import os
+import tempfile
+
+from systemrdl import RDLCompiler
+from systemrdl.node import RootNode
+
+ENUM_NAME = "bench_mode_e"
+
+
+class ModelSpec:
+    """
+    Shape of a synthetic register model.
+
+    The model contains ``blocks`` address blocks, each with ``registers``
+    registers of ``fields`` fields. Registers can be placed in ``regfile_depth``
+    levels of nested register files, and be arrays of ``array_size`` elements.
+    """
+
+    def __init__(
+        self,
+        blocks: int = 4,
+        registers: int = 16,
+        fields: int = 4,
+        regfile_depth: int = 0,
+        array_size: Optional[int] = None,
+        enums: bool = False
+    ) -> None:
+        if not 1 <= fields <= 32:
+            raise ValueError("Registers must have between 1 and 32 fields")
+        if enums and fields > 16:
+            raise ValueError("Encoded fields must be at least 2 bits wide, so registers can have at most 16")
+        self.blocks = blocks
+        self.registers = registers
+        self.fields = fields
+        self.regfile_depth = regfile_depth
+        self.array_size = array_size
+        self.enums = enums
+
+    @property
+    def n_registers(self) -> int:
+        """
+        Number of register instances in the model, with array elements
+        counted individually.
+        """
+        return self.blocks * self.registers * (self.array_size or 1)
+
+    @property
+    def n_fields(self) -> int:
+        """
+        Number of field instances in the model, with array elements counted
+        individually.
+        """
+        return self.n_registers * self.fields
+
+    @property
+    def n_exported_fields(self) -> int:
+        """
+        Number of field elements in an IP-XACT export of the model.
+        Register arrays are not unrolled, so each array counts only once.
+        """
+        return self.blocks * self.registers * self.fields
+
+    def __repr__(self) -> str:
+        return "ModelSpec(blocks=%d, registers=%d, fields=%d, regfile_depth=%d, array_size=%r, enums=%r)" % (
+            self.blocks, self.registers, self.fields, self.regfile_depth, self.array_size, self.enums
+        )
+
+
+def generate_rdl(spec: ModelSpec, top_name: str = "bench") -> str:
+    """
+    Returns SystemRDL source text of a model with the given shape.
+    """
+    lines = [] # type: List[str]
+    width = 32 // spec.fields
+
+    if spec.enums:
+        lines.append("enum %s {" % ENUM_NAME)
+        for i in range(min(4, 2 ** width)):
+            lines.append("    MODE%d = %d { desc = \"Mode %d\"; };" % (i, i, i))
+        lines.append("};")
+
+    lines.append("addrmap %s {" % top_name)
+    for b in range(spec.blocks):
+        lines.append("    addrmap {")
+        indent = "        "
+        for depth in range(spec.regfile_depth):
+            lines.append("%sregfile {" % indent)
+            indent += "    "
+
+        for r in range(spec.registers):
+            lines.append("%sreg {" % indent)
+            lines.append("%s    desc = \"Register %d of block %d\";" % (indent, r, b))
+            for f in range(spec.fields):
+                props = "sw=rw; hw=r;"
+                if spec.enums:
+                    props += " encode=%s;" % ENUM_NAME
+                lines.append("%s    field {%s} f%d[%d] = %d;" % (indent, props, f, width, (r + f) % 2))
+            dim = "" if spec.array_size is None else "[%d]" % spec.array_size
+            lines.append("%s} r%d%s;" % (indent, r, dim))
+
+        for depth in reversed(range(spec.regfile_depth)):
+            indent = indent[:-4]
+            lines.append("%s} rf%d;" % (indent, depth))
+        lines.append("    } blk%d;" % b)
+    lines.append("};")
+    return "\n".join(lines) + "\n"
+
+
+def generate_model(spec: ModelSpec, top_name: str = "bench", rdlc: Optional[RDLCompiler] = None) -> RootNode:
+    """
+    Compiles and elaborates a model with the given shape.
+    """
+    if rdlc is None:
+        rdlc = RDLCompiler()
+    fd, path = tempfile.mkstemp(suffix=".rdl")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(generate_rdl(spec, top_name))
+        rdlc.compile_file(path)
+    finally:
+        os.remove(path)
+    return rdlc.elaborate(top_name)
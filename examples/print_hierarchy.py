@@ -17,12 +17,13 @@ rdlc = RDLCompiler()
 ipxact = IPXACTImporter(rdlc)
 
 try:
-    # Compile all the files provided
+    # Import all the IP-XACT files provided, using all available CPUs
+    xml_files = [f for f in input_files if os.path.splitext(f)[1] == ".xml"]
+    ipxact.import_files(xml_files, jobs=os.cpu_count())
+
+    # Compile all the SystemRDL files provided
     for input_file in input_files:
-        ext = os.path.splitext(input_file)[1]
-        if ext == ".xml":
-            ipxact.import_file(input_file)
-        elif ext == ".rdl":
+        if os.path.splitext(input_file)[1] == ".rdl":
             rdlc.compile_file(input_file)
 
     # Elaborate the design
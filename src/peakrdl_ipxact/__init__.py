@@ -2,3 +2,9 @@ from .__about__ import __version__
 
 from .exporter import IPXACTExporter, Standard
 from .importer import IPXACTImporter
+from .expressions import ExpressionEvaluator, ExpressionError
+from .cache import ImportCache
+from .metrics import Metrics
+from .trace import Tracer
+from .memprofile import MemoryProfiler, profile_import, profile_export
+from .sinks import ExportSink, XMLSink, JSONSummarySink
@@ -1,11 +1,17 @@
-from typing import TYPE_CHECKING
-import re
+from typing import TYPE_CHECKING, Optional, Tuple
+import atexit
+import os
 
 from peakrdl.plugins.importer import ImporterPlugin
 from peakrdl.plugins.exporter import ExporterSubcommandPlugin
 
 from .exporter import IPXACTExporter, Standard
-from .importer import IPXACTImporter
+from .importer import IPXACTImporter, is_ipxact_file
+from .cache import ImportCache
+from . import compression
+from .metrics import Metrics
+from .memprofile import MemoryProfiler
+from .trace import Tracer
 
 if TYPE_CHECKING:
     import argparse
@@ -13,6 +19,14 @@ if TYPE_CHECKING:
     from systemrdl.node import AddrmapNode
 
 
+def parse_address_range(s: str) -> Tuple[int, int]:
+    # Parse a START:END address range. Addresses may use 0x, 0o or 0b prefixes
+    start, sep, end = s.partition(":")
+    if not sep:
+        raise ValueError("Expected START:END")
+    return int(start, 0), int(end, 0)
+
+
 class Exporter(ExporterSubcommandPlugin):
     short_desc = "Export the register model to IP-XACT"
 
@@ -48,32 +62,148 @@ class Exporter(ExporterSubcommandPlugin):
             help="IP-XACT standard to use. [2014]"
         )
 
+        arg_group.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Skip the export if neither the register model nor the output file changed since the last export"
+        )
+
+        arg_group.add_argument(
+            "--split",
+            action="store_true",
+            help="Export each addrmap or mem that is an immediate child of the top node as a separate component. "
+                 "The output path is treated as a directory that receives one <name>.xml file per component, "
+                 "and a catalog.xml that lists them (IP-XACT 2014)."
+        )
+        arg_group.add_argument(
+            "--shard-size",
+            metavar="N",
+            default=None,
+            type=int,
+            help="With --split, further split addrmaps that contain more than N registers, "
+                 "if they only contain other addrmaps or mems"
+        )
+        arg_group.add_argument(
+            "--jobs",
+            type=int,
+            default=1,
+            help="Number of worker processes to export with. [1]"
+        )
+        arg_group.add_argument(
+            "--catalog",
+            metavar="PATH",
+            default=None,
+            help="Also write an IP-XACT catalog listing the VLNV of every exported component. Requires IP-XACT 2014"
+        )
+        arg_group.add_argument(
+            "--export-metrics-json",
+            metavar="PATH",
+            default=None,
+            help="Write performance metrics of the export to a JSON file"
+        )
+        arg_group.add_argument(
+            "--export-memory-profile",
+            metavar="PATH",
+            default=None,
+            help="Profile the memory usage of the export and write the results to a JSON file. Only the main process is profiled, so use with --jobs 1"
+        )
+        arg_group.add_argument(
+            "--export-trace",
+            metavar="PATH",
+            default=None,
+            help="Write a timeline of the export to a JSON file that can be viewed using Perfetto or chrome://tracing"
+        )
+
 
     def do_export(self, top_node: 'AddrmapNode', options: 'argparse.Namespace') -> None:
 
+        metrics = None # type: Optional[Metrics]
+        if options.export_memory_profile:
+            metrics = MemoryProfiler()
+            metrics.start()
+        elif options.export_metrics_json:
+            metrics = Metrics()
+
         x = IPXACTExporter(
             standard=Standard(options.standard),
             vendor=options.vendor,
             library=options.library,
             version=options.version,
+            incremental=options.incremental,
+            jobs=options.jobs,
+            metrics=metrics,
         )
-        x.export(
-            top_node,
-            options.output,
-            component_name=options.name
-        )
+
+        if options.catalog and not x.standard.supports_catalog:
+            top_node.env.msg.fatal("IP-XACT catalogs require IP-XACT 2014 or later")
+
+        tracer = None
+        if options.export_trace:
+            tracer = Tracer(options.export_trace)
+            tracer.attach(x)
+
+        if options.split:
+            catalog = options.catalog
+            if catalog is None and x.standard.supports_catalog:
+                catalog = os.path.join(options.output, "catalog.xml")
+            x.export_sharded(
+                top_node,
+                options.output,
+                max_shard_size=options.shard_size,
+                jobs=options.jobs,
+                catalog=catalog,
+            )
+        else:
+            component_name = options.name or top_node.inst_name
+            x.export(
+                top_node,
+                options.output,
+                component_name=component_name
+            )
+            if options.catalog:
+                x.write_catalog(
+                    options.catalog,
+                    os.path.splitext(os.path.basename(options.catalog))[0],
+                    [(component_name, options.output)]
+                )
+
+        if isinstance(metrics, MemoryProfiler):
+            metrics.stop()
+            metrics.write_json(options.export_memory_profile)
+        if metrics is not None and options.export_metrics_json:
+            metrics.write_json(options.export_metrics_json)
+        if tracer is not None:
+            tracer.close()
 
 
 class Importer(ImporterPlugin):
-    file_extensions = ["xml"]
+    file_extensions = ["xml", "gz", "xz", "zst"]
+
+    # Metrics are accumulated across all imported files
+    _metrics = None # type: Optional[Metrics]
+
+    # The timeline spans all imported files, and is finished on exit
+    _tracer = None # type: Optional[Tracer]
 
     def is_compatible(self, path: str) -> bool:
+        # Compressed files are only considered if they contain XML
+        ext = compression.get_extension(path)
+        if ext and not path[:-len(ext)].lower().endswith(".xml"):
+            return False
+
         # Could be any XML file.
-        # See if file contains an ipxact or spirit component tag
-        with open(path, "r", encoding="utf-8") as f:
-            if re.search(r"<(spirit|ipxact):component\b", f.read()):
-                return True
-        return False
+        # See if its root element is an ipxact or spirit component
+        return is_ipxact_file(path)
+
+    def _is_last_input(self, options: 'argparse.Namespace', path: str) -> bool:
+        """
+        Whether path is the last input file that is imported by this plugin
+        """
+        inputs = [
+            p for p in getattr(options, "input_files", None) or []
+            if os.path.splitext(p)[1].strip(".") in self.file_extensions
+        ]
+        return bool(inputs) and inputs[-1] == path
 
     def add_importer_arguments(self, arg_group: 'argparse._ActionsContainer') -> None:
         arg_group.add_argument(
@@ -82,10 +212,114 @@ class Importer(ImporterPlugin):
             default=None,
             help="Optional remapState string that is used to select memoryRemap regions that are tagged under a specific remap state."
         )
+        arg_group.add_argument(
+            "--memory-maps",
+            metavar="GLOB",
+            action="append",
+            default=None,
+            help="Only import memoryMaps whose name matches this glob pattern. May be given more than once."
+        )
+        arg_group.add_argument(
+            "--address-blocks",
+            metavar="GLOB",
+            action="append",
+            default=None,
+            help="Only import addressBlocks whose name matches this glob pattern. May be given more than once."
+        )
+        arg_group.add_argument(
+            "--address-range",
+            metavar="START:END",
+            type=parse_address_range,
+            default=None,
+            help="Only import addressBlocks that overlap this byte address range. END is exclusive. Example: 0x1000:0x2000"
+        )
+        arg_group.add_argument(
+            "--import-cache",
+            metavar="DIR",
+            default=None,
+            help="Cache decoded IP-XACT files in this directory so that unchanged files are imported faster on subsequent runs."
+        )
+        arg_group.add_argument(
+            "--import-cache-size",
+            metavar="MB",
+            default=256,
+            type=int,
+            help="Maximum size of the import cache in megabytes. Least recently used entries are evicted first. [256]"
+        )
+        arg_group.add_argument(
+            "--share-definitions",
+            action="store_true",
+            default=False,
+            help="Structurally identical registers and register files share a single named definition."
+        )
+        arg_group.add_argument(
+            "--intern-enums",
+            action="store_true",
+            default=False,
+            help="Fields with identical enumerations within a file share a single enum type, "
+                 "named after the first field that uses it."
+        )
+        arg_group.add_argument(
+            "--import-metrics-json",
+            metavar="PATH",
+            default=None,
+            help="Write performance metrics of the import to a JSON file. Totals are accumulated across all imported files."
+        )
+        arg_group.add_argument(
+            "--import-memory-profile",
+            metavar="PATH",
+            default=None,
+            help="Profile the memory usage of the import of all files and write the results to a JSON file."
+        )
+        arg_group.add_argument(
+            "--import-trace",
+            metavar="PATH",
+            default=None,
+            help="Write a timeline of the import of all files to a JSON file that can be viewed using Perfetto or chrome://tracing"
+        )
 
     def do_import(self, rdlc: 'RDLCompiler', options: 'argparse.Namespace', path: str) -> None:
-        i = IPXACTImporter(rdlc)
+        cache = None
+        if options.import_cache:
+            cache = ImportCache(options.import_cache, options.import_cache_size * 1024 * 1024)
+
+        if self._metrics is None:
+            if options.import_memory_profile:
+                # Profiling continues until all files are imported. Stopping
+                # on exit covers callers that do not provide the input files.
+                self._metrics = MemoryProfiler()
+                self._metrics.start()
+                atexit.register(self._metrics.stop)
+            elif options.import_metrics_json:
+                self._metrics = Metrics()
+
+        i = IPXACTImporter(
+            rdlc,
+            cache=cache,
+            share_definitions=options.share_definitions,
+            intern_enums=options.intern_enums,
+            metrics=self._metrics,
+            memory_maps=options.memory_maps,
+            address_blocks=options.address_blocks,
+            address_range=options.address_range,
+        )
+
+        if options.import_trace and self._tracer is None:
+            self._tracer = Tracer(options.import_trace)
+            atexit.register(self._tracer.close)
+        if self._tracer is not None:
+            self._tracer.attach(i)
+
         i.import_file(
             path,
             remap_state=options.remap_state
         )
+
+        if self._metrics is not None:
+            if isinstance(self._metrics, MemoryProfiler) and self._is_last_input(options, path):
+                # Do not keep tracing allocations during elaboration and export
+                self._metrics.stop()
+            if options.import_memory_profile:
+                self._metrics.write_json(options.import_memory_profile)
+            if options.import_metrics_json:
+                self._metrics.write_json(options.import_metrics_json)
@@ -0,0 +1,130 @@
+from typing import Optional, Any
+import os
+import hashlib
+import pickle
+import tempfile
+
+from .__about__ import __version__
+
+# Bump this whenever the structure of decoded records changes in a way that is
+# not covered by the package version
+CACHE_FORMAT = 3
+
+class ImportCache:
+    """
+    On-disk cache of decoded IP-XACT files.
+
+    Each entry is stored in its own file, named after its key. Entries are
+    written atomically, so a cache directory can be shared by several processes
+    at once. Once the cache grows beyond ``max_size`` bytes, the least recently
+    used entries are evicted.
+    """
+
+    def __init__(self, directory: str, max_size: int = 256*1024*1024) -> None:
+        """
+        Parameters
+        ----------
+        directory: str
+            Path to the cache directory. Created if it does not exist.
+        max_size: int
+            Maximum total size of all cache entries, in bytes.
+        """
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+
+    def make_key(self, path: str, *variant: Optional[str]) -> str:
+        """
+        Derive the cache key of an input file.
+
+        The key covers the file's contents, the importer version, and any
+        additional ``variant`` strings that affect how it is decoded.
+        """
+        h = hashlib.sha256()
+        h.update(("%s\0%d\0" % (__version__, CACHE_FORMAT)).encode("utf-8"))
+        for v in variant:
+            h.update(("%r\0" % v).encode("utf-8"))
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024*1024), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+
+    def get_entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".pickle")
+
+
+    def load(self, key: str) -> Optional[Any]:
+        """
+        Returns the cached object, or None if there is no valid entry for key.
+        """
+        entry_path = self.get_entry_path(key)
+        try:
+            with open(entry_path, "rb") as f:
+                obj = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception: # pylint: disable=broad-except
+            # Entry is corrupt, or was written by an incompatible version
+            self._remove(entry_path)
+            return None
+
+        # Mark as recently used
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return obj
+
+
+    def store(self, key: str, obj: Any) -> None:
+        """
+        Add an entry to the cache, then evict old entries if it grew too large.
+        """
+        # Write to a temporary file first, then move it into place so that
+        # other processes never observe a partially written entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.get_entry_path(key))
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+
+        self.evict()
+
+
+    def evict(self) -> None:
+        """
+        Remove least recently used entries until the cache fits within its
+        size limit.
+        """
+        entries = []
+        total_size = 0
+        with os.scandir(self.directory) as it:
+            for dir_entry in it:
+                if not dir_entry.name.endswith(".pickle"):
+                    continue
+                try:
+                    st = dir_entry.stat()
+                except FileNotFoundError:
+                    # Removed by another process
+                    continue
+                entries.append((st.st_mtime, st.st_size, dir_entry.path))
+                total_size += st.st_size
+
+        entries.sort()
+        for _, size, entry_path in entries:
+            if total_size <= self.max_size:
+                break
+            self._remove(entry_path)
+            total_size -= size
+
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,92 @@
+from typing import Optional, Any, BinaryIO, TextIO
+import os
+import io
+import gzip
+import lzma
+
+#: File extensions that select a compression format
+COMPRESSION_EXTENSIONS = {
+    ".gz": "gzip",
+    ".xz": "xz",
+    ".zst": "zstd",
+}
+
+
+def get_extension(path: str) -> str:
+    """
+    Returns the file extension that selects the path's compression format, or
+    an empty string if it is not compressed.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in COMPRESSION_EXTENSIONS:
+        return ext
+    return ""
+
+
+def get_compression(path: str) -> Optional[str]:
+    """
+    Returns the name of the path's compression format, based on its
+    extension. None if the path is not compressed.
+    """
+    return COMPRESSION_EXTENSIONS.get(get_extension(path), None)
+
+
+def open_binary(path: str, mode: str = "r") -> BinaryIO:
+    """
+    Open a file in binary mode for reading ("r") or writing ("w"),
+    transparently compressing or decompressing it if its extension selects a
+    compression format.
+
+    Data is (de)compressed in a streaming manner, so the uncompressed contents
+    are never held in memory or on disk as a whole.
+    """
+    compression = get_compression(path)
+    mode = mode.replace("b", "") + "b"
+    if compression is None:
+        f = open(path, mode) # type: Any # pylint: disable=consider-using-with
+    elif compression == "gzip":
+        if mode == "wb":
+            f = _ReproducibleGzipFile(path)
+        else:
+            f = gzip.open(path, mode) # pylint: disable=consider-using-with
+    elif compression == "xz":
+        f = lzma.open(path, mode) # pylint: disable=consider-using-with
+    elif compression == "zstd":
+        try:
+            import zstandard # pylint: disable=import-outside-toplevel
+        except ImportError as e:
+            raise ImportError(
+                "Reading or writing '%s' requires the 'zstandard' package. "
+                "Install it using: pip install peakrdl-ipxact[zstd]" % path
+            ) from e
+        f = zstandard.open(path, mode)
+    else:
+        raise RuntimeError
+    return f
+
+
+def open_text(path: str, mode: str = "r", encoding: str = "utf-8") -> TextIO:
+    """
+    Same as :func:`open_binary`, but opens the file in text mode.
+    """
+    return io.TextIOWrapper(open_binary(path, mode), encoding=encoding)
+
+
+class _ReproducibleGzipFile(gzip.GzipFile):
+    """
+    Writes a gzip file whose header omits the timestamp and original file
+    name, so that identical contents always produce identical files.
+    """
+    def __init__(self, path: str) -> None:
+        self._raw = open(path, "wb") # pylint: disable=consider-using-with
+        try:
+            super().__init__(filename="", mode="wb", fileobj=self._raw, mtime=0)
+        except BaseException:
+            self._raw.close()
+            raise
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            self._raw.close()
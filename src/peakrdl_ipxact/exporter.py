@@ -1,15 +1,35 @@
-from typing import Union, Optional, TYPE_CHECKING, Any
+from typing import Union, Optional, TYPE_CHECKING, Any, Iterator, List, Dict, Hashable, Callable, TypeVar, Sequence, Set, Tuple, TextIO, cast
 import enum
+import copy
+import contextlib
+import os
+import io
+import tempfile
 
 from xml.dom import minidom
+from systemrdl import RDLCompileError
+from systemrdl.component import Field
 from systemrdl.node import AddressableNode, RootNode, Node
 from systemrdl.node import AddrmapNode, MemNode
 from systemrdl.node import RegNode, RegfileNode, FieldNode
 
 from . import typemaps
+from . import parallel
+from . import manifest
+from . import compression
+from .snapshot import NodeSnapshot, SnapshotCache
+from .metrics import Metrics, TimedWriter, phase
+from .xml_stream import XMLStreamWriter, StreamElement, ParentElement, close_element
 
 if TYPE_CHECKING:
     from systemrdl.messages import MessageHandler
+    from .sinks import ExportSink
+
+NodeT = TypeVar("NodeT", bound=Node)
+
+# Number of components each batch export worker exports before it is replaced
+# by a fresh process. This releases any memory the worker accumulated.
+BATCH_TASKS_PER_CHILD = 16
 
 class Standard(enum.IntEnum):
     """
@@ -27,6 +47,11 @@ class Standard(enum.IntEnum):
         # Only 2014 supports ispresent
         return self == Standard.IEEE_1685_2014
 
+    @property
+    def supports_catalog(self) -> bool:
+        # Catalogs were introduced in 2014
+        return self >= Standard.IEEE_1685_2014
+
 
 #===============================================================================
 class IPXACTExporter:
@@ -52,6 +77,40 @@ class IPXACTExporter:
             String to use for each indent level. Defaults to 2 spaces.
         xml_newline: str
             String to use for line breaks. Defaults to a newline (``\\n``).
+        streaming: bool
+            If True, the XML document is written out incrementally while the
+            register model is traversed, rather than building the complete
+            document in memory first. Output is identical, but memory usage
+            is no longer proportional to the size of the design.
+            Defaults to False.
+        jobs: int
+            Number of worker processes used to export the top-level
+            addressBlocks in parallel. Only applies if the top node is split
+            into multiple addressBlocks. Implies ``streaming``, and requires a
+            platform that supports forking processes. Otherwise the export
+            falls back to running serially. Defaults to 1.
+        cache_fragments: bool
+            If True, the serialized contents of registers and fields are
+            memoized. Instances that share the same original definition, and
+            whose properties are identical, reuse the cached contents rather
+            than exporting them again. Only per-instance elements such as
+            names and address offsets are generated for each instance.
+            Caching is disabled for any vendorExtensions or naming hooks that
+            were overridden by an extended exporter class.
+            Defaults to False.
+        incremental: bool
+            If True, a manifest is saved alongside each exported file. It holds
+            a fingerprint of the exported register model and settings, and a
+            digest of the output. Subsequent exports are skipped entirely if
+            neither the model nor the output file changed. An output file that
+            would be rewritten with identical contents is left untouched, so
+            that its modification time is preserved.
+            Defaults to False.
+        metrics: :class:`Metrics`
+            Optional collector that records the time spent in each phase of an
+            export (``build``, ``serialize`` and ``write``), along with counts
+            of exported and discarded elements. When streaming, serialization
+            happens while elements are built, and is included in ``build``.
         """
 
 
@@ -61,12 +120,29 @@ class IPXACTExporter:
         self.standard = kwargs.pop("standard", None) or Standard.IEEE_1685_2014
         self.xml_indent = kwargs.pop("xml_indent", None) or "  "
         self.xml_newline = kwargs.pop("xml_newline", None) or "\n"
+        self.streaming = kwargs.pop("streaming", False)
+        self.jobs = kwargs.pop("jobs", None) or 1
+        self.cache_fragments = kwargs.pop("cache_fragments", False)
+        self.incremental = kwargs.pop("incremental", False)
+        self.metrics = kwargs.pop("metrics", None) # type: Optional[Metrics]
         self._max_width = None # type: Optional[int]
 
+        # Cached register/field contents. Either serialized text when
+        # streaming, or a list of DOM nodes to be cloned. Along with the
+        # metrics counts of the elements they contain.
+        self._fragments = {} # type: Dict[Hashable, Tuple[Union[str, List[minidom.Node]], Dict[str, int]]]
+
         # Check for stray kwargs
         if kwargs:
             raise TypeError("got an unexpected keyword argument '%s'" % list(kwargs.keys())[0])
 
+        self._set_standard(self.standard)
+
+        # Snapshots shared with other exports of the same design, if any
+        self._shared_snapshots = None # type: Optional[SnapshotCache]
+
+    def _set_standard(self, standard: Standard) -> None:
+        self.standard = standard
         if self.standard >= Standard.IEEE_1685_2014:
             self.ns = "ipxact:"
         else:
@@ -75,8 +151,11 @@ class IPXACTExporter:
         # If standard supports isPresent tags, don't skip them
         self.skip_not_present = not self.standard.supports_isPresent
 
+        # Properties and children of nodes, resolved once per export
+        self._snapshots = SnapshotCache(self.skip_not_present)
+
     #---------------------------------------------------------------------------
-    def export(self, node: Union[AddrmapNode, RootNode], path: str, **kwargs: Any) -> None:
+    def export(self, node: Union[AddrmapNode, MemNode, RootNode], path: str, **kwargs: Any) -> None:
         """
         Parameters
         ----------
@@ -110,14 +189,417 @@ class IPXACTExporter:
                 node.property_src_ref.get('bridge', node.inst_src_ref)
             )
 
-        # Initialize XML DOM
+        if self.incremental:
+            self.export_incremental(node, path, component_name)
+        else:
+            self.write_document(node, path, component_name)
+
+    #---------------------------------------------------------------------------
+    def export_batch(self, nodes: Sequence[Union[AddrmapNode, MemNode, RootNode]], paths: Sequence[str], **kwargs: Any) -> None:
+        """
+        Export several components at once, each to its own file.
+
+        Exports are distributed across a pool of forked worker processes.
+        Workers are periodically replaced so that memory usage stays bounded
+        regardless of how many components are exported. Messages are
+        reported in the order of ``nodes``.
+
+        Parameters
+        ----------
+        nodes: list of AddrmapNode
+            Top-level SystemRDL nodes to export. Typically all from the same
+            compiled design.
+        paths: list of str
+            Path to save each node's exported XML file.
+        component_names: list of str
+            IP-XACT component name of each node. If unspecified, or if an entry
+            is None, uses the node's name.
+        jobs: int
+            Number of worker processes. Defaults to 1, which exports all
+            components serially in the current process.
+        catalog: str
+            If set, also write an IP-XACT catalog to this path that lists the
+            VLNV of every exported component. Requires IEEE 1685-2014.
+        catalog_name: str
+            Name of the catalog's VLNV. Defaults to the catalog's file name.
+        """
+        component_names = kwargs.pop("component_names", None) or [None] * len(nodes)
+        jobs = kwargs.pop("jobs", None) or 1
+        catalog = kwargs.pop("catalog", None)
+        catalog_name = kwargs.pop("catalog_name", None)
+
+        # Check for stray kwargs
+        if kwargs:
+            raise TypeError("got an unexpected keyword argument '%s'" % list(kwargs.keys())[0])
+
+        if not len(nodes) == len(paths) == len(component_names):
+            raise ValueError("'nodes', 'paths' and 'component_names' must all be the same length")
+        if len(set(os.path.abspath(path) for path in paths)) != len(paths):
+            raise ValueError("Output paths of a batch export must be unique")
+        if catalog is not None and not self.standard.supports_catalog:
+            raise ValueError("IP-XACT catalogs require IEEE 1685-2014 or later")
+
+        component_names = [
+            name or node.inst_name
+            for node, name in zip(nodes, component_names)
+        ]
+
+        state = (self, nodes, paths, component_names)
+        results = parallel.imap_forked(
+            _export_task, range(len(nodes)), jobs, state,
+            max_tasks_per_child=BATCH_TASKS_PER_CHILD
+        )
+        for node, (messages, metrics_data) in zip(nodes, results):
+            # Report the messages of each component in the order of the batch
+            parallel.replay_messages(node.env.msg, messages)
+            if self.metrics is not None:
+                self.metrics.merge(metrics_data)
+
+        if catalog is not None:
+            if catalog_name is None:
+                catalog_name = os.path.splitext(os.path.basename(catalog))[0]
+            self.write_catalog(catalog, catalog_name, list(zip(component_names, paths)))
+
+    def export_sharded(self, node: Union[AddrmapNode, RootNode], directory: str, **kwargs: Any) -> List[Tuple[str, str]]:
+        """
+        Export the blocks of a design as separate components, each to its own
+        file, along with a catalog that lists all of them.
+
+        Each addrmap or mem that is an immediate child of the top node becomes
+        a shard. Shards can be generated and consumed independently, and with
+        ``incremental`` enabled, unchanged shards are not rewritten.
+
+        Registers and register files cannot be exported on their own. If the
+        top node contains any, it is exported as a single shard instead.
+
+        Raises :class:`ValueError` if the names of two shards, or of a shard
+        and the catalog, collide. Names are compared case-insensitively, since
+        they become file names.
+
+        Parameters
+        ----------
+        node: AddrmapNode
+            Top-level SystemRDL node whose blocks are exported.
+        directory: str
+            Directory that receives one file per shard.
+        max_shard_size: int
+            If set, an addrmap that contains more registers than this, and
+            that only contains other addrmaps or mems, is split into shards
+            of its children instead. Applies recursively.
+        extension: str
+            File extension of the shards, which may select compression.
+            Defaults to ".xml".
+        jobs: int
+            Number of worker processes. Defaults to 1.
+        catalog: str
+            Path of the catalog that lists the shards. Defaults to
+            ``catalog.xml`` in the output directory if the standard supports
+            catalogs. Set to None to not write a catalog.
+
+        Returns
+        -------
+        list of (component_name, path) tuples
+            Component name and output path of each shard.
+        """
+        max_shard_size = kwargs.pop("max_shard_size", None)
+        extension = kwargs.pop("extension", ".xml")
+        jobs = kwargs.pop("jobs", None) or 1
+        if self.standard.supports_catalog:
+            catalog = kwargs.pop("catalog", os.path.join(directory, "catalog.xml"))
+        else:
+            catalog = kwargs.pop("catalog", None)
+
+        # Check for stray kwargs
+        if kwargs:
+            raise TypeError("got an unexpected keyword argument '%s'" % list(kwargs.keys())[0])
+
+        self.msg = node.env.msg
+
+        # If it is the root node, skip to top addrmap
+        if isinstance(node, RootNode):
+            node = node.top
+
+        shards = self.get_shards(node, max_shard_size)
+        names = [name for name, _ in shards]
+        seen_names = {} # type: Dict[str, str]
+        for name in names:
+            if name.lower() in seen_names:
+                raise ValueError("Shard name '%s' collides with shard '%s'" % (name, seen_names[name.lower()]))
+            seen_names[name.lower()] = name
+
+        paths = [os.path.join(directory, name + extension) for name in names]
+        if catalog is not None:
+            catalog_name = os.path.splitext(os.path.basename(catalog))[0]
+            if catalog_name.lower() in seen_names:
+                raise ValueError("Catalog name '%s' collides with shard '%s'" % (catalog_name, seen_names[catalog_name.lower()]))
+            if os.path.abspath(catalog) in [os.path.abspath(path) for path in paths]:
+                raise ValueError("Catalog path '%s' collides with a shard" % catalog)
+
+        os.makedirs(directory, exist_ok=True)
+        self.export_batch(
+            [shard for _, shard in shards],
+            paths,
+            component_names=names,
+            jobs=jobs,
+            catalog=catalog,
+        )
+        return list(zip(names, paths))
+
+    def get_shards(self, node: AddrmapNode, max_shard_size: Optional[int] = None) -> List[Tuple[str, Union[AddrmapNode, MemNode]]]:
+        """
+        Returns the component name and node of each shard of a sharded
+        export. See :meth:`export_sharded`.
+        """
+        children = list(node.children(unroll=True, skip_not_present=self.skip_not_present))
+        if not all(isinstance(child, (AddrmapNode, MemNode)) for child in children):
+            # Registers and register files can only be exported as part of
+            # their parent, so it is not split
+            self.msg.warning(
+                "'%s' contains registers or register files, so it is exported as a single component"
+                % node.get_path(),
+                node.inst_src_ref
+            )
+            return [(node.inst_name, node)]
+
+        shards = [] # type: List[Tuple[str, Union[AddrmapNode, MemNode]]]
+        for child in children:
+            assert isinstance(child, (AddrmapNode, MemNode))
+            if child.current_idx is None:
+                name = child.inst_name
+            else:
+                name = "_".join([child.inst_name] + [str(i) for i in child.current_idx])
+
+            if (
+                max_shard_size is not None
+                and isinstance(child, AddrmapNode)
+                and self._is_splittable(child, max_shard_size)
+            ):
+                for sub_name, shard in self.get_shards(child, max_shard_size):
+                    shards.append((name + "_" + sub_name, shard))
+            else:
+                shards.append((name, child))
+        return shards
+
+    def _is_splittable(self, node: AddrmapNode, max_shard_size: int) -> bool:
+        children = list(node.children(skip_not_present=self.skip_not_present))
+        if not children or not all(isinstance(child, (AddrmapNode, MemNode)) for child in children):
+            return False
+        n_registers = sum(
+            1 for desc in node.descendants(unroll=True, skip_not_present=self.skip_not_present)
+            if isinstance(desc, RegNode)
+        )
+        return n_registers > max_shard_size
+
+    def export_multi(self, node: Union[AddrmapNode, MemNode, RootNode], sinks: Sequence['ExportSink'], **kwargs: Any) -> None:
+        """
+        Export the same design to several outputs, such as IP-XACT files of
+        different standards and a JSON address summary.
+
+        Each output traverses the design on its own, but the snapshots of
+        nodes' properties and children are shared by all of them, so that
+        each node's properties are only resolved once. Messages that several
+        outputs report identically are only reported once.
+
+        Parameters
+        ----------
+        node: AddrmapNode
+            Top-level SystemRDL node to export.
+        sinks: list of :class:`ExportSink`
+            Outputs to write, such as :class:`XMLSink` or
+            :class:`JSONSummarySink`.
+        component_name: str
+            IP-XACT component name. If unspecified, uses the top node's name
+            upon export.
+        """
+        component_name = kwargs.pop("component_name", None)
+
+        # Check for stray kwargs
+        if kwargs:
+            raise TypeError("got an unexpected keyword argument '%s'" % list(kwargs.keys())[0])
+
+        self.msg = node.env.msg
+
+        # If it is the root node, skip to top addrmap
+        if isinstance(node, RootNode):
+            node = node.top
+
+        snapshots = SnapshotCache(self.skip_not_present, share_nodes=True)
+        reported = set() # type: Set[parallel.RecordedMessage]
+        for sink in sinks:
+            with _recorded_messages(self, node) as messages:
+                sink.write(self, node, component_name or node.inst_name, snapshots)
+            messages = [message for message in messages if message not in reported]
+            reported.update(messages)
+            parallel.replay_messages(self.msg, messages)
+
+    def for_standard(self, standard: Standard, snapshots: Optional[SnapshotCache] = None) -> 'IPXACTExporter':
+        """
+        Returns a copy of this exporter, with all of its settings, that emits
+        a different IP-XACT standard.
+
+        If ``snapshots`` is given, the copy reuses the properties and children
+        of nodes that were already resolved by it.
+        """
+        other = copy.copy(self)
+        other._set_standard(standard)
+        other._fragments = {}
+        if snapshots is not None:
+            other._shared_snapshots = snapshots.view(other.skip_not_present)
+        return other
+
+    def write_catalog(self, path: str, name: str, components: Sequence[Tuple[str, str]]) -> None:
+        """
+        Write an IP-XACT catalog.
+
+        Parameters
+        ----------
+        path: str
+            Path to save the catalog XML file.
+        name: str
+            Name of the catalog's VLNV.
+        components: list of (component_name, path) tuples
+            Components to list in the catalog. All of them share this
+            exporter's vendor, library, and version.
+        """
         self.doc = minidom.getDOMImplementation().createDocument(None, None, None)
+        comment = self.doc.createComment("Generated by PeakRDL IP-XACT (https://github.com/SystemRDL/PeakRDL-ipxact)")
+        self.doc.appendChild(comment)
 
-        tmp = self.doc.createComment("Generated by PeakRDL IP-XACT (https://github.com/SystemRDL/PeakRDL-ipxact)")
-        self.doc.appendChild(tmp)
+        catalog = self.doc.createElement(self.ns + "catalog")
+        self.doc.appendChild(catalog)
+        catalog.setAttribute("xmlns:ipxact", "http://www.accellera.org/XMLSchema/IPXACT/1685-2014")
+        catalog.setAttribute("xmlns:xsi", "http://www.w3.org/2001/XMLSchema-instance")
+        catalog.setAttribute("xsi:schemaLocation", "http://www.accellera.org/XMLSchema/IPXACT/1685-2014 http://www.accellera.org/XMLSchema/IPXACT/1685-2014/index.xsd")
+
+        # versionedIdentifier Block
+        self.add_value(catalog, self.ns + "vendor", self.vendor)
+        self.add_value(catalog, self.ns + "library", self.library)
+        self.add_value(catalog, self.ns + "name", name)
+        self.add_value(catalog, self.ns + "version", self.version)
+
+        # Component paths are relative to the catalog
+        catalog_dir = os.path.dirname(os.path.abspath(path))
+        comps = self.add_element(catalog, self.ns + "components")
+        for component_name, component_path in components:
+            ipxactFile = self.add_element(comps, self.ns + "ipxactFile")
+            vlnv = self.doc.createElement(self.ns + "vlnv")
+            vlnv.setAttribute("vendor", self.vendor)
+            vlnv.setAttribute("library", self.library)
+            vlnv.setAttribute("name", component_name)
+            vlnv.setAttribute("version", self.version)
+            ipxactFile.appendChild(vlnv)
+            rel_path = os.path.relpath(os.path.abspath(component_path), catalog_dir)
+            self.add_value(ipxactFile, self.ns + "name", rel_path.replace(os.sep, "/"))
+
+        with compression.open_text(path, "w", encoding='utf-8') as f:
+            self.doc.writexml(
+                f,
+                addindent=self.xml_indent,
+                newl=self.xml_newline,
+                encoding="UTF-8"
+            )
+
+    #---------------------------------------------------------------------------
+    def export_incremental(self, node: Union[AddrmapNode, MemNode], path: str, component_name: str) -> None:
+        manifest_path = path + ".manifest"
+        fingerprint = manifest.model_fingerprint(node, *self.get_fingerprint_settings(component_name))
+        if manifest.is_up_to_date(path, manifest_path, fingerprint):
+            return
+
+        # Export to a temporary file first, and only replace the output if it
+        # would actually change
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(path)),
+            suffix=".tmp" + compression.get_extension(path)
+        )
+        os.close(fd)
+        try:
+            self.write_document(node, tmp_path, component_name)
+            digest = manifest.file_digest(tmp_path)
+            if digest == manifest.file_digest(path):
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        manifest.write_manifest(manifest_path, manifest.make_manifest(fingerprint, path, digest))
+
+    def get_fingerprint_settings(self, component_name: str) -> List[Any]:
+        """
+        Returns all values other than the register model itself that affect
+        the exported output.
+        """
+        cls = type(self)
+        return [
+            "%s.%s" % (cls.__module__, cls.__qualname__),
+            self.standard, self.vendor, self.library, self.version,
+            self.xml_indent, self.xml_newline, component_name,
+        ]
+
+    #---------------------------------------------------------------------------
+    def write_document(self, node: Union[AddrmapNode, MemNode], path: str, component_name: str) -> None:
+        # Initialize XML DOM
+        self.doc = minidom.getDOMImplementation().createDocument(None, None, None)
+        self._fragments = {}
+        if self._shared_snapshots is not None:
+            self._snapshots = self._shared_snapshots
+        else:
+            self._snapshots = SnapshotCache(self.skip_not_present)
+
+        comment = self.doc.createComment("Generated by PeakRDL IP-XACT (https://github.com/SystemRDL/PeakRDL-ipxact)")
+
+        if self.streaming or self.jobs > 1:
+            try:
+                with compression.open_text(path, "w", encoding='utf-8') as f:
+                    writer = XMLStreamWriter(self.get_timed_file(f), self.doc, self.xml_indent, self.xml_newline)
+                    writer.write_declaration("UTF-8")
+                    writer.write_node(comment, "")
+                    stream_comp = writer.create_root_element(self.ns + "component")
+                    # Elements are serialized while they are built
+                    with phase(self.metrics, "build"):
+                        self.add_component(stream_comp, node, component_name)
+                    stream_comp.close()
+            except BaseException:
+                # Do not leave a truncated document behind
+                if os.path.exists(path):
+                    os.remove(path)
+                raise
+            return
+
+        self.doc.appendChild(comment)
 
         # Create top-level component
         comp = self.doc.createElement(self.ns + "component")
+        self.doc.appendChild(comp)
+        with phase(self.metrics, "build"):
+            self.add_component(comp, node, component_name)
+
+        # Write out XML dom
+        with compression.open_text(path, "w", encoding='utf-8') as f:
+            with phase(self.metrics, "serialize"):
+                self.doc.writexml(
+                    self.get_timed_file(f),
+                    addindent=self.xml_indent,
+                    newl=self.xml_newline,
+                    encoding="UTF-8"
+                )
+
+    def get_timed_file(self, f: TextIO) -> TextIO:
+        # Attribute time spent writing to the file to the write phase
+        if self.metrics is None:
+            return f
+        return cast(TextIO, TimedWriter(f, self.metrics, "write"))
+
+    def count(self, name: str, n: int = 1) -> None:
+        # Count an element in the metrics, if enabled
+        if self.metrics is not None:
+            self.metrics.count(name, n)
+
+    #---------------------------------------------------------------------------
+    def add_component(self, comp: ParentElement, node: Union[AddrmapNode, MemNode], component_name: str) -> None:
         if self.standard == Standard.IEEE_1685_2014:
             comp.setAttribute("xmlns:ipxact", "http://www.accellera.org/XMLSchema/IPXACT/1685-2014")
             comp.setAttribute("xmlns:xsi", "http://www.w3.org/2001/XMLSchema-instance")
@@ -129,7 +611,6 @@ class IPXACTExporter:
 
         else:
             raise RuntimeError
-        self.doc.appendChild(comp)
 
         # versionedIdentifier Block
         self.add_value(comp, self.ns + "vendor", self.vendor)
@@ -137,8 +618,7 @@ class IPXACTExporter:
         self.add_value(comp, self.ns + "name", component_name)
         self.add_value(comp, self.ns + "version", self.version)
 
-        mmaps = self.doc.createElement(self.ns + "memoryMaps")
-        comp.appendChild(mmaps)
+        mmaps = self.add_element(comp, self.ns + "memoryMaps")
 
         # Determine if top-level node should be exploded across multiple
         # addressBlock groups
@@ -154,11 +634,12 @@ class IPXACTExporter:
         #
         # Otherwise, do not "explode" the top-level node
         # (explode --> False)
+        snap = self.get_snapshot(node)
         if isinstance(node, AddrmapNode):
             addrblockable_children = 0
             non_addrblockable_children = 0
 
-            for child in node.children(skip_not_present=self.skip_not_present):
+            for child in snap.children():
                 if not isinstance(child, AddressableNode):
                     continue
 
@@ -173,49 +654,92 @@ class IPXACTExporter:
         # Do the export!
         if explode:
             # top-node becomes the memoryMap
-            mmap = self.doc.createElement(self.ns + "memoryMap")
+            mmap = self.add_element(mmaps, self.ns + "memoryMap")
+            self.count("memoryMaps")
             self.add_nameGroup(mmap,
                 node.inst_name,
-                node.get_property("name", default=None),
-                node.get_property("desc")
+                snap.get_property("name", default=None),
+                snap.get_property("desc")
             )
-            mmaps.appendChild(mmap)
 
             # Top-node's children become their own addressBlocks
-            for child in node.children(skip_not_present=self.skip_not_present):
-                if not isinstance(child, AddressableNode):
-                    continue
-
-                self.add_addressBlock(mmap, child)
+            children = [
+                child for child in snap.children()
+                if isinstance(child, AddressableNode)
+            ]
+            if self.jobs > 1 and isinstance(mmap, StreamElement):
+                self.add_addressBlocks_parallel(mmap, children)
+            else:
+                for child in children:
+                    self.add_addressBlock(mmap, child)
+            close_element(mmap)
         else:
             # Not exploding apart the top-level node
 
             # Wrap it in a dummy memoryMap that bears its name
-            mmap = self.doc.createElement(self.ns + "memoryMap")
+            mmap = self.add_element(mmaps, self.ns + "memoryMap")
+            self.count("memoryMaps")
             self.add_nameGroup(mmap, "%s_mmap" % node.inst_name)
-            mmaps.appendChild(mmap)
 
             # Export top-level node as a single addressBlock
             self.add_addressBlock(mmap, node)
+            close_element(mmap)
 
-        # Write out XML dom
-        with open(path, "w", encoding='utf-8') as f:
-            self.doc.writexml(
-                f,
-                addindent=self.xml_indent,
-                newl=self.xml_newline,
-                encoding="UTF-8"
-            )
+        close_element(mmaps)
+
+    #---------------------------------------------------------------------------
+    def add_addressBlocks_parallel(self, parent: StreamElement, nodes: List[AddressableNode]) -> None:
+        """
+        Export several independent addressBlocks using a process pool.
+
+        Each addressBlock is serialized separately by a worker, and the
+        resulting fragments are stitched into the document in their original
+        order. Messages of the workers are reported in the same order.
+        """
+        state = (self, nodes, parent.indent)
+        for fragment, messages, metrics_data in parallel.imap_forked(_render_addressBlock_task, range(len(nodes)), self.jobs, state):
+            parallel.replay_messages(self.msg, messages)
+            if self.metrics is not None:
+                self.metrics.merge(metrics_data)
+            assert fragment is not None
+            parent.append_raw(fragment)
+
+    def render_addressBlock(self, node: AddressableNode, parent_indent: str) -> str:
+        """
+        Serialize an addressBlock as if it was appended to a parent element
+        with the given indentation.
+        """
+        buf = io.StringIO()
+        writer = XMLStreamWriter(buf, self.doc, self.xml_indent, self.xml_newline)
+        self.add_addressBlock(writer.create_fragment(parent_indent), node)
+        return buf.getvalue()
 
     #---------------------------------------------------------------------------
-    def add_value(self, parent: minidom.Element, tag: str, value: str) -> None:
+    def add_element(self, parent: ParentElement, tag: str) -> ParentElement:
+        """
+        Append a new element that will enclose further child elements.
+
+        When streaming, the returned element is written out as its children
+        are appended, and shall be finished using ``close_element()``.
+        """
+        if isinstance(parent, StreamElement):
+            stream_el = StreamElement(parent.writer, tag)
+            parent.appendChild(stream_el)
+            return stream_el
+
+        el = self.doc.createElement(tag)
+        parent.appendChild(el)
+        return el
+
+    #---------------------------------------------------------------------------
+    def add_value(self, parent: ParentElement, tag: str, value: str) -> None:
         el = self.doc.createElement(tag)
         txt = self.doc.createTextNode(value)
         el.appendChild(txt)
         parent.appendChild(el)
 
     #---------------------------------------------------------------------------
-    def add_nameGroup(self, parent: minidom.Element, name: str, displayName: Optional[str]=None, description: Optional[str]=None) -> None:
+    def add_nameGroup(self, parent: ParentElement, name: str, displayName: Optional[str]=None, description: Optional[str]=None) -> None:
         self.add_value(parent, self.ns + "name", name)
         if displayName is not None:
             self.add_value(parent, self.ns + "displayName", displayName)
@@ -223,14 +747,15 @@ class IPXACTExporter:
             self.add_value(parent, self.ns + "description", description)
 
     #---------------------------------------------------------------------------
-    def add_registerData(self, parent: minidom.Element, node: AddressableNode) -> None:
+    def add_registerData(self, parent: ParentElement, node: AddressableNode) -> None:
+        children = self.get_snapshot(node).children()
         if self.standard == Standard.IEEE_1685_2009:
             # registers must all be listed before register files
-            for child in node.children(skip_not_present=self.skip_not_present):
+            for child in children:
                 if isinstance(child, RegNode):
                     self.add_register(parent, child)
 
-            for child in node.children(skip_not_present=self.skip_not_present):
+            for child in children:
                 if isinstance(child, (AddrmapNode, RegfileNode)):
                     self.add_registerFile(parent, child)
                 elif isinstance(child, MemNode):
@@ -239,9 +764,10 @@ class IPXACTExporter:
                         % child.get_path(),
                         child.inst_src_ref
                     )
+                    self.count("discarded.mems")
         else:
             # registers and registerFiles can be interleaved
-            for child in node.children(skip_not_present=self.skip_not_present):
+            for child in children:
                 if isinstance(child, RegNode):
                     self.add_register(parent, child)
                 elif isinstance(child, (AddrmapNode, RegfileNode)):
@@ -252,6 +778,15 @@ class IPXACTExporter:
                         % child.get_path(),
                         child.inst_src_ref
                     )
+                    self.count("discarded.mems")
+
+    #---------------------------------------------------------------------------
+    def get_snapshot(self, node: Node) -> NodeSnapshot:
+        """
+        Returns a snapshot of the node that caches its properties and children
+        for the remainder of the export.
+        """
+        return self._snapshots.get(node)
 
     #---------------------------------------------------------------------------
     def hex_str(self, v: int) -> str:
@@ -271,19 +806,20 @@ class IPXACTExporter:
         return node.raw_address_offset
 
     #---------------------------------------------------------------------------
-    def add_addressBlock(self, parent: minidom.Element, node: AddressableNode) -> None:
+    def add_addressBlock(self, parent: ParentElement, node: AddressableNode) -> None:
         self._max_width = None
 
-        addressBlock = self.doc.createElement(self.ns + "addressBlock")
-        parent.appendChild(addressBlock)
+        snap = self.get_snapshot(node)
+        addressBlock = self.add_element(parent, self.ns + "addressBlock")
+        self.count("addressBlocks")
 
         self.add_nameGroup(addressBlock,
             self.get_name(node),
-            node.get_property("name", default=None),
-            node.get_property("desc")
+            snap.get_property("name", default=None),
+            snap.get_property("desc")
         )
 
-        if self.standard.supports_isPresent and not node.get_property("ispresent"):
+        if self.standard.supports_isPresent and not snap.get_property("ispresent"):
             self.add_value(addressBlock, self.ns + "isPresent", "0")
 
         self.add_value(addressBlock, self.ns + "baseAddress", self.hex_str(node.absolute_address))
@@ -294,15 +830,21 @@ class IPXACTExporter:
 
         # RDL only encodes the bus-width at the register level, but IP-XACT
         # only encodes this at the addressBlock level!
-        # Insert the width element for now, but leave contents blank until it is
-        # determined later.
         # Exporter has no choice but to enforce a constant width throughout
-        width_el = self.doc.createElement(self.ns + "width")
-        addressBlock.appendChild(width_el)
+        width_el = None # type: Optional[minidom.Element]
+        if isinstance(addressBlock, StreamElement):
+            # Elements that were already streamed out cannot be revisited.
+            # Determine the width up-front instead.
+            self.add_value(addressBlock, self.ns + "width", "%d" % self.get_addressBlock_width(node))
+        else:
+            # Insert the width element for now, but leave contents blank until it is
+            # determined later.
+            width_el = self.doc.createElement(self.ns + "width")
+            addressBlock.appendChild(width_el)
 
         if isinstance(node, MemNode):
             self.add_value(addressBlock, self.ns + "usage", "memory")
-            access = typemaps.access_from_sw(node.get_property("sw"))
+            access = typemaps.access_from_sw(snap.get_property("sw"))
             self.add_value(addressBlock, self.ns + "access", access)
 
         # DNE: <spirit/ipxact:volatile>
@@ -311,33 +853,68 @@ class IPXACTExporter:
 
         self.add_registerData(addressBlock, node)
 
-        # Width should be known by now
-        # If mem, and width isn't known, check memwidth
-        if isinstance(node, MemNode) and (self._max_width is None):
-            self._max_width = node.get_property("memwidth")
+        if width_el is not None:
+            # Width should be known by now
+            # If mem, and width isn't known, check memwidth
+            if isinstance(node, MemNode) and (self._max_width is None):
+                self._max_width = snap.get_property("memwidth")
 
-        if self._max_width is not None:
-            width_el.appendChild(self.doc.createTextNode("%d" % self._max_width))
-        else:
-            width_el.appendChild(self.doc.createTextNode("32"))
+            if self._max_width is not None:
+                width_el.appendChild(self.doc.createTextNode("%d" % self._max_width))
+            else:
+                width_el.appendChild(self.doc.createTextNode("32"))
 
         vendorExtensions = self.doc.createElement(self.ns + "vendorExtensions")
         self.addressBlock_vendorExtensions(vendorExtensions, node)
         if vendorExtensions.hasChildNodes():
             addressBlock.appendChild(vendorExtensions)
 
+        close_element(addressBlock)
+
+    #---------------------------------------------------------------------------
+    def get_addressBlock_width(self, node: AddressableNode) -> int:
+        """
+        Determine the value of an addressBlock's <width> element ahead of time.
+
+        Equivalent to the width that is accumulated by add_register() while
+        the addressBlock's contents are exported.
+        """
+        max_width = None # type: Optional[int]
+        for reg in self._iter_exported_registers(node):
+            regwidth = self.get_snapshot(reg).get_property("regwidth")
+            if max_width is None:
+                max_width = regwidth
+            else:
+                max_width = max(regwidth, max_width)
+
+        if isinstance(node, MemNode) and (max_width is None):
+            max_width = self.get_snapshot(node).get_property("memwidth")
+
+        if max_width is None:
+            return 32
+        return max_width
+
+    def _iter_exported_registers(self, node: Node) -> Iterator[RegNode]:
+        # Visits the same registers as add_registerData()
+        for child in self.get_snapshot(node).children():
+            if isinstance(child, RegNode):
+                yield child
+            elif isinstance(child, (AddrmapNode, RegfileNode)):
+                yield from self._iter_exported_registers(child)
+
     #---------------------------------------------------------------------------
-    def add_registerFile(self, parent: minidom.Element, node: Union[RegfileNode, AddrmapNode]) -> None:
-        registerFile = self.doc.createElement(self.ns + "registerFile")
-        parent.appendChild(registerFile)
+    def add_registerFile(self, parent: ParentElement, node: Union[RegfileNode, AddrmapNode]) -> None:
+        snap = self.get_snapshot(node)
+        registerFile = self.add_element(parent, self.ns + "registerFile")
+        self.count("registerFiles")
 
         self.add_nameGroup(registerFile,
             self.get_name(node),
-            node.get_property("name", default=None),
-            node.get_property("desc")
+            snap.get_property("name", default=None),
+            snap.get_property("desc")
         )
 
-        if self.standard.supports_isPresent and not node.get_property("ispresent"):
+        if self.standard.supports_isPresent and not snap.get_property("ispresent"):
             self.add_value(registerFile, self.ns + "isPresent", "0")
 
         if node.array_dimensions:
@@ -365,22 +942,25 @@ class IPXACTExporter:
         if vendorExtensions.hasChildNodes():
             registerFile.appendChild(vendorExtensions)
 
+        close_element(registerFile)
+
     #---------------------------------------------------------------------------
-    def add_register(self, parent: minidom.Element, node: RegNode) -> None:
-        register = self.doc.createElement(self.ns + "register")
-        parent.appendChild(register)
+    def add_register(self, parent: ParentElement, node: RegNode) -> None:
+        snap = self.get_snapshot(node)
+        register = self.add_element(parent, self.ns + "register")
+        self.count("registers")
 
         self.add_nameGroup(register,
             self.get_name(node),
-            node.get_property("name", default=None),
-            node.get_property("desc")
+            snap.get_property("name", default=None),
+            snap.get_property("desc")
         )
 
-        if self.standard.supports_isPresent and not node.get_property("ispresent"):
+        if self.standard.supports_isPresent and not snap.get_property("ispresent"):
             self.add_value(register, self.ns + "isPresent", "0")
 
         if node.array_dimensions:
-            if node.array_stride != (node.get_property("regwidth") / 8):
+            if node.array_stride != (snap.get_property("regwidth") / 8):
                 self.msg.fatal(
                     "IP-XACT does not support register arrays whose stride is larger then the register's size",
                     node.inst_src_ref
@@ -390,14 +970,31 @@ class IPXACTExporter:
 
         self.add_value(register, self.ns + "addressOffset", self.hex_str(self.get_reg_addr_offset(node)))
 
-        # DNE: <spirit/ipxact:typeIdentifier>
-
-        self.add_value(register, self.ns + "size", "%d" % node.get_property("regwidth"))
-
+        regwidth = snap.get_property("regwidth")
         if self._max_width is None:
-            self._max_width = node.get_property("regwidth")
+            self._max_width = regwidth
         else:
-            self._max_width = max(node.get_property("regwidth"), self._max_width)
+            self._max_width = max(regwidth, self._max_width)
+
+        key = self.get_register_fragment_key(node)
+        if key is None:
+            self.add_register_contents(register, node)
+        else:
+            self.add_cached_fragment(register, key, self.add_register_contents, node)
+
+        close_element(register)
+
+    def add_register_contents(self, register: ParentElement, node: RegNode) -> None:
+        # Everything that follows the register's addressOffset
+        snap = self.get_snapshot(node)
+        fields = [
+            child for child in snap.children()
+            if isinstance(child, FieldNode)
+        ]
+
+        # DNE: <spirit/ipxact:typeIdentifier>
+
+        self.add_value(register, self.ns + "size", "%d" % snap.get_property("regwidth"))
 
         # DNE: <spirit/ipxact:volatile>
         # DNE: <spirit/ipxact:access>
@@ -405,8 +1002,8 @@ class IPXACTExporter:
         if self.standard <= Standard.IEEE_1685_2009:
             reset = 0
             mask = 0
-            for field in node.fields(skip_not_present=self.skip_not_present):
-                field_reset = field.get_property("reset")
+            for field in fields:
+                field_reset = self.get_snapshot(field).get_property("reset")
                 if isinstance(field_reset, int):
                     field_mask = ((1 << field.width) - 1) << field.lsb
                     field_reset = (field_reset << field.lsb) & field_mask
@@ -415,11 +1012,11 @@ class IPXACTExporter:
 
             if mask != 0:
                 reset_el = self.doc.createElement(self.ns + "reset")
-                register.appendChild(reset_el)
                 self.add_value(reset_el, self.ns + "value", self.hex_str(reset))
                 self.add_value(reset_el, self.ns + "mask", self.hex_str(mask))
+                register.appendChild(reset_el)
 
-        for field in node.fields(skip_not_present=self.skip_not_present):
+        for field in fields:
             self.add_field(register, field)
 
         # DNE: <spirit/ipxact:alternateRegisters> [...]
@@ -431,29 +1028,42 @@ class IPXACTExporter:
             register.appendChild(vendorExtensions)
 
     #---------------------------------------------------------------------------
-    def add_field(self, parent: minidom.Element, node: FieldNode) -> None:
-        field = self.doc.createElement(self.ns + "field")
-        parent.appendChild(field)
+    def add_field(self, parent: ParentElement, node: FieldNode) -> None:
+        snap = self.get_snapshot(node)
+        field = self.add_element(parent, self.ns + "field")
+        self.count("fields")
 
         self.add_nameGroup(field,
             self.get_name(node),
-            node.get_property("name", default=None),
-            node.get_property("desc")
+            snap.get_property("name", default=None),
+            snap.get_property("desc")
         )
 
-        if self.standard.supports_isPresent and not node.get_property("ispresent"):
+        if self.standard.supports_isPresent and not snap.get_property("ispresent"):
             self.add_value(field, self.ns + "isPresent", "0")
 
         self.add_value(field, self.ns + "bitOffset", "%d" % node.low)
 
         if self.standard >= Standard.IEEE_1685_2014:
-            reset = node.get_property("reset")
+            reset = snap.get_property("reset")
             if isinstance(reset, int):
                 resets_el = self.doc.createElement(self.ns + "resets")
-                field.appendChild(resets_el)
                 reset_el = self.doc.createElement(self.ns + "reset")
                 resets_el.appendChild(reset_el)
                 self.add_value(reset_el, self.ns + "value", self.hex_str(reset))
+                field.appendChild(resets_el)
+
+        key = self.get_field_fragment_key(node)
+        if key is None:
+            self.add_field_contents(field, node)
+        else:
+            self.add_cached_fragment(field, key, self.add_field_contents, node)
+
+        close_element(field)
+
+    def add_field_contents(self, field: ParentElement, node: FieldNode) -> None:
+        # Everything that follows the field's bitOffset and resets
+        snap = self.get_snapshot(node)
 
         # DNE: <spirit/ipxact:typeIdentifier>
 
@@ -462,17 +1072,17 @@ class IPXACTExporter:
         if node.is_volatile:
             self.add_value(field, self.ns + "volatile", "true")
 
-        sw = node.get_property("sw")
+        sw = snap.get_property("sw")
         self.add_value(
             field,
             self.ns + "access",
             typemaps.access_from_sw(sw)
         )
 
-        encode = node.get_property("encode")
+        encode = snap.get_property("encode")
         if encode is not None:
+            self.count("enums")
             enum_values_el = self.doc.createElement(self.ns + "enumeratedValues")
-            field.appendChild(enum_values_el)
             for enum_value in encode:
                 enum_value_el = self.doc.createElement(self.ns + "enumeratedValue")
                 enum_values_el.appendChild(enum_value_el)
@@ -483,8 +1093,9 @@ class IPXACTExporter:
                 )
                 self.add_value(enum_value_el, self.ns + "value", self.hex_str(enum_value.value))
                 # DNE <spirit/ipxact:vendorExtensions>
+            field.appendChild(enum_values_el)
 
-        onwrite = node.get_property("onwrite")
+        onwrite = snap.get_property("onwrite")
         if onwrite:
             self.add_value(
                 field,
@@ -494,7 +1105,7 @@ class IPXACTExporter:
 
         # DNE: <spirit/ipxact:writeValueConstraint>
 
-        onread = node.get_property("onread")
+        onread = snap.get_property("onread")
         if onread:
             self.add_value(
                 field,
@@ -502,7 +1113,7 @@ class IPXACTExporter:
                 typemaps.readaction_from_onread(onread)
             )
 
-        if node.get_property("donttest"):
+        if snap.get_property("donttest"):
             self.add_value(field, self.ns + "testable", "false")
 
         # DNE: <ipxact:reserved>
@@ -514,6 +1125,107 @@ class IPXACTExporter:
         if vendorExtensions.hasChildNodes():
             field.appendChild(vendorExtensions)
 
+    #---------------------------------------------------------------------------
+    def add_cached_fragment(self, parent: ParentElement, key: Hashable, add_contents: Callable[[ParentElement, NodeT], None], node: NodeT) -> None:
+        """
+        Append the contents that ``add_contents()`` would add to parent,
+        reusing the result of a previous call with the same key if possible.
+        """
+        if isinstance(parent, StreamElement):
+            # Serialized text also depends on the indentation level
+            key = (key, parent.indent)
+
+        entry = self._fragments.get(key, None)
+        if entry is None:
+            # Remember which elements the fragment contains, so that they are
+            # counted again whenever it is reused
+            counts_before = dict(self.metrics.counts) if self.metrics is not None else {}
+
+            if isinstance(parent, StreamElement):
+                buf = io.StringIO()
+                writer = XMLStreamWriter(buf, self.doc, self.xml_indent, self.xml_newline)
+                add_contents(writer.create_fragment(parent.indent), node)
+                contents = buf.getvalue() # type: Union[str, List[minidom.Node]]
+            else:
+                container = self.doc.createElement("fragment")
+                add_contents(container, node)
+                contents = list(container.childNodes)
+
+            counts = {} # type: Dict[str, int]
+            if self.metrics is not None:
+                for name, n in self.metrics.counts.items():
+                    if n != counts_before.get(name, 0):
+                        counts[name] = n - counts_before.get(name, 0)
+            self._fragments[key] = (contents, counts)
+        else:
+            contents, counts = entry
+            for name, n in counts.items():
+                self.count(name, n)
+
+        if isinstance(parent, StreamElement):
+            assert isinstance(contents, str)
+            parent.append_raw(contents)
+        else:
+            assert isinstance(contents, list)
+            for cached_node in contents:
+                clone = cached_node.cloneNode(True)
+                assert isinstance(clone, minidom.Element)
+                parent.appendChild(clone)
+
+    def get_register_fragment_key(self, node: RegNode) -> Optional[Hashable]:
+        """
+        Returns a key that identifies the contents of a register, or None if
+        they shall not be cached.
+        """
+        if not self.cache_fragments or self._hooks_overridden("get_name", "register_vendorExtensions", "field_vendorExtensions"):
+            return None
+
+        inst = node.inst
+        if inst.original_def is None:
+            return None
+
+        # Per-instance properties are not part of the cached contents
+        props = {k: v for k, v in inst.properties.items() if k not in ("name", "desc", "ispresent")}
+        key = (
+            "register", id(inst.original_def), freeze_dict(props),
+            tuple(
+                (field.inst_name, field.lsb, field.width, freeze_dict(field.properties))
+                for field in inst.children if isinstance(field, Field)
+            )
+        )
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get_field_fragment_key(self, node: FieldNode) -> Optional[Hashable]:
+        """
+        Returns a key that identifies the contents of a field, or None if
+        they shall not be cached.
+        """
+        if not self.cache_fragments or self._hooks_overridden("field_vendorExtensions"):
+            return None
+
+        inst = node.inst
+        if inst.original_def is None:
+            return None
+
+        props = {k: v for k, v in inst.properties.items() if k not in ("name", "desc", "ispresent", "reset")}
+        key = ("field", id(inst.original_def), inst.width, freeze_dict(props))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _hooks_overridden(self, *method_names: str) -> bool:
+        # Extended exporters may customize output for each individual node
+        for method_name in method_names:
+            if getattr(type(self), method_name) is not getattr(IPXACTExporter, method_name):
+                return True
+        return False
+
     #---------------------------------------------------------------------------
     def addressBlock_vendorExtensions(self, parent:minidom.Element, node:AddressableNode) -> None:
         pass
@@ -526,3 +1238,70 @@ class IPXACTExporter:
 
     def field_vendorExtensions(self, parent:minidom.Element, node:FieldNode) -> None:
         pass
+
+
+def freeze_dict(d: Dict[str, Any]) -> Hashable:
+    return tuple(sorted(d.items()))
+
+def _export_task(idx: int) -> Tuple[List[parallel.RecordedMessage], Dict[str, Any]]:
+    exporter, nodes, paths, component_names = parallel.get_worker_state()
+    with _worker_messages(exporter, nodes[idx]) as messages, _worker_metrics(exporter) as metrics_data:
+        exporter.export(nodes[idx], paths[idx], component_name=component_names[idx])
+    return messages, metrics_data
+
+def _render_addressBlock_task(idx: int) -> Tuple[Optional[str], List[parallel.RecordedMessage], Dict[str, Any]]:
+    exporter, nodes, parent_indent = parallel.get_worker_state()
+    fragment = None
+    with _worker_messages(exporter, nodes[idx]) as messages, _worker_metrics(exporter) as metrics_data:
+        fragment = exporter.render_addressBlock(nodes[idx], parent_indent)
+    return fragment, messages, metrics_data
+
+@contextlib.contextmanager
+def _worker_messages(exporter: IPXACTExporter, node: Node) -> Iterator[List[parallel.RecordedMessage]]:
+    # Within a worker process, record messages so that the parent process can
+    # report them in the order of the tasks rather than as they happen. A fatal
+    # error ends the task, and is raised again once the parent replays it.
+    # When tasks run serially in the parent process, messages are reported
+    # directly instead.
+    if not parallel.in_worker():
+        yield []
+        return
+
+    with _recorded_messages(exporter, node) as messages:
+        yield messages
+
+@contextlib.contextmanager
+def _recorded_messages(exporter: IPXACTExporter, node: Node) -> Iterator[List[parallel.RecordedMessage]]:
+    # Record the messages of the exporter and node's environment, rather than
+    # reporting them. A fatal error ends the block.
+    messages = [] # type: List[parallel.RecordedMessage]
+    recorder = parallel.MessageRecorder(keep_src_refs=True)
+    prev_env_msg = node.env.msg
+    prev_msg = getattr(exporter, "msg", prev_env_msg)
+    exporter.msg = node.env.msg = recorder.create_handler()
+    try:
+        yield messages
+    except RDLCompileError:
+        pass
+    finally:
+        exporter.msg = prev_msg
+        node.env.msg = prev_env_msg
+        messages.extend(recorder.messages)
+
+@contextlib.contextmanager
+def _worker_metrics(exporter: IPXACTExporter) -> Iterator[Dict[str, Any]]:
+    # Within a worker process, collect metrics separately so that they can be
+    # sent back to the parent process. When tasks run serially in the parent
+    # process, they are collected directly instead.
+    metrics_data = {} # type: Dict[str, Any]
+    if exporter.metrics is None or not parallel.in_worker():
+        yield metrics_data
+        return
+
+    prev_metrics = exporter.metrics
+    exporter.metrics = Metrics()
+    try:
+        yield metrics_data
+        metrics_data.update(exporter.metrics.as_dict())
+    finally:
+        exporter.metrics = prev_metrics
@@ -0,0 +1,380 @@
+from typing import Optional, Dict, List, Set, Tuple, Callable, Pattern
+import re
+import functools
+import operator
+
+#: A compiled expression. Called with a function that returns the value of a
+#: referenced parameter.
+Compiled = Callable[[Callable[[str], int]], int]
+
+
+class ExpressionError(ValueError):
+    """
+    Raised if an IP-XACT integer expression cannot be parsed or evaluated.
+    """
+
+
+MULTIPLIERS = {
+    "k": 1024,
+    "m": 1024*1024,
+    "g": 1024*1024*1024,
+    "t": 1024*1024*1024*1024,
+}
+
+# Plain literals, which are the vast majority of values:
+#   - Normal decimal: 123, -456
+#   - Verilog-style: 'b10, 'o77, 'd123, 'hff, 8'hff
+#   - scaledInteger, with optional # or 0x prefix for hex, and optional
+#     K, M, G or T multiplier suffix
+LITERAL_RE = re.compile(
+    r"\s*(?:"
+    r"(?P<dec>-?\d+)(?P<dec_mult>[kmgt])?"
+    r"|(?P<hex_neg>-)?(?:0x|#)(?P<hex>[0-9a-f]+)(?P<hex_mult>[kmgt])?"
+    r"|\d*'s?(?P<base>[hdbo])(?P<digits>[0-9a-f_]+)"
+    r")\s*",
+    re.I
+)
+
+BASES = {"h": 16, "d": 10, "b": 2, "o": 8}
+
+TOKEN_RE = re.compile(
+    r"\s*(?:"
+    r"(?P<number>\d*'s?[hdbo][0-9a-f_]+|(?:0x|#)[0-9a-f]+[kmgt]?|\d+[kmgt]?)"
+    r"|(?P<name>\$?[a-z_][a-z0-9_]*)"
+    r"|(?P<op>\*\*|<<|>>|<=|>=|==|!=|&&|\|\||[-+*/%()~!&|^<>?:,])"
+    r")",
+    re.I
+)
+
+# Names that TOKEN_RE reads as a single name token
+PLAIN_NAME_RE = re.compile(r"[a-z_][a-z0-9_]*", re.I)
+
+# Parameter IDs are xs:ID values, which may also contain '-' and '.', so that
+# they cannot be told apart from an expression such as 'a-b' by their
+# characters alone. These are only tokenized as names if the component
+# defines a parameter with that exact ID.
+XS_ID_RE = re.compile(r"[^\W\d][\w.-]*")
+
+
+def parse_literal(s: str) -> Optional[int]:
+    """
+    Returns the value of a plain integer literal, or None if the string is
+    not one.
+    """
+    m = LITERAL_RE.fullmatch(s)
+    if m is None:
+        return None
+
+    if m.group("dec") is not None:
+        v = int(m.group("dec"))
+        mult = m.group("dec_mult")
+    elif m.group("hex") is not None:
+        v = int(m.group("hex"), 16)
+        if m.group("hex_neg"):
+            v = -v
+        mult = m.group("hex_mult")
+    else:
+        try:
+            return int(m.group("digits").replace("_", ""), BASES[m.group("base").lower()])
+        except ValueError:
+            return None
+
+    if mult:
+        v *= MULTIPLIERS[mult.lower()]
+    return v
+
+
+def _div(a: int, b: int) -> int:
+    # Integer division truncates towards zero, like in SystemVerilog
+    if b == 0:
+        raise ExpressionError("Division by zero")
+    q = abs(a) // abs(b)
+    if (a < 0) != (b < 0):
+        return -q
+    return q
+
+
+def _mod(a: int, b: int) -> int:
+    return a - b * _div(a, b)
+
+
+def _pow(a: int, b: int) -> int:
+    if b < 0:
+        raise ExpressionError("Negative exponent")
+    return a ** b
+
+
+def _clog2(a: int) -> int:
+    if a <= 1:
+        return 0
+    return (a - 1).bit_length()
+
+
+# Binary operators: precedence and function. Higher binds more tightly.
+BINARY_OPS = {
+    "||": (1, lambda a, b: int(bool(a) or bool(b))),
+    "&&": (2, lambda a, b: int(bool(a) and bool(b))),
+    "|": (3, operator.or_),
+    "^": (4, operator.xor),
+    "&": (5, operator.and_),
+    "==": (6, lambda a, b: int(a == b)),
+    "!=": (6, lambda a, b: int(a != b)),
+    "<": (7, lambda a, b: int(a < b)),
+    "<=": (7, lambda a, b: int(a <= b)),
+    ">": (7, lambda a, b: int(a > b)),
+    ">=": (7, lambda a, b: int(a >= b)),
+    "<<": (8, operator.lshift),
+    ">>": (8, operator.rshift),
+    "+": (9, operator.add),
+    "-": (9, operator.sub),
+    "*": (10, operator.mul),
+    "/": (10, _div),
+    "%": (10, _mod),
+    "**": (11, _pow),
+} # type: Dict[str, Tuple[int, Callable[[int, int], int]]]
+
+UNARY_OPS = {
+    "+": operator.pos,
+    "-": operator.neg,
+    "~": operator.invert,
+    "!": lambda a: int(not a),
+} # type: Dict[str, Callable[[int], int]]
+
+FUNCTIONS = {
+    "$clog2": (1, _clog2),
+    "$pow": (2, _pow),
+} # type: Dict[str, Tuple[int, Callable[..., int]]]
+
+
+def _const(v: int) -> Compiled:
+    return lambda resolve: v
+
+
+class _Parser:
+    """
+    Precedence climbing parser that compiles an expression into nested
+    closures. Constant subexpressions are folded while parsing.
+    """
+
+    def __init__(self, s: str, names: Tuple[str, ...] = ()) -> None:
+        self.s = s
+        self.tokens = self.tokenize(s, names)
+        self.pos = 0
+
+    def tokenize(self, s: str, names: Tuple[str, ...]) -> List[Tuple[str, str]]:
+        tokens = [] # type: List[Tuple[str, str]]
+        names_re = _names_re(names)
+        pos = 0
+        end = len(s.rstrip())
+        while pos < end:
+            m = None
+            if names_re is not None:
+                m = names_re.match(s, pos)
+            if m is None:
+                m = TOKEN_RE.match(s, pos)
+            if m is None or m.end() == pos:
+                raise self.error("Unexpected character '%s'" % s[pos:].strip()[0])
+            assert m.lastgroup is not None
+            tokens.append((m.lastgroup, m.group(m.lastgroup)))
+            pos = m.end()
+        return tokens
+
+    def error(self, reason: str) -> ExpressionError:
+        return ExpressionError("Unable to parse integer expression '%s': %s" % (self.s.strip(), reason))
+
+    def peek(self) -> Optional[Tuple[str, str]]:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None
+
+    def next(self) -> Tuple[str, str]:
+        token = self.peek()
+        if token is None:
+            raise self.error("Unexpected end of expression")
+        self.pos += 1
+        return token
+
+    def expect(self, op: str) -> None:
+        token = self.next()
+        if token != ("op", op):
+            raise self.error("Expected '%s' but found '%s'" % (op, token[1]))
+
+    def parse(self) -> Tuple[Compiled, bool]:
+        result = self.parse_ternary()
+        token = self.peek()
+        if token is not None:
+            raise self.error("Unexpected '%s'" % token[1])
+        return result
+
+    # Each parse method returns the compiled subexpression, and whether it is
+    # constant, i.e. does not reference any parameters.
+
+    def parse_ternary(self) -> Tuple[Compiled, bool]:
+        cond, cond_const = self.parse_binary(1)
+        if self.peek() != ("op", "?"):
+            return cond, cond_const
+        self.next()
+        a, a_const = self.parse_ternary()
+        self.expect(":")
+        b, b_const = self.parse_ternary()
+
+        def f(resolve: Callable[[str], int]) -> int:
+            if cond(resolve):
+                return a(resolve)
+            return b(resolve)
+        return self.fold(f, cond_const and a_const and b_const)
+
+    def parse_binary(self, min_prec: int) -> Tuple[Compiled, bool]:
+        lhs, lhs_const = self.parse_unary()
+        while True:
+            token = self.peek()
+            if token is None or token[0] != "op" or token[1] not in BINARY_OPS:
+                return lhs, lhs_const
+            prec, func = BINARY_OPS[token[1]]
+            if prec < min_prec:
+                return lhs, lhs_const
+            self.next()
+            # ** is right-associative. All others are left-associative.
+            rhs, rhs_const = self.parse_binary(prec if token[1] == "**" else prec + 1)
+            lhs, lhs_const = self.fold(self.binary(func, lhs, rhs), lhs_const and rhs_const)
+
+    def binary(self, func: Callable[[int, int], int], lhs: Compiled, rhs: Compiled) -> Compiled:
+        return lambda resolve: func(lhs(resolve), rhs(resolve))
+
+    def parse_unary(self) -> Tuple[Compiled, bool]:
+        kind, text = self.next()
+        if kind == "op" and text in UNARY_OPS:
+            func = UNARY_OPS[text]
+            operand, const = self.parse_unary()
+            return self.fold(lambda resolve: func(operand(resolve)), const)
+
+        if kind == "number":
+            v = parse_literal(text)
+            if v is None:
+                raise self.error("Invalid number '%s'" % text)
+            return _const(v), True
+
+        if kind == "name":
+            if text.startswith("$"):
+                return self.parse_call(text)
+            return (lambda resolve: resolve(text)), False
+
+        if text == "(":
+            result = self.parse_ternary()
+            self.expect(")")
+            return result
+
+        raise self.error("Unexpected '%s'" % text)
+
+    def parse_call(self, name: str) -> Tuple[Compiled, bool]:
+        if name not in FUNCTIONS:
+            raise self.error("Unsupported function '%s'" % name)
+        n_args, func = FUNCTIONS[name]
+        self.expect("(")
+        args = [] # type: List[Compiled]
+        const = True
+        for i in range(n_args):
+            if i:
+                self.expect(",")
+            arg, arg_const = self.parse_ternary()
+            args.append(arg)
+            const = const and arg_const
+        self.expect(")")
+        return self.fold(lambda resolve: func(*[arg(resolve) for arg in args]), const)
+
+    def fold(self, f: Compiled, const: bool) -> Tuple[Compiled, bool]:
+        if not const:
+            return f, False
+        return _const(f(self.no_references)), True
+
+    def no_references(self, name: str) -> int:
+        raise AssertionError("Constant expression references '%s'" % name)
+
+
+@functools.lru_cache(maxsize=256)
+def _names_re(names: Tuple[str, ...]) -> Optional[Pattern[str]]:
+    if not names:
+        return None
+    # Longest first, so that a name is not matched by one of its prefixes
+    alternatives = "|".join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+    return re.compile(r"\s*(?P<name>%s)(?![\w.])" % alternatives)
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_expression(s: str, names: Tuple[str, ...] = ()) -> Compiled:
+    """
+    Compiles an IP-XACT integer expression.
+
+    ``names`` are parameter IDs that contain characters other than letters,
+    digits and underscores. They take precedence over operators and numbers,
+    so that an ID such as ``size-2k`` is read as a single reference.
+
+    Compiled expressions do not depend on parameter values, so they are
+    shared by all documents.
+    """
+    return _Parser(s, names).parse()[0]
+
+
+class ExpressionEvaluator:
+    """
+    Evaluates the integer expressions of a single IP-XACT component.
+
+    In addition to the plain literal forms, this supports the
+    SystemVerilog-style expressions of IEEE 1685-2014: arithmetic, bitwise,
+    logical, relational and ternary operators, the ``$clog2()`` and ``$pow()``
+    functions, and references to the component's parameters. Parameter IDs
+    may use any of the characters of ``xs:ID``, including ``-`` and ``.``.
+
+    Integers have unlimited width, so ``~`` produces a negative value.
+
+    The value of each distinct string is only computed once.
+    """
+
+    def __init__(self, parameters: Optional[Dict[str, str]] = None) -> None:
+        """
+        Parameters
+        ----------
+        parameters: dict
+            Maps parameter IDs and names to their value expressions.
+        """
+        self.parameters = parameters or {}
+        self._names = tuple(sorted(
+            name for name in self.parameters
+            if XS_ID_RE.fullmatch(name) and not PLAIN_NAME_RE.fullmatch(name)
+        ))
+        self._values = {} # type: Dict[str, int]
+        self._resolving = set() # type: Set[str]
+
+    def evaluate(self, s: str) -> int:
+        """
+        Returns the value of an expression.
+
+        Raises :class:`ExpressionError` if it is invalid, or references an
+        unknown parameter.
+        """
+        try:
+            return self._values[s]
+        except KeyError:
+            pass
+
+        v = None
+        if not self._names:
+            v = parse_literal(s)
+        if v is None:
+            v = compile_expression(s, self._names)(self.resolve)
+        self._values[s] = v
+        return v
+
+    def resolve(self, name: str) -> int:
+        """
+        Returns the value of a parameter.
+        """
+        if name not in self.parameters:
+            raise ExpressionError("Reference to undefined parameter '%s'" % name)
+        if name in self._resolving:
+            raise ExpressionError("Parameter '%s' depends on its own value" % name)
+        self._resolving.add(name)
+        try:
+            return self.evaluate(self.parameters[name])
+        finally:
+            self._resolving.discard(name)
@@ -1,16 +1,41 @@
-from typing import Optional, List, Dict, Any, Type, Union, Set, TypeVar
+from typing import Optional, List, Dict, Any, Type, Union, Set, TypeVar, Sequence, Tuple, Iterator, Callable, Hashable
 import re
+import sys
+import fnmatch
 
 from xml.etree import ElementTree
 
-from systemrdl import RDLCompiler, RDLImporter
+from systemrdl import RDLCompiler, RDLImporter, RDLCompileError
 from systemrdl import rdltypes
 from systemrdl.messages import SourceRefBase
 from systemrdl import component as comp
 
 from . import typemaps
+from . import parallel
+from . import compression
+from .xml_backend import get_backend as get_xml_backend, parse as xml_parse, iterparse as xml_iterparse, sniff_root_tag, to_etree
+from .cache import ImportCache
+from .metrics import Metrics, timed, phase
+from .expressions import ExpressionEvaluator
 
 CT = TypeVar("CT", bound=comp.Component)
+RT = TypeVar("RT")
+
+# Decoded keys that may differ between instances that share a definition
+INSTANCE_KEYS = {'name', 'addressOffset', 'dim', 'range', 'displayName', 'description', 'isPresent'}
+
+#: Decoded enum member: (name, value, displayName, description)
+EnumMember = Tuple[str, int, Optional[str], Optional[str]]
+
+#: Result of work that was done in isolation:
+#: (result or None on fatal error, recorded messages, recorded metrics)
+Isolated = Tuple[Optional[RT], List[parallel.RecordedMessage], Dict[str, Any]]
+
+#: Decodes a child element into a FlattenedElement: (record, key, child)
+FlattenHandler = Callable[['FlattenedElement', str, ElementTree.Element], None]
+
+# Characters that are not allowed in imported identifiers
+SANITIZE_NAME_RE = re.compile(r'[:\-.]')
 
 # Expected IP-XACT namespaces. This parser is not strict about the exact version.
 VALID_NS_REGEXES = [
@@ -19,19 +44,95 @@ VALID_NS_REGEXES = [
     re.compile(r"\{http[s]?:\/\/www\.accellera\.org\/XMLSchema\/IPXACT", re.IGNORECASE),
 ]
 
+# Number of bytes at the start of a file within which the root element of an
+# IP-XACT document is expected to start
+SNIFF_SIZE = 1024 * 1024
+
 class IPXACTImporter(RDLImporter):
     ns: str
 
-    def __init__(self, compiler: RDLCompiler) -> None:
+    def __init__(self, compiler: RDLCompiler, **kwargs: Any) -> None:
         """
         Parameters
         ----------
         compiler:
             Reference to ``RDLCompiler`` instance to bind the importer to.
+
+        All other options are keyword-only:
+
+        streaming: bool
+            If True, the XML document is parsed incrementally. Each
+            addressBlock is imported as soon as it has been read, and its XML
+            is discarded afterwards. Peak memory usage is then proportional to
+            the largest addressBlock rather than the entire file, at the cost
+            of reading the file twice. See :meth:`scan_document`.
+        jobs: int
+            Number of worker processes that are used to decode the
+            addressBlocks of a file in parallel. The document itself is
+            still parsed up front by the current process, so this has no
+            effect if ``streaming`` is enabled.
+        cache: :class:`ImportCache`
+            Optional :class:`ImportCache`. If provided, decoded files are stored
+            in the cache, and unchanged files are rebuilt directly from the
+            cache rather than being parsed again.
+        share_definitions: bool
+            If True, registers and registerFiles within a file that have
+            structurally identical contents share a single named definition,
+            rather than each being declared anonymously. The definition's type
+            name is derived from the name of its first instance. This reduces
+            memory usage and speeds up elaboration of repetitive designs.
+        intern_enums: bool
+            If True, fields within a file that have identical enumerations
+            share a single enum type, rather than each defining its own. The
+            type is named after the first field that uses it, rather than
+            after each field. Defaults to False.
+        metrics: :class:`Metrics`
+            Optional :class:`Metrics` collector. If provided, the time spent in
+            each phase of an import is recorded (``parse``, ``flatten`` and
+            ``build``), along with counts of imported and discarded elements.
+        xml_backend: str
+            XML parser to use: ``"lxml"`` or ``"etree"`` (the standard
+            library's :mod:`xml.etree.ElementTree`). By default, lxml is used
+            if it is installed. Both produce identical results.
+        memory_maps: list of str
+            Optional list of glob patterns, such as ``"regs_*"``. Only
+            memoryMaps whose name matches one of them are imported.
+        address_blocks: list of str
+            Optional list of glob patterns. Only addressBlocks whose name
+            matches one of them are imported.
+        address_range: tuple of (int, int)
+            Optional ``(start, end)`` byte address window. Only addressBlocks
+            that overlap the range from ``start`` up to, but excluding,
+            ``end`` are imported.
+
+        Names are matched case-sensitively against the <name> in the IP-XACT
+        file. addressBlocks and memoryMaps that are excluded by these filters
+        are skipped before they are decoded.
         """
 
+        self.streaming = kwargs.pop("streaming", False) # type: bool
+        self.jobs = kwargs.pop("jobs", None) or 1 # type: int
+        self.cache = kwargs.pop("cache", None) # type: Optional[ImportCache]
+        self.share_definitions = kwargs.pop("share_definitions", False) # type: bool
+        self.intern_enums = kwargs.pop("intern_enums", False) # type: bool
+        self.metrics = kwargs.pop("metrics", None) # type: Optional[Metrics]
+        self.xml_backend = get_xml_backend(kwargs.pop("xml_backend", None))
+        self.memory_maps = kwargs.pop("memory_maps", None) # type: Optional[Sequence[str]]
+        self.address_blocks = kwargs.pop("address_blocks", None) # type: Optional[Sequence[str]]
+        self.address_range = kwargs.pop("address_range", None) # type: Optional[Tuple[int, int]]
+
+        # Check for stray kwargs
+        if kwargs:
+            raise TypeError("got an unexpected keyword argument '%s'" % list(kwargs.keys())[0])
+
         super().__init__(compiler)
+        self._shared_definitions = {} # type: Dict[Hashable, Union[comp.Reg, comp.Regfile]]
+        self._shared_type_names = {} # type: Dict[str, int]
+        self._enum_types = {} # type: Dict[Tuple[EnumMember, ...], Type[rdltypes.UserEnum]]
         self._addressUnitBits = 8
+        self.expressions = ExpressionEvaluator()
+        self._flatten_tables = {} # type: Dict[str, Dict[str, Tuple[str, FlattenHandler]]]
+        self._enumeratedValue_tables = {} # type: Dict[str, Dict[str, Tuple[str, FlattenHandler]]]
         self._current_addressBlock_access = rdltypes.AccessType.rw
         self.remap_states_seen: Set[str] = set()
 
@@ -40,6 +141,20 @@ class IPXACTImporter(RDLImporter):
         return self.default_src_ref
 
 
+    def count(self, name: str, n: int = 1) -> None:
+        # Count an element in the metrics, if enabled
+        if self.metrics is not None:
+            self.metrics.count(name, n)
+
+
+    def iterparse(self, path: str) -> Iterator[Tuple[str, ElementTree.Element]]:
+        # Incrementally parse a document. Only the time spent within the parser
+        # itself is attributed to the parse phase.
+        if self.metrics is None:
+            return iterparse_xml(path, self.xml_backend)
+        return self.metrics.timed_iter("parse", iterparse_xml(path, self.xml_backend))
+
+
     def import_file(self, path: str, remap_state: Optional[str] = None) -> None:
         """
         Import a single SPIRIT or IP-XACT file into the SystemRDL namespace.
@@ -55,11 +170,24 @@ class IPXACTImporter(RDLImporter):
         super().import_file(path)
 
         self._addressUnitBits = 8
+        self.expressions = ExpressionEvaluator()
         self.remap_states_seen = set()
+        self.clear_shared_types()
 
-        tree = ElementTree.parse(path)
+        if self.cache is not None:
+            decoded, messages, metrics_data = self.decode_file_cached(path, remap_state)
+            self.build_decoded_file(path, decoded, messages, metrics_data)
+            return
+
+        if self.streaming:
+            self.import_file_streaming(path, remap_state)
+            return
+
+        with phase(self.metrics, "parse"):
+            tree = parse_xml(path, self.xml_backend)
 
         component = self.get_component(tree) # type: ignore
+        self.load_parameters(component)
 
         memoryMaps = self.get_all_memoryMap(component)
 
@@ -67,18 +195,402 @@ class IPXACTImporter(RDLImporter):
         if not comp_name:
             self.msg.fatal("component is missing required tag 'name'", self.src_ref)
 
+        if self.jobs > 1:
+            for dm in self.decode_memoryMaps(memoryMaps, comp_name, remap_state):
+                self.build_memoryMap(dm)
+            return
+
         for memoryMap in memoryMaps:
             self.import_memoryMap(memoryMap, comp_name, remap_state)
 
 
+    def import_files(self, paths: Sequence[str], remap_state: Optional[str] = None, jobs: int = 1) -> None:
+        """
+        Import several SPIRIT or IP-XACT files into the SystemRDL namespace.
+
+        The XML of each file is parsed and decoded by a pool of ``jobs``
+        worker processes. Only the creation and registration of the resulting
+        SystemRDL components is done in the current process, in the same order
+        as ``paths``.
+
+        Parameters
+        ----------
+        paths:
+            Input SPIRIT or IP-XACT XML files.
+        remap_state:
+            Optional remapState string that is used to select memoryRemap regions
+            that are tagged under a specific remap state.
+        jobs:
+            Number of worker processes to use.
+        """
+        results = parallel.imap_forked(_decode_file_task, paths, jobs, (self, remap_state))
+        for path, (decoded, messages, metrics_data) in zip(paths, results):
+            super().import_file(path)
+            self.clear_shared_types()
+            self.build_decoded_file(path, decoded, messages, metrics_data)
+
+
+    def build_decoded_file(
+        self, path: str, decoded: Optional[Dict[str, Any]],
+        messages: List[parallel.RecordedMessage], metrics_data: Dict[str, Any]
+    ) -> None:
+        # Report the messages and metrics that were recorded while decoding,
+        # then build
+        parallel.replay_messages(self.msg, messages, self.src_ref)
+        if self.metrics is not None:
+            self.metrics.merge(metrics_data)
+        if decoded is None:
+            # Decoding was aborted by a fatal error, which was replayed above
+            raise RDLCompileError("Failed to decode %s" % path)
+        self.build_file(decoded)
+
+
+    def decode_file(self, path: str, remap_state: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Parse a file and decode the contents of its memory maps.
+
+        The result only consists of plain, picklable values. No SystemRDL
+        components are created until it is passed to :meth:`build_file`.
+        """
+        super().import_file(path)
+
+        self._addressUnitBits = 8
+        self.expressions = ExpressionEvaluator()
+        self.remap_states_seen = set()
+
+        decoded_memoryMaps = [] # type: List[Dict[str, Any]]
+        if self.streaming:
+            for dm, dab in self.iterparse_memoryMaps(path, remap_state):
+                if dab is not None:
+                    dm['addressBlocks'].append(dab)
+                else:
+                    decoded_memoryMaps.append(dm)
+        else:
+            with phase(self.metrics, "parse"):
+                tree = parse_xml(path, self.xml_backend)
+            component = self.get_component(tree) # type: ignore
+            self.load_parameters(component)
+            memoryMaps = self.get_all_memoryMap(component)
+
+            comp_name = self.get_sanitized_element_name(component)
+            if not comp_name:
+                self.msg.fatal("component is missing required tag 'name'", self.src_ref)
+
+            decoded_memoryMaps = self.decode_memoryMaps(memoryMaps, comp_name, remap_state)
+
+        return {
+            'memoryMaps': decoded_memoryMaps,
+        }
+
+
+    def decode_file_isolated(self, path: str, remap_state: Optional[str]) -> 'Isolated[Dict[str, Any]]':
+        """
+        Same as :meth:`decode_file`, but any messages and metrics are recorded
+        rather than reported, so that they can be replayed later by the process
+        that builds the components.
+
+        If decoding was aborted by a fatal error, the decoded result is None.
+        """
+        return self._call_isolated(self.decode_file, path, remap_state)
+
+
+    def decode_file_cached(self, path: str, remap_state: Optional[str]) -> 'Isolated[Dict[str, Any]]':
+        """
+        Same as :meth:`decode_file_isolated`, but the result is looked up in,
+        and added to the importer's cache, if any.
+        """
+        if self.cache is None:
+            return self.decode_file_isolated(path, remap_state)
+
+        # Importers that extend this class may decode differently
+        importer_cls = "%s.%s" % (type(self).__module__, type(self).__qualname__)
+        key = self.cache.make_key(path, remap_state, importer_cls, *self.get_filter_key())
+        cached = self.cache.load(key)
+        if cached is not None:
+            decoded, messages, counts = cached
+            return decoded, messages, {"counts": counts}
+
+        decoded, messages, metrics_data = self.decode_file_isolated(path, remap_state)
+        if decoded is not None:
+            # Phase times of the original decode do not apply to later cache
+            # hits. Only keep counts.
+            self.cache.store(key, (decoded, messages, metrics_data.get("counts", {})))
+        return decoded, messages, metrics_data
+
+
+    def _call_isolated(self, func: Callable[..., RT], *args: Any) -> 'Isolated[RT]':
+        # Call func while recording any messages and metrics instead of
+        # reporting them. A fatal error results in None, and is raised again
+        # once the recorded messages are replayed.
+        recorder = parallel.MessageRecorder()
+        prev_msg = self.msg
+        prev_metrics = self.metrics
+        self.msg = recorder.create_handler()
+        if prev_metrics is not None:
+            self.metrics = Metrics()
+        try:
+            result = func(*args) # type: Optional[RT]
+        except RDLCompileError:
+            result = None
+        finally:
+            isolated_metrics = self.metrics
+            self.msg = prev_msg
+            self.metrics = prev_metrics
+
+        if isolated_metrics is None:
+            return result, recorder.messages, {}
+        return result, recorder.messages, isolated_metrics.as_dict()
+
+
+    def build_file(self, decoded: Dict[str, Any]) -> None:
+        """
+        Create and register the SystemRDL components of a file that was
+        decoded using :meth:`decode_file`.
+        """
+        for dm in decoded['memoryMaps']:
+            self.build_memoryMap(dm)
+
+
+    def import_file_streaming(self, path: str, remap_state: Optional[str]) -> None:
+        """
+        Incremental counterpart of import_file().
+
+        The document is read using ``iterparse``, and every addressBlock is
+        imported as soon as its end tag arrives. This needs values that only
+        appear later in the document, which :meth:`scan_document` collects in a
+        first pass. Any XML that was consumed, or that is of no interest to the
+        importer, is discarded right away.
+        """
+        children = [] # type: List[Union[comp.Addrmap, comp.Mem]]
+        for dm, dab in self.iterparse_memoryMaps(path, remap_state):
+            if dab is not None:
+                self._addressUnitBits = dm['addressUnitBits']
+                child = self.build_addressBlock(dab, dm['name'] + "__")
+                if child:
+                    children.append(child)
+            else:
+                self.finish_memoryMap(dm, children)
+                children = []
+
+
+    def iterparse_memoryMaps(self, path: str, remap_state: Optional[str]) -> Iterator[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+        """
+        Incrementally parse a document and decode its memory maps.
+
+        Yields ``(memoryMap, addressBlock)`` as soon as each addressBlock has
+        been decoded, followed by ``(memoryMap, None)`` once the enclosing
+        memoryMap is complete. Decoded addressBlocks are not accumulated in the
+        memoryMap's ``'addressBlocks'`` list.
+        """
+        aub_texts, parameters = self.scan_document(path)
+        self.expressions = ExpressionEvaluator(parameters)
+
+        comp_name = None # type: Optional[str]
+        n_memoryMaps = 0
+        mmap_idx = -1
+        dm = {} # type: Dict[str, Any]
+        in_selected_remap = False
+        mmap_selected = True
+
+        stack = [] # type: List[ElementTree.Element]
+        for event, el in self.iterparse(path):
+            depth = len(stack)
+            if event == "start":
+                if depth == 0:
+                    self.check_component(el)
+                elif depth == 1 and el.tag == self.ns+"memoryMaps":
+                    n_memoryMaps += 1
+                    if n_memoryMaps > 1:
+                        self.msg.fatal(
+                            "'component' must contain exactly one 'memoryMaps' element",
+                            self.src_ref
+                        )
+                    if not comp_name:
+                        self.msg.fatal("component is missing required tag 'name'", self.src_ref)
+                elif depth == 2 and el.tag == self.ns+"memoryMap" and stack[1].tag == self.ns+"memoryMaps":
+                    mmap_idx += 1
+                    self.remap_states_seen = set()
+                    dm = {
+                        'name': None,
+                        'addressUnitBits': self.parse_addressUnitBits(aub_texts[mmap_idx]),
+                        'remap_states_seen': self.remap_states_seen,
+                        'addressBlocks': [],
+                    }
+                    mmap_selected = True
+                elif depth == 3 and el.tag == self.ns+"memoryRemap" and stack[2].tag == self.ns+"memoryMap":
+                    this_remapState = el.get(self.ns+"state")
+                    if this_remapState is not None:
+                        self.remap_states_seen.add(this_remapState)
+                    in_selected_remap = (this_remapState is not None) and (this_remapState == remap_state)
+                stack.append(el)
+                continue
+
+            # End of element
+            stack.pop()
+            depth -= 1
+            if depth == 0:
+                continue
+            parent = stack[-1]
+
+            if depth == 1:
+                # Direct child of <component>
+                if el.tag == self.ns+"name":
+                    comp_name = self.sanitize_name(get_text(el))
+                discard_element(parent, el)
+
+            elif stack[1].tag != self.ns+"memoryMaps":
+                # Not part of the memory map description. Drop it right away.
+                discard_element(parent, el)
+
+            elif depth == 2:
+                if el.tag == self.ns+"memoryMap":
+                    if dm['name'] is None:
+                        self.msg.fatal("memoryMap is missing required tag 'name'", self.src_ref)
+                    if mmap_selected:
+                        dm.update(self.flatten_element_values(el).values)
+                        yield dm, None
+                    else:
+                        self.count("filtered.memoryMaps")
+                discard_element(parent, el)
+
+            elif depth == 3 and parent.tag == self.ns+"memoryMap":
+                if el.tag == self.ns+"name":
+                    assert comp_name is not None
+                    text = get_text(el)
+                    name = self.sanitize_name(text)
+                    if not name:
+                        self.msg.fatal("memoryMap is missing required tag 'name'", self.src_ref)
+                    dm['name'] = "%s__%s" % (comp_name, name)
+                    mmap_selected = self.is_memoryMap_selected(text.strip())
+                elif el.tag == self.ns+"addressBlock":
+                    if dm['name'] is None:
+                        self.msg.fatal("memoryMap is missing required tag 'name'", self.src_ref)
+                    dab = None
+                    if mmap_selected and self.select_addressBlock(el, dm):
+                        dab = self.decode_addressBlock(el)
+                    discard_element(parent, el)
+                    if dab is not None:
+                        yield dm, dab
+                elif el.tag in (self.ns+"memoryRemap", self.ns+"bank", self.ns+"subspaceMap"):
+                    discard_element(parent, el)
+
+            elif depth == 4 and parent.tag == self.ns+"memoryRemap":
+                dab = None
+                if el.tag == self.ns+"addressBlock" and in_selected_remap and mmap_selected:
+                    if dm['name'] is None:
+                        self.msg.fatal("memoryMap is missing required tag 'name'", self.src_ref)
+                    if self.select_addressBlock(el, dm):
+                        dab = self.decode_addressBlock(el)
+                discard_element(parent, el)
+                if dab is not None:
+                    yield dm, dab
+
+        if n_memoryMaps != 1:
+            self.msg.fatal(
+                "'component' must contain exactly one 'memoryMaps' element",
+                self.src_ref
+            )
+
+
+    def scan_document(self, path: str) -> Tuple[List[Optional[str]], Dict[str, str]]:
+        """
+        Quickly scan the document and collect:
+
+        - The <addressUnitBits> text of each memoryMap, in order. None if a
+          memoryMap does not specify it.
+        - The component's parameters, as returned by :meth:`decode_parameters`.
+
+        The schema places both after the memoryMaps' addressBlocks, but the
+        streaming importer already needs them in order to decode the
+        addressBlocks: the addressUnitBits determine how addresses are scaled,
+        and any value may be an expression that references a parameter. A
+        single pass would have to keep every addressBlock until the end of the
+        document, which is what streaming is meant to avoid. This pass
+        therefore only parses the document, and keeps nothing but these
+        values. The component's name precedes the memoryMaps, so it is read
+        by the main pass.
+        """
+        aub_texts = [] # type: List[Optional[str]]
+        parameters = {} # type: Dict[str, str]
+        ns = ""
+        stack = [] # type: List[ElementTree.Element]
+        for event, el in self.iterparse(path):
+            depth = len(stack)
+            if event == "start":
+                if depth == 0:
+                    self.check_component(el)
+                    ns = self.ns
+                elif depth == 2 and el.tag == ns+"memoryMap" and stack[1].tag == ns+"memoryMaps":
+                    aub_texts.append(None)
+                stack.append(el)
+                continue
+
+            stack.pop()
+            if not stack:
+                continue
+            if (depth == 4 and el.tag == ns+"addressUnitBits"
+                and stack[2].tag == ns+"memoryMap" and stack[1].tag == ns+"memoryMaps"
+            ):
+                aub_texts[-1] = get_text(el)
+            elif depth == 2 and el.tag == ns+"parameters":
+                parameters.update(self.decode_parameters(el))
+            elif depth > 2 and stack[1].tag == ns+"parameters":
+                # Keep the contents of <parameters> until it is complete
+                continue
+            discard_element(stack[-1], el)
+        return aub_texts, parameters
+
+
+    def load_parameters(self, component: ElementTree.Element) -> None:
+        # Evaluate the expressions of the current file in the context of the
+        # component's parameters
+        parameters = {} # type: Dict[str, str]
+        for parameters_el in component.iterfind(self.ns+"parameters"):
+            parameters.update(self.decode_parameters(parameters_el))
+        self.expressions = ExpressionEvaluator(parameters)
+
+
+    def decode_parameters(self, parameters: ElementTree.Element) -> Dict[str, str]:
+        """
+        Decodes a <parameters> element into a dictionary that maps the ID and
+        the name of each parameter to its value expression.
+
+        IDs take precedence over names, since expressions are supposed to
+        reference parameters by ID.
+        """
+        by_id = {} # type: Dict[str, str]
+        by_name = {} # type: Dict[str, str]
+        for parameter in parameters.iterfind(self.ns+"parameter"):
+            value_el = parameter.find(self.ns+"value")
+            if value_el is None:
+                continue
+            value = get_text(value_el)
+
+            # IEEE 1685-2014 places the ID on the parameter, 1685-2009 on its value
+            for param_id in (parameter.get("parameterId"), value_el.get(self.ns+"id")):
+                if param_id:
+                    by_id.setdefault(param_id, value)
+
+            name_el = parameter.find(self.ns+"name")
+            if name_el is not None:
+                by_name.setdefault(get_text(name_el).strip(), value)
+
+        by_name.update(by_id)
+        return by_name
+
+
     def get_component(self, tree: ElementTree.ElementTree) -> ElementTree.Element:
         # Find <component> and determine namespace prefix
         root = tree.getroot()
         assert root is not None
+        self.check_component(root)
+        return root
 
-        if get_local_name(root) == "component":
-            component = root
-            namespace = get_namespace(root)
+
+    def check_component(self, el: ElementTree.Element) -> None:
+        # Check that the element is a <component> and determine namespace prefix
+        if get_local_name(el) == "component":
+            namespace = get_namespace(el)
             for ns_regex in VALID_NS_REGEXES:
                 if ns_regex.match(namespace):
                     self.ns = namespace
@@ -90,7 +602,6 @@ class IPXACTImporter(RDLImporter):
                 "Could not find a 'component' element",
                 self.src_ref
             )
-        return component
 
 
     def get_all_memoryMap(self, component: ElementTree.Element) -> List[ElementTree.Element]:
@@ -103,12 +614,73 @@ class IPXACTImporter(RDLImporter):
             )
         memoryMaps = memoryMaps_s[0]
 
-        # Find all <memoryMap>
-        memoryMap_s = memoryMaps.findall(self.ns+"memoryMap")
+        # Find all <memoryMap> that are selected by the filters
+        memoryMap_s = []
+        for memoryMap in memoryMaps.iterfind(self.ns+"memoryMap"):
+            name_el = memoryMap.find(self.ns+"name")
+            if name_el is None or self.is_memoryMap_selected(get_text(name_el).strip()):
+                memoryMap_s.append(memoryMap)
+            else:
+                self.count("filtered.memoryMaps")
 
         return memoryMap_s
 
 
+    def get_filter_key(self) -> List[str]:
+        # Describes the import filters, for use in cache keys
+        if self.memory_maps is None and self.address_blocks is None and self.address_range is None:
+            return []
+        return [repr((self.memory_maps, self.address_blocks, self.address_range))]
+
+
+    def is_memoryMap_selected(self, name: str) -> bool:
+        """
+        Returns True if the memoryMap of the given IP-XACT name is not
+        excluded by the importer's ``memory_maps`` filter.
+        """
+        if self.memory_maps is None:
+            return True
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in self.memory_maps)
+
+
+    def is_addressBlock_selected(self, addressBlock: ElementTree.Element, aub_bits: int) -> bool:
+        """
+        Returns True if the addressBlock is not excluded by the importer's
+        ``address_blocks`` and ``address_range`` filters.
+
+        Only the addressBlock's name, base address and range are decoded.
+        addressBlocks that lack any of them are selected, so that the error is
+        reported when they are decoded.
+        """
+        if self.address_blocks is not None:
+            name_el = addressBlock.find(self.ns+"name")
+            if name_el is not None:
+                name = get_text(name_el).strip()
+                if not any(fnmatch.fnmatchcase(name, pattern) for pattern in self.address_blocks):
+                    return False
+
+        if self.address_range is not None:
+            base_el = addressBlock.find(self.ns+"baseAddress")
+            range_el = addressBlock.find(self.ns+"range")
+            if base_el is not None and range_el is not None:
+                start = self.parse_integer(get_text(base_el)) * aub_bits // 8
+                end = start + self.parse_integer(get_text(range_el)) * aub_bits // 8
+                if end <= self.address_range[0] or start >= self.address_range[1]:
+                    return False
+
+        return True
+
+
+    def select_addressBlock(self, addressBlock: ElementTree.Element, dm: Dict[str, Any]) -> bool:
+        # Check the addressBlock against the filters, and take note in the
+        # decoded memoryMap if it is excluded
+        if self.is_addressBlock_selected(addressBlock, dm['addressUnitBits']):
+            return True
+        dm['filtered'] = True
+        self.count("filtered.addressBlocks")
+        return False
+
+
     def get_all_address_blocks(self, memoryMap: ElementTree.Element, remap_state: Optional[str]) -> List[ElementTree.Element]:
         """
         Gets all the addressBlock elements within a memoryMap
@@ -133,6 +705,132 @@ class IPXACTImporter(RDLImporter):
 
 
     def import_memoryMap(self, memoryMap: ElementTree.Element, component_name: str, remap_state: Optional[str]) -> None:
+        self.build_memoryMap(self.decode_memoryMap(memoryMap, component_name, remap_state))
+
+
+    def decode_memoryMaps(self, memoryMaps: List[ElementTree.Element], component_name: str, remap_state: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Decode several memoryMaps of a component.
+
+        The addressBlocks of all memoryMaps are decoded together so that they
+        can be distributed among all worker processes at once.
+        """
+        decoded_memoryMaps = []
+        addressBlock_lists = []
+        for memoryMap in memoryMaps:
+            d, addressBlocks = self.decode_memoryMap_header(memoryMap, component_name, remap_state)
+            decoded_memoryMaps.append(d)
+            addressBlock_lists.append(addressBlocks)
+
+        all_addressBlocks = [el for addressBlocks in addressBlock_lists for el in addressBlocks]
+        decoded_addressBlocks = iter(self.decode_addressBlocks(all_addressBlocks))
+        for d, addressBlocks in zip(decoded_memoryMaps, addressBlock_lists):
+            for _ in addressBlocks:
+                dab = next(decoded_addressBlocks)
+                if dab is not None:
+                    d['addressBlocks'].append(dab)
+
+        return decoded_memoryMaps
+
+
+    def decode_memoryMap(self, memoryMap: ElementTree.Element, component_name: str, remap_state: Optional[str]) -> Dict[str, Any]:
+        d, addressBlocks = self.decode_memoryMap_header(memoryMap, component_name, remap_state)
+        for dab in self.decode_addressBlocks(addressBlocks):
+            if dab is not None:
+                d['addressBlocks'].append(dab)
+        return d
+
+
+    @timed("flatten")
+    def decode_memoryMap_header(self, memoryMap: ElementTree.Element, component_name: str, remap_state: Optional[str]) -> Tuple[Dict[str, Any], List[ElementTree.Element]]:
+        """
+        Decode a memoryMap, except for its addressBlocks.
+
+        Returns the decoded memoryMap, and the addressBlock elements that
+        remain to be decoded into its ``'addressBlocks'`` list.
+        """
+        flattened = self.flatten_element_values(memoryMap)
+
+        # Check for required values
+        name = flattened.name
+        if not name:
+            self.msg.fatal("memoryMap is missing required tag 'name'", self.src_ref)
+
+        aub = memoryMap.find(self.ns+"addressUnitBits")
+        if aub is not None:
+            aub_bits = self.parse_addressUnitBits(get_text(aub))
+        else:
+            aub_bits = self.parse_addressUnitBits(None)
+
+        d = flattened.values
+
+        # Add component prefix to name
+        d['name'] = "%s__%s" % (component_name, name)
+        d['addressUnitBits'] = aub_bits
+
+        # collect children
+        self.remap_states_seen = set()
+        d['addressBlocks'] = []
+        addressBlocks = [
+            el for el in self.get_all_address_blocks(memoryMap, remap_state)
+            if self.select_addressBlock(el, d)
+        ]
+        d['remap_states_seen'] = self.remap_states_seen
+
+        return d, addressBlocks
+
+
+    def decode_addressBlocks(self, addressBlocks: List[ElementTree.Element]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Decode several addressBlocks, using up to ``jobs`` worker processes.
+
+        Results are in the same order as ``addressBlocks``. Reserved
+        addressBlocks decode to None.
+        """
+        if self.jobs <= 1:
+            return [self.decode_addressBlock(el) for el in addressBlocks]
+
+        # Workers inherit the parsed document, so only indexes need to be sent
+        decoded = []
+        results = parallel.imap_forked(
+            _decode_addressBlock_task, range(len(addressBlocks)), self.jobs,
+            (self, addressBlocks)
+        )
+        for dab, messages, metrics_data in results:
+            parallel.replay_messages(self.msg, messages, self.src_ref)
+            if self.metrics is not None:
+                self.metrics.merge(metrics_data)
+            decoded.append(dab)
+        return decoded
+
+
+    def decode_addressBlock_isolated(self, addressBlock: ElementTree.Element) -> 'Isolated[Dict[str, Any]]':
+        """
+        Same as :meth:`decode_addressBlock`, but any messages are recorded
+        rather than reported.
+        """
+        return self._call_isolated(self.decode_addressBlock, addressBlock)
+
+
+    def build_memoryMap(self, d: Dict[str, Any]) -> None:
+        self._addressUnitBits = d['addressUnitBits']
+
+        name_prefix = d['name'] + "__"
+        children = []
+        for dab in d['addressBlocks']:
+            child = self.build_addressBlock(dab, name_prefix)
+            if child:
+                children.append(child)
+
+        self.finish_memoryMap(d, children)
+
+
+    @timed("build")
+    def finish_memoryMap(self, d: Dict[str, Any], children: List[Union[comp.Addrmap, comp.Mem]]) -> None:
+        """
+        Create the memoryMap's addrmap definition from its already imported
+        addressBlock instances.
+        """
         # Schema:
         #     {nameGroup}
         #         name (required) --> inst_name
@@ -146,16 +844,8 @@ class IPXACTImporter(RDLImporter):
         #     shared
         #     vendorExtensions
 
-        d = self.flatten_element_values(memoryMap)
-
-
-        # Check for required values
-        name = self.get_sanitized_element_name(memoryMap)
-        if not name:
-            self.msg.fatal("memoryMap is missing required tag 'name'", self.src_ref)
-
-        # Add component prefix to name
-        name = "%s__%s" % (component_name, name)
+        name = d['name']
+        self.remap_states_seen = d['remap_states_seen']
 
         # Create named component definition
         C_def = self.create_addrmap_definition(name)
@@ -170,31 +860,17 @@ class IPXACTImporter(RDLImporter):
         if 'isPresent' in d:
             self.assign_property(C_def, "ispresent", d['isPresent'])
 
-        aub = memoryMap.find(self.ns+"addressUnitBits")
-        if aub is not None:
-            self._addressUnitBits = self.parse_integer(get_text(aub))
-
-            if (self._addressUnitBits < 8) or (self._addressUnitBits % 8 != 0):
-                self.msg.fatal(
-                    "Importer only supports <addressUnitBits> that is a multiple of 8",
-                    self.src_ref
-                )
-        else:
-            self._addressUnitBits = 8
-
-
-        # collect children
-        name_prefix = name + "__"
-        self.remap_states_seen = set()
-        addressBlocks = self.get_all_address_blocks(memoryMap, remap_state)
-        for addressBlock in addressBlocks:
-            child = self.parse_addressBlock(addressBlock, name_prefix)
-            if child:
-                self.add_child(C_def, child)
+        for child in children:
+            self.add_child(C_def, child)
 
         if 'vendorExtensions' in d:
             C_def = self.memoryMap_vendorExtensions(d['vendorExtensions'], C_def)
 
+        if not C_def.children and d.get('filtered', False):
+            # All of its addressBlocks were excluded by the import filters
+            self.count("filtered.memoryMaps")
+            return
+
         if not C_def.children:
             # memoryMap contains no addressBlocks. Skip
             self.msg.warning(
@@ -210,19 +886,45 @@ class IPXACTImporter(RDLImporter):
                     % (name, "\n\t".join(self.remap_states_seen)),
                     self.src_ref
                 )
+            self.count("discarded.memoryMaps")
             return
 
+        self.count("memoryMaps")
         self.register_root_component(C_def)
 
 
+    def parse_addressUnitBits(self, aub_text: Optional[str]) -> int:
+        if aub_text is None:
+            return 8
+
+        aub_bits = self.parse_integer(aub_text)
+
+        if (aub_bits < 8) or (aub_bits % 8 != 0):
+            self.msg.fatal(
+                "Importer only supports <addressUnitBits> that is a multiple of 8",
+                self.src_ref
+            )
+        return aub_bits
+
+
     def parse_addressBlock(self, addressBlock: ElementTree.Element, name_prefix:str) -> Optional[Union[comp.Addrmap, comp.Mem]]:
         """
         Parses an addressBlock and returns an instantiated addrmap or mem
         component.
 
-        If addressBlock is empty or usage specifies 'reserved' then returns
-        None
+        If addressBlock is empty, usage specifies 'reserved', or it is excluded
+        by the import filters then returns None
         """
+        if not self.is_addressBlock_selected(addressBlock, self._addressUnitBits):
+            return None
+        d = self.decode_addressBlock(addressBlock)
+        if d is None:
+            return None
+        return self.build_addressBlock(d, name_prefix)
+
+
+    @timed("flatten")
+    def decode_addressBlock(self, addressBlock: ElementTree.Element) -> Optional[Dict[str, Any]]:
         # Schema:
         #   {nameGroup}
         #       name (required) --> inst_name
@@ -245,8 +947,9 @@ class IPXACTImporter(RDLImporter):
         #           registerFile --> children
         #   vendorExtensions
 
-        d = self.flatten_element_values(addressBlock)
-        name = self.get_sanitized_element_name(addressBlock)
+        flattened = self.flatten_element_values(addressBlock)
+        d = flattened.values
+        name = flattened.name
         if not name:
             self.msg.fatal("addressBlock is missing required tag 'name'", self.src_ref)
 
@@ -254,6 +957,7 @@ class IPXACTImporter(RDLImporter):
             # 1685-2014 6.9.4.2-a.1.iii: defines the entire range of the
             # addressBlock as reserved or for unknown usage to IP-XACT. This
             # type shall not contain registers.
+            self.count("discarded.addressBlocks")
             return None
 
         # Check for required values
@@ -264,6 +968,38 @@ class IPXACTImporter(RDLImporter):
         for m in missing:
             self.msg.fatal("addressBlock is missing required tag '%s'" % m, self.src_ref)
 
+        d['name'] = name
+        is_memory = d.get('usage', None) == "memory"
+
+        if 'access' in d:
+            self._current_addressBlock_access = d['access']
+        else:
+            self._current_addressBlock_access = rdltypes.AccessType.rw
+
+        # decode children
+        d['children'] = []
+        for local_name, child_el in flattened.child_els:
+            child = None # type: Optional[Dict[str, Any]]
+            if local_name == "register":
+                child = self.decode_register(child_el)
+            elif local_name == "registerFile" and not is_memory:
+                child = self.decode_registerFile(child_el)
+            else:
+                self.msg.error(
+                    "Invalid child element <%s> found in <%s:addressBlock>"
+                    % (child_el.tag, self.ns),
+                    self.src_ref
+                )
+            if child is not None:
+                d['children'].append(child)
+
+        return d
+
+
+    @timed("build")
+    def build_addressBlock(self, d: Dict[str, Any], name_prefix: str) -> Optional[Union[comp.Addrmap, comp.Mem]]:
+        name = d['name']
+
         # Create named component definition
         is_memory = d.get('usage', None) == "memory"
         type_name = name_prefix + name
@@ -293,28 +1029,11 @@ class IPXACTImporter(RDLImporter):
             if 'access' in d:
                 self.assign_property(C_def, "sw", d['access'])
 
-        if 'access' in d:
-            self._current_addressBlock_access = d['access']
-        else:
-            self._current_addressBlock_access = rdltypes.AccessType.rw
-
         # collect children
-        for child_el in d['child_els']:
-            local_name = get_local_name(child_el)
-            if local_name == "register":
-                R = self.parse_register(child_el)
-                if R:
-                    self.add_child(C_def, R)
-            elif local_name == "registerFile" and not is_memory:
-                RF = self.parse_registerFile(child_el)
-                if RF:
-                    self.add_child(C_def, RF)
-            else:
-                self.msg.error(
-                    "Invalid child element <%s> found in <%s:addressBlock>"
-                    % (child_el.tag, self.ns),
-                    self.src_ref
-                )
+        for child in d['children']:
+            C = self.build_child(child)
+            if C:
+                self.add_child(C_def, C)
 
         if 'vendorExtensions' in d:
             C_def = self.addressBlock_vendorExtensions(d['vendorExtensions'], C_def)
@@ -327,8 +1046,11 @@ class IPXACTImporter(RDLImporter):
                 % name,
                 self.src_ref
             )
+            self.count("discarded.addressBlocks")
             return None
 
+        self.count("addressBlocks")
+
         # All addressBlocks get registered under the root namespace
         self.register_root_component(C_def)
 
@@ -350,10 +1072,58 @@ class IPXACTImporter(RDLImporter):
             return am
 
 
+    def build_child(self, d: Dict[str, Any]) -> Optional[Union[comp.Reg, comp.Regfile]]:
+        """
+        Builds a decoded register or registerFile
+        """
+        if d['type'] == "registerFile":
+            return self.build_registerFile(d)
+        return self.build_register(d)
+
+
+    def get_definition_key(self, d: Dict[str, Any]) -> Optional[Hashable]:
+        """
+        Fingerprint the body of a decoded register or registerFile.
+
+        If enabled, registers and registerFiles with identical bodies share
+        a single definition. Returns None if the component cannot share its
+        definition.
+        """
+        if not self.share_definitions:
+            return None
+
+        body = {k: v for k, v in d.items() if k not in INSTANCE_KEYS}
+        try:
+            # Child addresses within the body depend on the addressUnitBits
+            return (self._addressUnitBits, freeze_record(body))
+        except Unshareable:
+            return None
+
+
+    def clear_shared_types(self) -> None:
+        # Definitions and enums are only shared within the same file
+        self._shared_definitions = {}
+        self._shared_type_names = {}
+        self._enum_types = {}
+
+
+    def get_shared_type_name(self, inst_name: str) -> str:
+        # Shared definitions are named after their first instance
+        n = self._shared_type_names.get(inst_name, 0)
+        self._shared_type_names[inst_name] = n + 1
+        if n:
+            return "%s_%d" % (inst_name, n)
+        return inst_name
+
+
     def parse_registerFile(self, registerFile: ElementTree.Element) -> Optional[comp.Regfile]:
         """
         Parses an registerFile and returns an instantiated regfile component
         """
+        return self.build_registerFile(self.decode_registerFile(registerFile))
+
+
+    def decode_registerFile(self, registerFile: ElementTree.Element) -> Dict[str, Any]:
         # Schema:
         #   {nameGroup}
         #       name (required) --> inst_name
@@ -372,8 +1142,9 @@ class IPXACTImporter(RDLImporter):
         #   parameters
         #   vendorExtensions
 
-        d = self.flatten_element_values(registerFile)
-        name = self.get_sanitized_element_name(registerFile)
+        flattened = self.flatten_element_values(registerFile)
+        d = flattened.values
+        name = flattened.name
         if not name:
             self.msg.fatal("registerFile is missing required tag 'name'", self.src_ref)
 
@@ -385,18 +1156,55 @@ class IPXACTImporter(RDLImporter):
         for m in missing:
             self.msg.fatal("registerFile is missing required tag '%s'" % m, self.src_ref)
 
+        d['type'] = "registerFile"
+        d['name'] = name
+
+        # decode children
+        d['children'] = []
+        for local_name, child_el in flattened.child_els:
+            if local_name == "register":
+                d['children'].append(self.decode_register(child_el))
+            elif local_name == "registerFile":
+                d['children'].append(self.decode_registerFile(child_el))
+            else:
+                self.msg.error(
+                    "Invalid child element <%s> found in <%s:registerFile>"
+                    % (child_el.tag, self.ns),
+                    self.src_ref
+                )
+
+        return d
+
+
+    def build_registerFile(self, d: Dict[str, Any]) -> Optional[comp.Regfile]:
+        key = self.get_definition_key(d)
+        C_def = self._shared_definitions.get(key) if key is not None else None
+        if C_def is None:
+            if key is not None:
+                C_def = self.create_regfile_definition(self.get_shared_type_name(d['name']))
+                self._shared_definitions[key] = C_def
+            else:
+                C_def = self.create_regfile_definition()
+
+            # collect children
+            for child in d['children']:
+                R = self.build_child(child)
+                if R:
+                    self.add_child(C_def, R)
+        assert isinstance(C_def, comp.Regfile)
+
         # Create component instance
         if 'dim' in d:
             # is array
             C = self.instantiate_regfile(
-                self.create_regfile_definition(),
-                name, self.AU_to_bytes(d['addressOffset']),
+                C_def,
+                d['name'], self.AU_to_bytes(d['addressOffset']),
                 d['dim'], self.AU_to_bytes(d['range'])
             )
         else:
             C = self.instantiate_regfile(
-                self.create_regfile_definition(),
-                name, self.AU_to_bytes(d['addressOffset'])
+                C_def,
+                d['name'], self.AU_to_bytes(d['addressOffset'])
             )
 
         # Collect properties and other values
@@ -409,24 +1217,6 @@ class IPXACTImporter(RDLImporter):
         if 'isPresent' in d:
             self.assign_property(C, "ispresent", d['isPresent'])
 
-        # collect children
-        for child_el in d['child_els']:
-            local_name = get_local_name(child_el)
-            if local_name == "register":
-                R = self.parse_register(child_el)
-                if R:
-                    self.add_child(C, R)
-            elif local_name == "registerFile":
-                RF = self.parse_registerFile(child_el)
-                if RF:
-                    self.add_child(C, RF)
-            else:
-                self.msg.error(
-                    "Invalid child element <%s> found in <%s:registerFile>"
-                    % (child_el.tag, self.ns),
-                    self.src_ref
-                )
-
         if 'vendorExtensions' in d:
             C = self.registerFile_vendorExtensions(d['vendorExtensions'], C)
 
@@ -437,8 +1227,10 @@ class IPXACTImporter(RDLImporter):
                 % (C.inst_name),
                 self.src_ref
             )
+            self.count("discarded.registerFiles")
             return None
 
+        self.count("registerFiles")
         return C
 
 
@@ -446,6 +1238,10 @@ class IPXACTImporter(RDLImporter):
         """
         Parses a register and returns an instantiated reg component
         """
+        return self.build_register(self.decode_register(register))
+
+
+    def decode_register(self, register: ElementTree.Element) -> Dict[str, Any]:
         # Schema:
         #   {nameGroup}
         #       name (required) --> inst_name
@@ -469,8 +1265,9 @@ class IPXACTImporter(RDLImporter):
         #   parameters
         #   vendorExtensions
 
-        d = self.flatten_element_values(register)
-        name = self.get_sanitized_element_name(register)
+        flattened = self.flatten_element_values(register)
+        d = flattened.values
+        name = flattened.name
         if not name:
             self.msg.fatal("register is missing required tag 'name'", self.src_ref)
 
@@ -482,55 +1279,29 @@ class IPXACTImporter(RDLImporter):
         for m in missing:
             self.msg.fatal("register is missing required tag '%s'" % m, self.src_ref)
 
+        d['type'] = "register"
+        d['name'] = name
+
         # IP-XACT allows registers to be any arbitrary bit width, but SystemRDL
         # requires the register size to be at least 8, and a power of 2.
         # Pad up the register size if needed
         d['size'] = max(8, d['size'])
         d['size'] = roundup_pow2(d['size'])
 
-        # Create component instance
-        if 'dim' in d:
-            # is array
-            C = self.instantiate_reg(
-                self.create_reg_definition(),
-                name, self.AU_to_bytes(d['addressOffset']),
-                d['dim'], d['size'] // 8
-            )
-        else:
-            C = self.instantiate_reg(
-                self.create_reg_definition(),
-                name, self.AU_to_bytes(d['addressOffset'])
-            )
-
-        # Collect properties and other values
-        if 'displayName' in d:
-            self.assign_property(C, "name", d['displayName'])
-
-        if 'description' in d:
-            self.assign_property(C, "desc", d['description'])
-
-        if 'isPresent' in d:
-            self.assign_property(C, "ispresent", d['isPresent'])
-
-        self.assign_property(C, "regwidth", d['size'])
-
-
-        reg_access = d.get('access', self._current_addressBlock_access)
-        reg_reset_value = d.get('reset.value', None)
-        reg_reset_mask = d.get('reset.mask', None)
+        d['access'] = d.get('access', self._current_addressBlock_access)
 
         # Collect field elements and scan for name collisions
         field_tuples = []
         field_names = set()
         field_name_collisions = set()
-        for child_el in d['child_els']:
-            local_name = get_local_name(child_el)
+        for local_name, child_el in flattened.child_els:
             if local_name == "field":
                 # This XML element is a field
-                field_name = self.get_sanitized_element_name(child_el)
+                field_flattened = self.flatten_element_values(child_el)
+                field_name = field_flattened.name
                 if not field_name:
                     self.msg.fatal("field is missing required tag 'name'", self.src_ref)
-                field_tuples.append((field_name, child_el))
+                field_tuples.append((field_name, child_el, field_flattened))
                 if field_name in field_names:
                     field_name_collisions.add(field_name)
                 else:
@@ -543,17 +1314,62 @@ class IPXACTImporter(RDLImporter):
                 )
 
         # Process fields
-        for field_name, field_el in field_tuples:
+        d['fields'] = []
+        for field_name, field_el, field_flattened in field_tuples:
             # Uniquify field name if necessary
             uniquify_field_name = field_name in field_name_collisions
 
-            field = self.parse_field(
-                field_name, field_el,
-                reg_access, reg_reset_value, reg_reset_mask,
-                uniquify_field_name
-            )
+            field = self.decode_field(field_name, field_el, uniquify_field_name, field_flattened)
             if field is not None:
-                self.add_child(C, field)
+                d['fields'].append(field)
+
+        return d
+
+
+    def build_register(self, d: Dict[str, Any]) -> Optional[comp.Reg]:
+        key = self.get_definition_key(d)
+        C_def = self._shared_definitions.get(key) if key is not None else None
+        if C_def is None:
+            if key is not None:
+                C_def = self.create_reg_definition(self.get_shared_type_name(d['name']))
+                self._shared_definitions[key] = C_def
+            else:
+                C_def = self.create_reg_definition()
+
+            self.assign_property(C_def, "regwidth", d['size'])
+
+            reg_access = d['access']
+            reg_reset_value = d.get('reset.value', None)
+            reg_reset_mask = d.get('reset.mask', None)
+
+            for field_d in d['fields']:
+                field = self.build_field(field_d, reg_access, reg_reset_value, reg_reset_mask)
+                self.add_child(C_def, field)
+        assert isinstance(C_def, comp.Reg)
+
+        # Create component instance
+        if 'dim' in d:
+            # is array
+            C = self.instantiate_reg(
+                C_def,
+                d['name'], self.AU_to_bytes(d['addressOffset']),
+                d['dim'], d['size'] // 8
+            )
+        else:
+            C = self.instantiate_reg(
+                C_def,
+                d['name'], self.AU_to_bytes(d['addressOffset'])
+            )
+
+        # Collect properties and other values
+        if 'displayName' in d:
+            self.assign_property(C, "name", d['displayName'])
+
+        if 'description' in d:
+            self.assign_property(C, "desc", d['description'])
+
+        if 'isPresent' in d:
+            self.assign_property(C, "ispresent", d['isPresent'])
 
 
         if 'vendorExtensions' in d:
@@ -566,8 +1382,12 @@ class IPXACTImporter(RDLImporter):
                 % (C.inst_name),
                 self.src_ref
             )
+            self.count("discarded.registers")
             return None
 
+        self.count("registers")
+        self.count("fields", len(C.children))
+        self.count("enums", sum(1 for field in C.children if "encode" in field.properties))
         return C
 
 
@@ -580,6 +1400,18 @@ class IPXACTImporter(RDLImporter):
         """
         Parses an field and returns an instantiated field component
         """
+        d = self.decode_field(name, field, uniquify_field_name)
+        if d is None:
+            return None
+        return self.build_field(d, reg_access, reg_reset_value, reg_reset_mask)
+
+
+    def decode_field(
+        self, name: str, field: ElementTree.Element, uniquify_field_name: bool,
+        flattened: Optional['FlattenedElement'] = None,
+    ) -> Optional[Dict[str, Any]]:
+        # The field's flattened values may already be known, since the
+        # enclosing register needs them to detect name collisions
         # Schema:
         #   {nameGroup}
         #       name (required) --> inst_name
@@ -609,7 +1441,9 @@ class IPXACTImporter(RDLImporter):
         #   parameters
         #   vendorExtensions
 
-        d = self.flatten_element_values(field)
+        if flattened is None:
+            flattened = self.flatten_element_values(field)
+        d = flattened.values
 
         # Check for required values
         required = {'bitOffset', 'bitWidth'}
@@ -621,15 +1455,27 @@ class IPXACTImporter(RDLImporter):
 
         # Discard field if it is reserved
         if d.get('reserved', False):
+            self.count("discarded.fields")
             return None
 
         if uniquify_field_name:
             name += "_%d_%d" % (d['bitOffset'] + d['bitWidth'] - 1, d['bitOffset'])
+        d['name'] = name
+
+        if 'enum_el' in d:
+            d['enum'] = self.decode_enumeratedValues(d.pop('enum_el'))
+
+        return d
 
+
+    def build_field(
+        self, d: Dict[str, Any],
+        reg_access: rdltypes.AccessType, reg_reset_value: Optional[int], reg_reset_mask: Optional[int],
+    ) -> comp.Field:
         # Create component instance
         C = self.instantiate_field(
             self.create_field_definition(),
-            name, d['bitOffset'], d['bitWidth']
+            d['name'], d['bitOffset'], d['bitWidth']
         )
 
         # Collect properties and other values
@@ -668,9 +1514,9 @@ class IPXACTImporter(RDLImporter):
         if 'modifiedWriteValue' in d:
             self.assign_property(C, "onwrite", d['modifiedWriteValue'])
 
-        if 'enum_el' in d:
+        if 'enum' in d:
             assert C.inst_name is not None
-            enum_type = self.parse_enumeratedValues(d['enum_el'], C.inst_name + "_enum_t")
+            enum_type = self.build_enumeratedValues(d['enum'], C.inst_name + "_enum_t")
             self.assign_property(C, "encode", enum_type)
 
         if 'vendorExtensions' in d:
@@ -692,10 +1538,7 @@ class IPXACTImporter(RDLImporter):
 
     def parse_integer(self, s: str) -> int:
         """
-        Converts an IP-XACT number string into an int
-
-        IP-XACT technically supports integer expressions in these fields.
-        For now, I don't have a compelling reason to support them.
+        Converts an IP-XACT number string or integer expression into an int
 
         Handles the following formats:
             - Normal decimal: 123, -456
@@ -703,49 +1546,13 @@ class IPXACTImporter(RDLImporter):
             - scaledInteger:
                 - May have # or 0x prefix for hex
                 - May have K, M, G, or T multiplier suffix
-        """
-        s = s.strip()
+            - Integer expressions, which may reference the component's
+              parameters. See :class:`ExpressionEvaluator`.
 
-        multiplier = {
-            "K": 1024,
-            "M": 1024*1024,
-            "G": 1024*1024*1024,
-            "T": 1024*1024*1024*1024
-        }
-
-        m = re.fullmatch(r'(-?\d+)(K|M|G|T)?', s, re.I)
-        if m:
-            v = int(m.group(1))
-            if m.group(2):
-                v *= multiplier[m.group(2).upper()]
-            return v
-
-        m = re.fullmatch(r"\d*'h([0-9a-f]+)", s, re.I)
-        if m:
-            return int(m.group(1), 16)
-
-        m = re.fullmatch(r"(-)?(0x|#)([0-9a-f]+)(K|M|G|T)?", s, re.I)
-        if m:
-            v = int(m.group(3), 16)
-            if m.group(1):
-                v = -v
-            if m.group(4):
-                v *= multiplier[m.group(4).upper()]
-            return v
-
-        m = re.fullmatch(r"\d*'d([0-9]+)", s, re.I)
-        if m:
-            return int(m.group(1), 10)
-
-        m = re.fullmatch(r"\d*'b([0-1]+)", s, re.I)
-        if m:
-            return int(m.group(1), 2)
-
-        m = re.fullmatch(r"\d*'o([0-7]+)", s, re.I)
-        if m:
-            return int(m.group(1), 8)
-
-        raise ValueError
+        Raises :class:`ExpressionError` (a ValueError) if the string is
+        invalid.
+        """
+        return self.expressions.evaluate(s)
 
 
     def parse_boolean(self, s: str) -> bool:
@@ -774,152 +1581,229 @@ class IPXACTImporter(RDLImporter):
         if name_el is None:
             return None
 
-        return re.sub(
-            r'[:\-.]',
-            "_",
-            get_text(name_el).strip()
-        )
+        return self.sanitize_name(get_text(name_el))
 
 
-    def flatten_element_values(self, el: ElementTree.Element) -> Dict[str, Any]:
+    def sanitize_name(self, name: str) -> str:
         """
-        Given any of the IP-XACT RAL component elements, flatten the
-        key/value tags into a dictionary.
+        Sanitizes an IP-XACT name to conform to import identifier rules.
+        """
+        return SANITIZE_NAME_RE.sub("_", name.strip())
 
-        Handles values contained in:
-            addressBlock, register, registerFile, field
 
-        Ignores several tags that are not interesting to the RAL importer
+    def flatten_element_values(self, el: ElementTree.Element, table: Optional[Dict[str, Tuple[str, FlattenHandler]]] = None) -> 'FlattenedElement':
         """
+        Given any of the IP-XACT RAL component elements, decode its name and
+        key/value tags in a single pass.
+
+        Handles values contained in:
+            memoryMap, addressBlock, register, registerFile, field
 
-        d = {
-            'child_els' : []
-        } # type: Dict[str, Any]
+        Ignores several tags that are not interesting to the RAL importer.
+        Other elements can be decoded by passing their own dispatch ``table``.
+        """
+        flattened = FlattenedElement()
+        if table is None:
+            table = self._flatten_tables.get(self.ns)
+            if table is None:
+                table = self.get_flatten_table()
 
         for child in el.iterfind("*"):
-            local_name = get_local_name(child)
-            if local_name in ("displayName", "usage"):
-                # Copy string types directly, but stripped
-                d[local_name] = get_text(child).strip()
-
-            elif local_name == "description":
-                # Copy description string types unmodified
-                d[local_name] = get_text(child)
-
-            elif local_name in ("baseAddress", "addressOffset", "range", "width", "size", "bitOffset", "bitWidth"):
-                # Parse integer types
-                d[local_name] = self.parse_integer(get_text(child))
-
-            elif local_name in ("isPresent", "volatile", "testable", "reserved"):
-                # Parse boolean types
-                d[local_name] = self.parse_boolean(get_text(child))
-
-            elif local_name in ("register", "registerFile", "field"):
-                # Child elements that need to be parsed elsewhere
-                d['child_els'].append(child)
-
-            elif local_name in ("reset", "resets"):
-                if local_name == "resets":
-                    # pick the first reset
-                    reset = child.find(self.ns + "reset")
-                    if reset is None:
-                        continue
-                else:
-                    reset = child
-
-                value_el = reset.find(self.ns + "value")
-                if value_el is not None:
-                    d['reset.value'] = self.parse_integer(get_text(value_el))
-
-                mask_el = reset.find(self.ns + "mask")
-                if mask_el is not None:
-                    d['reset.mask'] = self.parse_integer(get_text(mask_el))
-
-            elif local_name == "access":
-                s = get_text(child).strip()
-                sw = typemaps.sw_from_access(s)
-                if sw is None:
-                    self.msg.error(
-                        "Invalid value '%s' found in <%s>" % (s, child.tag),
-                        self.src_ref
-                    )
-                else:
-                    d['access'] = sw
+            entry = table.get(child.tag)
+            if entry is not None:
+                key, handler = entry
+                handler(flattened, key, child)
+        return flattened
 
-            elif local_name == "dim":
-                # Accumulate array dimensions
-                dim = self.parse_integer(get_text(child))
-                if 'dim' in d:
-                    d['dim'].append(dim)
-                else:
-                    d['dim'] = [dim]
-
-            elif local_name == "readAction":
-                s = get_text(child).strip()
-                onread = typemaps.onread_from_readaction(s)
-                if onread is None:
-                    self.msg.error(
-                        "Invalid value '%s' found in <%s>" % (s, child.tag),
-                        self.src_ref
-                    )
-                else:
-                    d['readAction'] = onread
-
-            elif local_name == "modifiedWriteValue":
-                s = get_text(child).strip()
-                onwrite = typemaps.onwrite_from_mwv(s)
-                if onwrite is None:
-                    self.msg.error(
-                        "Invalid value '%s' found in <%s>" % (s, child.tag),
-                        self.src_ref
-                    )
-                else:
-                    d['modifiedWriteValue'] = onwrite
 
-            elif local_name == "enumeratedValues":
-                # Deal with this later
-                d['enum_el'] = child
+    def get_flatten_table(self) -> Dict[str, Tuple[str, FlattenHandler]]:
+        """
+        Returns the dispatch table of :meth:`flatten_element_values` for the
+        current namespace, which maps the tag of each child element of
+        interest to its key and handler. The table is only built once per
+        namespace, and its tags are interned.
+        """
+        table = self._flatten_tables.get(self.ns)
+        if table is not None:
+            return table
+
+        reset_tag = sys.intern(self.ns + "reset")
+        value_tag = sys.intern(self.ns + "value")
+        mask_tag = sys.intern(self.ns + "mask")
+
+        def flatten_reset(flattened: FlattenedElement, key: str, reset: ElementTree.Element) -> None:
+            #pylint: disable=unused-argument
+            value_el = reset.find(value_tag)
+            if value_el is not None:
+                flattened.values['reset.value'] = self.parse_integer(get_text(value_el))
+
+            mask_el = reset.find(mask_tag)
+            if mask_el is not None:
+                flattened.values['reset.mask'] = self.parse_integer(get_text(mask_el))
+
+        def flatten_resets(flattened: FlattenedElement, key: str, resets: ElementTree.Element) -> None:
+            # pick the first reset
+            reset = resets.find(reset_tag)
+            if reset is not None:
+                flatten_reset(flattened, key, reset)
+
+        handlers = [
+            # Copy string types directly, but stripped
+            (("displayName", "usage"), self.flatten_stripped_text),
+            # Copy description string types unmodified
+            (("description",), self.flatten_text),
+            (("baseAddress", "addressOffset", "range", "width", "size", "bitOffset", "bitWidth"), self.flatten_integer),
+            (("isPresent", "volatile", "testable", "reserved"), self.flatten_boolean),
+            # Child elements that need to be parsed elsewhere
+            (("register", "registerFile", "field"), self.flatten_child),
+            (("name",), self.flatten_name),
+            (("reset",), flatten_reset),
+            (("resets",), flatten_resets),
+            (("access",), self.flatten_access),
+            (("dim",), self.flatten_dim),
+            (("readAction",), self.flatten_readAction),
+            (("modifiedWriteValue",), self.flatten_modifiedWriteValue),
+            # Deal with these later
+            (("vendorExtensions",), self.flatten_vendorExtensions),
+        ] # type: List[Tuple[Tuple[str, ...], FlattenHandler]]
+
+        table = self.build_flatten_table(handlers)
+        table[sys.intern(self.ns + "enumeratedValues")] = ("enum_el", self.flatten_element)
+
+        self._flatten_tables[self.ns] = table
+        return table
+
+
+    def get_enumeratedValue_flatten_table(self) -> Dict[str, Tuple[str, FlattenHandler]]:
+        """
+        Returns the dispatch table of :meth:`flatten_element_values` for
+        <enumeratedValue> elements of the current namespace.
+        """
+        table = self._enumeratedValue_tables.get(self.ns)
+        if table is not None:
+            return table
 
-            elif local_name == "vendorExtensions":
-                # Deal with this later
-                d['vendorExtensions'] = child
+        handlers = [
+            (("displayName",), self.flatten_stripped_text),
+            (("description",), self.flatten_text),
+            (("value",), self.flatten_integer),
+            (("name",), self.flatten_name),
+        ] # type: List[Tuple[Tuple[str, ...], FlattenHandler]]
 
-        return d
+        table = self.build_flatten_table(handlers)
+        self._enumeratedValue_tables[self.ns] = table
+        return table
+
+
+    def build_flatten_table(self, handlers: List[Tuple[Tuple[str, ...], FlattenHandler]]) -> Dict[str, Tuple[str, FlattenHandler]]:
+        # Map the interned tag of each local name in the current namespace to
+        # its interned key and handler
+        table = {}
+        for local_names, handler in handlers:
+            for local_name in local_names:
+                table[sys.intern(self.ns + local_name)] = (sys.intern(local_name), handler)
+        return table
+
+
+    def flatten_name(self, flattened: 'FlattenedElement', key: str, child: ElementTree.Element) -> None:
+        #pylint: disable=unused-argument
+        if flattened.name is None:
+            flattened.name = self.sanitize_name(get_text(child))
+
+    def flatten_stripped_text(self, flattened: 'FlattenedElement', key: str, child: ElementTree.Element) -> None:
+        flattened.values[key] = get_text(child).strip()
+
+    def flatten_text(self, flattened: 'FlattenedElement', key: str, child: ElementTree.Element) -> None:
+        flattened.values[key] = get_text(child)
+
+    def flatten_integer(self, flattened: 'FlattenedElement', key: str, child: ElementTree.Element) -> None:
+        flattened.values[key] = self.parse_integer(get_text(child))
+
+    def flatten_boolean(self, flattened: 'FlattenedElement', key: str, child: ElementTree.Element) -> None:
+        flattened.values[key] = self.parse_boolean(get_text(child))
+
+    def flatten_child(self, flattened: 'FlattenedElement', key: str, child: ElementTree.Element) -> None:
+        flattened.child_els.append((key, child))
+
+    def flatten_element(self, flattened: 'FlattenedElement', key: str, child: ElementTree.Element) -> None:
+        flattened.values[key] = child
+
+    def flatten_vendorExtensions(self, flattened: 'FlattenedElement', key: str, child: ElementTree.Element) -> None:
+        # Decoded records are pickled for the cache and parallel imports, so
+        # they must not hold lxml elements
+        flattened.values[key] = to_etree(child)
+
+    def flatten_dim(self, flattened: 'FlattenedElement', key: str, child: ElementTree.Element) -> None:
+        # Accumulate array dimensions
+        dim = self.parse_integer(get_text(child))
+        if key in flattened.values:
+            flattened.values[key].append(dim)
+        else:
+            flattened.values[key] = [dim]
+
+    def flatten_access(self, flattened: 'FlattenedElement', key: str, child: ElementTree.Element) -> None:
+        s = get_text(child).strip()
+        sw = typemaps.sw_from_access(s)
+        if sw is None:
+            self.msg.error(
+                "Invalid value '%s' found in <%s>" % (s, child.tag),
+                self.src_ref
+            )
+        else:
+            flattened.values[key] = sw
+
+    def flatten_readAction(self, flattened: 'FlattenedElement', key: str, child: ElementTree.Element) -> None:
+        s = get_text(child).strip()
+        onread = typemaps.onread_from_readaction(s)
+        if onread is None:
+            self.msg.error(
+                "Invalid value '%s' found in <%s>" % (s, child.tag),
+                self.src_ref
+            )
+        else:
+            flattened.values[key] = onread
+
+    def flatten_modifiedWriteValue(self, flattened: 'FlattenedElement', key: str, child: ElementTree.Element) -> None:
+        s = get_text(child).strip()
+        onwrite = typemaps.onwrite_from_mwv(s)
+        if onwrite is None:
+            self.msg.error(
+                "Invalid value '%s' found in <%s>" % (s, child.tag),
+                self.src_ref
+            )
+        else:
+            flattened.values[key] = onwrite
 
 
     def parse_enumeratedValues(self, enumeratedValues: ElementTree.Element, type_name: str) -> Type[rdltypes.UserEnum]:
         """
         Parses an enumeration listing and returns the user-defined enum type
         """
-        members = []
-        values = []
-        member_names = []
-        for enumeratedValue in enumeratedValues.iterfind("*"):
-            if get_local_name(enumeratedValue) != "enumeratedValue":
-                continue
+        return self.build_enumeratedValues(self.decode_enumeratedValues(enumeratedValues), type_name)
 
-            # Flatten element values
-            d = {} # type: Dict[str, Any]
-            for child in enumeratedValue.iterfind("*"):
-                local_name = get_local_name(child)
-                if local_name in ("name", "displayName"):
-                    d[local_name] = get_text(child).strip()
-                elif local_name == "description":
-                    d[local_name] = get_text(child)
-                elif local_name == "value":
-                    d[local_name] = self.parse_integer(get_text(child))
-
-            name = self.get_sanitized_element_name(enumeratedValue)
-            if not name:
-                self.msg.fatal("enumeratedValue is missing required tag 'name'", self.src_ref)
+
+    def decode_enumeratedValues(self, enumeratedValues: ElementTree.Element) -> List[EnumMember]:
+        """
+        Decodes an enumeration listing into a list of
+        ``(name, value, displayName, description)`` member tuples
+        """
+        members = [] # type: List[EnumMember]
+        values = set() # type: Set[int]
+        member_names = set() # type: Set[str]
+        table = self._enumeratedValue_tables.get(self.ns)
+        if table is None:
+            table = self.get_enumeratedValue_flatten_table()
+
+        for enumeratedValue in enumeratedValues.iterfind(self.ns + "enumeratedValue"):
+            flattened = self.flatten_element_values(enumeratedValue, table)
+            name = flattened.name
+            d = flattened.values
 
             # Check for required values
-            required = {'value'}
-            missing = required - set(d.keys())
             if not name:
-                missing.add('name')
-            for m in missing:
-                self.msg.fatal("enumeratedValue is missing required tag '%s'" % m, self.src_ref)
+                self.msg.fatal("enumeratedValue is missing required tag 'name'", self.src_ref)
+            if 'value' not in d:
+                self.msg.fatal("enumeratedValue is missing required tag 'value'", self.src_ref)
 
             entry_name = name
             entry_value = d['value']
@@ -932,8 +1816,9 @@ class IPXACTImporter(RDLImporter):
                     % (entry_name, entry_value),
                     self.src_ref
                 )
+                self.count("discarded.enumeratedValues")
                 continue
-            values.append(entry_value)
+            values.add(entry_value)
 
             if entry_name in member_names:
                 self.msg.warning(
@@ -941,15 +1826,35 @@ class IPXACTImporter(RDLImporter):
                     % entry_name,
                     self.src_ref
                 )
+                self.count("discarded.enumeratedValues")
                 continue
-            member_names.append(entry_name)
+            member_names.add(entry_name)
 
-            member = rdltypes.UserEnumMemberContainer(
-                entry_name, entry_value, displayname, desc
-            )
-            members.append(member)
+            members.append((entry_name, entry_value, displayname, desc))
+
+        return members
 
-        enum_type = rdltypes.UserEnum.define_new(type_name, members)
+
+    def build_enumeratedValues(self, members: List[EnumMember], type_name: str) -> Type[rdltypes.UserEnum]:
+        """
+        Returns the user-defined enum type for the given members.
+
+        If ``intern_enums`` is enabled, identical enumerations within a file
+        share a single enum type, which is named after its first use.
+        """
+        if self.intern_enums:
+            key = tuple(members)
+            enum_type = self._enum_types.get(key, None)
+            if enum_type is not None:
+                return enum_type
+
+        enum_members = [
+            rdltypes.UserEnumMemberContainer(entry_name, entry_value, displayname, desc)
+            for entry_name, entry_value, displayname, desc in members
+        ]
+        enum_type = rdltypes.UserEnum.define_new(type_name, enum_members)
+        if self.intern_enums:
+            self._enum_types[key] = enum_type
 
         return enum_type
 
@@ -989,7 +1894,35 @@ class IPXACTImporter(RDLImporter):
         return component
 
 #===============================================================================
+def parse_xml(path: str, backend: str = "etree") -> 'ElementTree.ElementTree[ElementTree.Element]':
+    # Parse a complete document, decompressing it if needed
+    with compression.open_binary(path) as f:
+        return xml_parse(f, backend)
+
+def iterparse_xml(path: str, backend: str = "etree") -> Iterator[Tuple[str, ElementTree.Element]]:
+    # Incrementally parse a document, decompressing it if needed.
+    # Yields start and end events.
+    with compression.open_binary(path) as f:
+        yield from xml_iterparse(f, backend)
+
+def is_ipxact_file(path: str) -> bool:
+    """
+    Returns True if the file's root element is a SPIRIT or IP-XACT
+    <component>, decompressing it if needed.
+
+    Only the start of the file is read, up to the root element's start tag.
+    """
+    with compression.open_binary(path) as f:
+        tag = sniff_root_tag(f, SNIFF_SIZE)
+    if tag is None or not tag.endswith("}component"):
+        return False
+    namespace = tag[:-len("component")]
+    return any(ns_regex.match(namespace) for ns_regex in VALID_NS_REGEXES)
+
 def get_text(el: ElementTree.Element) -> str:
+    if len(el) == 0:
+        # Leaf elements are by far the most common
+        return el.text or ""
     return "".join(el.itertext())
 
 def roundup_pow2(x: int) -> int:
@@ -1002,3 +1935,48 @@ def get_namespace(el: ElementTree.Element) -> str:
 def get_local_name(el: ElementTree.Element) -> str:
     # Returns the non-namespace part of this element's tag
     return el.tag.split("}")[1]
+
+def discard_element(parent: ElementTree.Element, el: ElementTree.Element) -> None:
+    # Release an element that was fully consumed during an iterparse
+    el.clear()
+    parent.remove(el)
+
+class FlattenedElement:
+    """
+    The name and key/value tags of an IP-XACT RAL component element, as
+    decoded by :meth:`IPXACTImporter.flatten_element_values`
+    """
+    __slots__ = ("name", "values", "child_els")
+
+    def __init__(self) -> None:
+        #: Sanitized text of the <name> tag. None if there is none.
+        self.name = None # type: Optional[str]
+
+        #: Decoded values, keyed by tag name
+        self.values = {} # type: Dict[str, Any]
+
+        #: (tag name, element) of each child register, registerFile and field
+        self.child_els = [] # type: List[Tuple[str, ElementTree.Element]]
+
+class Unshareable(Exception):
+    pass
+
+def freeze_record(value: Any) -> Hashable:
+    # Convert a decoded record into an equivalent hashable value.
+    # Raises Unshareable if it contains vendorExtensions, since their handlers
+    # may customize individual instances.
+    if isinstance(value, dict):
+        if 'vendorExtensions' in value:
+            raise Unshareable
+        return tuple(sorted((k, freeze_record(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_record(v) for v in value)
+    return value
+
+def _decode_addressBlock_task(idx: int) -> 'Isolated[Dict[str, Any]]':
+    importer, addressBlocks = parallel.get_worker_state()
+    return importer.decode_addressBlock_isolated(addressBlocks[idx])
+
+def _decode_file_task(path: str) -> 'Isolated[Dict[str, Any]]':
+    importer, remap_state = parallel.get_worker_state()
+    return importer.decode_file_cached(path, remap_state)
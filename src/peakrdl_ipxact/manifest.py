@@ -0,0 +1,203 @@
+from typing import Any, Optional, Dict
+import enum
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from systemrdl import component as comp
+from systemrdl import rdltypes
+from systemrdl.node import Node, AddressableNode
+
+from .__about__ import __version__
+from . import compression
+
+def model_fingerprint(node: Node, *settings: Any) -> str:
+    """
+    Compute a digest of a register model, along with any additional settings
+    that affect how it is exported.
+
+    The digest is derived from the component instances directly, which is much
+    cheaper than exporting them. Values that cannot be represented in a way that
+    is stable across runs result in a different digest every time, so that they
+    never cause an out-of-date output to be considered up to date.
+    """
+    h = hashlib.sha256()
+    h.update(("%s\0%s\0%d\0" % (__version__, node.get_path(), node.inst.is_instance)).encode("utf-8"))
+    for setting in settings:
+        h.update(("%s\0" % stable_repr(setting)).encode("utf-8"))
+    if isinstance(node, AddressableNode):
+        h.update(("%d\0" % node.absolute_address).encode("utf-8"))
+    _hash_component(h, node.inst)
+    return h.hexdigest()
+
+
+def _hash_component(h: Any, inst: comp.Component) -> None:
+    fields = [
+        type(inst).__name__, inst.type_name, inst.inst_name, inst.external,
+    ] # type: list
+    if isinstance(inst, comp.AddressableComponent):
+        fields.extend([inst.addr_offset, inst.array_dimensions, inst.array_stride])
+    if isinstance(inst, comp.VectorComponent):
+        fields.extend([inst.width, inst.msb, inst.lsb])
+    for k in sorted(inst.properties.keys()):
+        fields.append((k, inst.properties[k]))
+
+    h.update(("%s\0" % stable_repr(fields)).encode("utf-8"))
+
+    h.update(b"{")
+    for child in inst.children:
+        _hash_component(h, child)
+    h.update(b"}")
+
+
+def stable_repr(value: Any) -> str:
+    """
+    Represent a value in a way that does not vary between runs
+    """
+    if value is None or isinstance(value, (bool, int, str, float)):
+        return repr(value)
+    if isinstance(value, enum.Enum):
+        return "%s.%s" % (type(value).__name__, value.name)
+    if isinstance(value, (list, tuple)):
+        return "[%s]" % ",".join(stable_repr(v) for v in value)
+    if isinstance(value, type) and issubclass(value, rdltypes.UserEnum):
+        return "enum %s{%s}" % (
+            value.type_name,
+            ",".join(
+                stable_repr([m.name, m.value, m.rdl_name, m.rdl_desc])
+                for m in value
+            )
+        )
+    if isinstance(value, Node):
+        return "node %s" % value.get_path()
+    if isinstance(value, rdltypes.references.ComponentRef):
+        return "ref %s.%s" % (
+            value.ref_root.type_name,
+            ".".join(
+                "%s%s" % (name, stable_repr(idx_list))
+                for name, idx_list, _ in value.ref_elements
+            )
+        )
+    if isinstance(value, rdltypes.references.PropertyReference):
+        return "%s %s" % (
+            type(value).__name__,
+            stable_repr(value._comp_ref) # pylint: disable=protected-access
+        )
+    # Unknown type. Fall back to its repr, which may include an object's
+    # address and therefore prevents any false matches.
+    return "%s:%r" % (type(value).__name__, value)
+
+
+def file_digest(path: str) -> Optional[str]:
+    """
+    sha256 digest of a file's contents. None if it does not exist or cannot
+    be read.
+
+    Compressed files are digested by their uncompressed contents.
+    """
+    h = hashlib.sha256()
+    try:
+        with compression.open_binary(path) as f:
+            for chunk in iter(lambda: f.read(1024*1024), b""):
+                h.update(chunk)
+    except FileNotFoundError:
+        return None
+    except Exception: # pylint: disable=broad-except
+        # Corrupt compressed file. Its contents are unknown.
+        return None
+    return h.hexdigest()
+
+
+def file_stat(path: str) -> Optional[Dict[str, int]]:
+    """
+    Size and modification time of a file as stored, or None if it does not
+    exist.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+# Files that were modified within this long before their manifest was written
+# may have been modified again without changing their timestamp, since some
+# file systems only store it with a resolution of up to 2 seconds.
+RACY_WINDOW_NS = 2 * 1000 * 1000 * 1000
+
+
+def make_manifest(fingerprint: str, output_path: str, digest: Optional[str]) -> Dict[str, Any]:
+    """
+    Returns the manifest of an output file with the given digest that was
+    exported from a model with the given fingerprint.
+    """
+    data = {
+        "model": fingerprint,
+        "output": digest,
+        "written_ns": time.time_ns(),
+    } # type: Dict[str, Any]
+    stat = file_stat(output_path)
+    if stat is not None:
+        data["output_size"] = stat["size"]
+        data["output_mtime_ns"] = stat["mtime_ns"]
+    return data
+
+
+def read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    return data
+
+
+def write_manifest(path: str, data: Dict[str, Any]) -> None:
+    write_file_atomic(path, json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+def is_up_to_date(output_path: str, manifest_path: str, fingerprint: str) -> bool:
+    """
+    Check whether the manifest states that the output was generated from a
+    model with the same fingerprint, and that the output was not modified since.
+
+    If the output's size and modification time still match the manifest, it
+    is assumed to be unmodified, without reading it. Otherwise, or if it was
+    modified too shortly before the manifest was written to tell, its contents
+    are digested instead. If they turn out to be unchanged, the manifest is
+    updated, so that the next check is quick again.
+    """
+    manifest = read_manifest(manifest_path)
+    if manifest is None or manifest.get("model") != fingerprint:
+        return False
+
+    stat = file_stat(output_path)
+    if stat is None:
+        return False
+    if (
+        manifest.get("output_size") == stat["size"]
+        and manifest.get("output_mtime_ns") == stat["mtime_ns"]
+        and stat["mtime_ns"] + RACY_WINDOW_NS < manifest.get("written_ns", 0)
+    ):
+        return True
+
+    digest = file_digest(output_path)
+    if digest is None or manifest.get("output") != digest:
+        return False
+    write_manifest(manifest_path, make_manifest(fingerprint, output_path, digest))
+    return True
+
+
+def write_file_atomic(path: str, text: str) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
@@ -0,0 +1,252 @@
+from typing import Any, Dict, Iterator, List, Optional, Union, TYPE_CHECKING
+import contextlib
+import tracemalloc
+
+from .metrics import Metrics
+from .importer import IPXACTImporter
+from .exporter import IPXACTExporter
+
+if TYPE_CHECKING:
+    from systemrdl import RDLCompiler
+    from systemrdl.node import AddrmapNode, RootNode
+
+#: Relative growth of traced memory before another allocation snapshot is taken
+SNAPSHOT_GROWTH = 1.1
+
+
+class MemoryProfiler(Metrics):
+    """
+    Performance metrics collector that also profiles memory usage using
+    :mod:`tracemalloc`.
+
+    In addition to everything recorded by :class:`Metrics`, it records for each
+    phase:
+
+    * ``peak``: The highest amount of traced memory while the phase was active.
+    * ``retained``: The net amount of memory that the phase allocated and did
+      not free again.
+
+    It also records the allocation sites that held the most memory at the
+    highest point that was observed, and the memory used per converted
+    register and field. Memory that was already allocated when profiling
+    started is excluded from the latter.
+
+    Profiling only covers the calling process. Work done by worker processes
+    (``jobs`` > 1) is not traced.
+
+    .. note::
+        Per-phase peaks rely on :func:`tracemalloc.reset_peak`, which requires
+        Python 3.9. On older versions, each phase's peak is the highest amount
+        of memory that was traced so far.
+    """
+
+    def __init__(self, top_n: int = 10, nframes: int = 1) -> None:
+        """
+        Parameters
+        ----------
+        top_n: int
+            Number of allocation sites to report.
+        nframes: int
+            Number of stack frames recorded per allocation.
+        """
+        super().__init__()
+        self.top_n = top_n
+        self.nframes = nframes
+
+        #: Highest traced memory of each phase, in bytes
+        self.peaks = {} # type: Dict[str, int]
+
+        #: Net memory allocated by each phase, in bytes
+        self.retained = {} # type: Dict[str, int]
+
+        #: Highest traced memory while profiling, in bytes
+        self.peak = 0
+
+        #: Traced memory when profiling started, in bytes
+        self.baseline = 0
+
+        # Highest memory of the active phases: [phase peak]
+        self._mem_stack = [] # type: List[List[int]]
+        self._snapshot = None # type: Optional[tracemalloc.Snapshot]
+        self._snapshot_size = 0
+        self._started_tracing = False
+
+
+    def start(self) -> None:
+        """
+        Start tracing memory allocations.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.nframes)
+            self._started_tracing = True
+        self.baseline = tracemalloc.get_traced_memory()[0]
+        self._reset_peak()
+
+
+    def stop(self) -> None:
+        """
+        Stop tracing memory allocations, if they were started by this profiler.
+        """
+        self._sample()
+        self._take_snapshot()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
+    def __enter__(self) -> 'MemoryProfiler':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not tracemalloc.is_tracing():
+            with super().phase(name):
+                yield
+            return
+
+        self._sample()
+        start = tracemalloc.get_traced_memory()[0]
+        self._mem_stack.append([start])
+        try:
+            with super().phase(name):
+                yield
+        finally:
+            self._sample()
+            current = tracemalloc.get_traced_memory()[0]
+            phase_peak = self._mem_stack.pop()[0]
+            self.peaks[name] = max(self.peaks.get(name, 0), phase_peak)
+            self.retained[name] = self.retained.get(name, 0) + (current - start)
+            if not self._mem_stack:
+                self._take_snapshot()
+
+
+    def _sample(self) -> None:
+        """
+        Attribute the peak since the last sample to all active phases.
+        """
+        peak = tracemalloc.get_traced_memory()[1]
+        self.peak = max(self.peak, peak)
+        for entry in self._mem_stack:
+            entry[0] = max(entry[0], peak)
+        self._reset_peak()
+
+
+    @staticmethod
+    def _reset_peak() -> None:
+        reset_peak = getattr(tracemalloc, "reset_peak", None)
+        if reset_peak is not None:
+            reset_peak()
+
+
+    def _take_snapshot(self) -> None:
+        # Snapshots are expensive, so only take one when memory has grown
+        # significantly since the last one.
+        if not tracemalloc.is_tracing():
+            return
+        current = tracemalloc.get_traced_memory()[0]
+        if self._snapshot is not None and current < self._snapshot_size * SNAPSHOT_GROWTH:
+            return
+        self._snapshot = tracemalloc.take_snapshot()
+        self._snapshot_size = current
+
+
+    def get_top_allocations(self) -> List[Dict[str, Any]]:
+        """
+        Returns the allocation sites that held the most memory when the
+        highest amount of memory was observed.
+        """
+        if self._snapshot is None:
+            return []
+        # Filtering the statistics is much faster than filtering the snapshot
+        ignored = (tracemalloc.__file__, __file__)
+        sites = [] # type: List[Dict[str, Any]]
+        for stat in self._snapshot.statistics("lineno"):
+            if len(sites) == self.top_n:
+                break
+            frame = stat.traceback[0]
+            if frame.filename in ignored:
+                continue
+            sites.append({
+                "site": "%s:%d" % (frame.filename, frame.lineno),
+                "size": stat.size,
+                "count": stat.count,
+            })
+        return sites
+
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Same as :meth:`Metrics.as_dict`, with an additional ``memory`` entry.
+        """
+        d = super().as_dict() # type: Dict[str, Any]
+        per_element = {}
+        for name in ("registers", "fields"):
+            if self.counts.get(name, 0):
+                per_element[name] = (self.peak - self.baseline) / self.counts[name]
+        d["memory"] = {
+            "baseline": self.baseline,
+            "peak": self.peak,
+            "phases": {
+                name: {"peak": self.peaks[name], "retained": self.retained[name]}
+                for name in sorted(self.peaks)
+            },
+            "bytes_per_element": per_element,
+            "top_allocations": self.get_top_allocations(),
+        }
+        return d
+
+
+def profile_import(compiler: 'RDLCompiler', path: str, remap_state: Optional[str] = None, **kwargs: Any) -> MemoryProfiler:
+    """
+    Import an IP-XACT file while profiling memory usage.
+
+    Parameters
+    ----------
+    compiler: :class:`systemrdl.RDLCompiler`
+        Reference to RDLCompiler object to import into.
+    path: str
+        Input file.
+    remap_state: str
+        Optional remapState string, as used by
+        :meth:`IPXACTImporter.import_file`.
+    kwargs:
+        Additional arguments for the :class:`IPXACTImporter` constructor.
+    """
+    profiler = MemoryProfiler()
+    with profiler:
+        importer = IPXACTImporter(compiler, metrics=profiler, **kwargs)
+        importer.import_file(path, remap_state=remap_state)
+    return profiler
+
+
+def profile_export(node: Union['AddrmapNode', 'RootNode'], path: str, component_name: Optional[str] = None, **kwargs: Any) -> MemoryProfiler:
+    """
+    Export a register model while profiling memory usage.
+
+    The model can come from any source, such as a compiled SystemRDL file or a
+    synthetically generated design.
+
+    Parameters
+    ----------
+    node: AddrmapNode | RootNode
+        Top-level node to export.
+    path: str
+        Output file.
+    component_name: str
+        Optional component name, as used by :meth:`IPXACTExporter.export`.
+    kwargs:
+        Additional arguments for the :class:`IPXACTExporter` constructor.
+    """
+    profiler = MemoryProfiler()
+    with profiler:
+        exporter = IPXACTExporter(metrics=profiler, **kwargs)
+        if component_name is None:
+            exporter.export(node, path)
+        else:
+            exporter.export(node, path, component_name=component_name)
+    return profiler
@@ -0,0 +1,140 @@
+from typing import Dict, List, Iterator, Iterable, TypeVar, Any, Optional, ContextManager, Callable, TextIO
+import contextlib
+import functools
+import json
+import time
+
+T = TypeVar("T")
+F = TypeVar("F", bound=Callable[..., Any])
+
+class Metrics:
+    """
+    Collects performance telemetry of imports or exports.
+
+    Records the wall time spent in each phase of a conversion, and counts of
+    the elements that were converted or discarded. Pass the same collector to
+    several conversions to accumulate their totals.
+
+    Phases may be nested. Time is only attributed to the innermost phase that
+    is active, so the sum of all phase times never exceeds the total wall
+    time.
+    """
+
+    def __init__(self) -> None:
+        #: Accumulated wall time of each phase, in seconds
+        self.times = {} # type: Dict[str, float]
+
+        #: Accumulated counts
+        self.counts = {} # type: Dict[str, int]
+
+        # Stack of [phase name, start time] of active phases
+        self._stack = [] # type: List[List[Any]]
+
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Context manager that attributes the time spent within it to a phase.
+        """
+        now = time.perf_counter()
+        if self._stack:
+            self._pause(self._stack[-1], now)
+        self._stack.append([name, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._pause(self._stack.pop(), now)
+            if self._stack:
+                self._stack[-1][1] = now
+
+    def _pause(self, entry: List[Any], now: float) -> None:
+        name, start = entry
+        self.times[name] = self.times.get(name, 0.0) + (now - start)
+
+
+    def timed_iter(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """
+        Attributes the time spent fetching each item of an iterable to a
+        phase, but not the time spent processing the items.
+        """
+        it = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+            yield item
+
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + n
+
+
+    def merge(self, data: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Add the totals of another collector, as returned by :meth:`as_dict`.
+        """
+        for name, seconds in data.get("phases", {}).items():
+            self.times[name] = self.times.get(name, 0.0) + seconds
+        for name, n in data.get("counts", {}).items():
+            self.count(name, n)
+
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns all totals as a JSON-serializable dictionary:
+        ``{"phases": {name: seconds}, "counts": {name: count}}``
+        """
+        return {
+            "phases": dict(sorted(self.times.items())),
+            "counts": dict(sorted(self.counts.items())),
+        }
+
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, indent=2)
+            f.write("\n")
+
+
+def phase(metrics: Optional[Metrics], name: str) -> ContextManager[None]:
+    """
+    Same as :meth:`Metrics.phase`, but does nothing if metrics is None.
+    """
+    if metrics is None:
+        return contextlib.nullcontext()
+    return metrics.phase(name)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """
+    Decorator for methods of an object with a ``metrics`` attribute.
+    Attributes the time spent in the method to a phase, if metrics are being
+    collected.
+    """
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            if self.metrics is None:
+                return func(self, *args, **kwargs)
+            with self.metrics.phase(name):
+                return func(self, *args, **kwargs)
+        return wrapper # type: ignore
+    return decorator
+
+
+class TimedWriter:
+    """
+    Wraps a text file so that the time spent writing to it is attributed to
+    a phase.
+    """
+    def __init__(self, f: TextIO, metrics: Metrics, name: str) -> None:
+        self.f = f
+        self.metrics = metrics
+        self.name = name
+
+    def write(self, text: str) -> int:
+        with self.metrics.phase(self.name):
+            return self.f.write(text)
@@ -0,0 +1,112 @@
+from typing import Callable, Sequence, Iterator, TypeVar, Any, List, Tuple, Optional
+import multiprocessing
+
+from systemrdl.messages import MessagePrinter, MessageHandler, Severity, SourceRefBase
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# State that is shared with forked worker processes.
+# The SystemRDL register model cannot be pickled, so instead of sending it to
+# the workers, they inherit it from the parent process when they are forked.
+_worker_state = None # type: Any
+
+
+def fork_available() -> bool:
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def in_worker() -> bool:
+    """
+    Returns True if called from within a pool's worker process, which cannot
+    start a pool of its own.
+    """
+    return multiprocessing.current_process().daemon
+
+
+def get_worker_state() -> Any:
+    """
+    Returns the ``state`` object that was passed to :func:`imap_forked`.
+    Only valid while called from within a task.
+    """
+    return _worker_state
+
+
+def imap_forked(func: Callable[[T], R], items: Sequence[T], jobs: int, state: Any = None, max_tasks_per_child: Optional[int] = None) -> Iterator[R]:
+    """
+    Map ``func`` over ``items`` using a pool of ``jobs`` forked worker processes.
+
+    Results are yielded in the same order as ``items``.
+    Both ``items`` and the results must be picklable, whereas ``state`` is
+    inherited by the workers as-is, and can be retrieved using
+    :func:`get_worker_state`.
+
+    If ``max_tasks_per_child`` is set, each worker process is replaced by a
+    fresh fork of the parent after completing that many tasks. This bounds the
+    memory held by long-lived workers when running many large tasks.
+
+    If only one job is requested, if the platform is unable to fork, or if
+    already running inside a worker process, all tasks are run serially in the
+    current process instead.
+    """
+    global _worker_state # pylint: disable=global-statement
+
+    prev_state = _worker_state
+    _worker_state = state
+    try:
+        if jobs <= 1 or len(items) <= 1 or not fork_available() or in_worker():
+            for item in items:
+                yield func(item)
+            return
+
+        ctx = multiprocessing.get_context("fork")
+        with ctx.Pool(min(jobs, len(items)), maxtasksperchild=max_tasks_per_child) as pool:
+            yield from pool.imap(func, items)
+    finally:
+        _worker_state = prev_state
+
+
+#: A compiler message that was recorded for later: (severity, text, src_ref)
+RecordedMessage = Tuple[Severity, str, Optional[SourceRefBase]]
+
+class MessageRecorder(MessagePrinter):
+    """
+    Message printer that records messages rather than printing them.
+
+    Work that is done in a worker process cannot report messages through the
+    compiler's message handler directly. Instead, messages are recorded and
+    then replayed by the parent process using :func:`replay_messages`.
+    """
+    def __init__(self, keep_src_refs: bool = False) -> None:
+        """
+        Parameters
+        ----------
+        keep_src_refs: bool
+            If True, the source reference of each message is recorded as
+            well. It must be picklable in order to be returned from a worker.
+            Otherwise, messages are replayed using the source reference that
+            is passed to :func:`replay_messages`.
+        """
+        self.keep_src_refs = keep_src_refs
+        self.messages = [] # type: List[RecordedMessage]
+
+    def print_message(self, severity: Severity, text: str, src_ref: Optional[SourceRefBase]) -> None:
+        if not self.keep_src_refs:
+            src_ref = None
+        self.messages.append((severity, text, src_ref))
+
+    def create_handler(self) -> MessageHandler:
+        return MessageHandler(self, Severity.DEBUG)
+
+
+def replay_messages(msg: MessageHandler, messages: Sequence[RecordedMessage], src_ref: Optional[SourceRefBase] = None) -> None:
+    """
+    Emit previously recorded messages. Raises RDLCompileError if any of them
+    were fatal.
+
+    Messages that were recorded without a source reference use ``src_ref``.
+    """
+    for severity, text, message_src_ref in messages:
+        if message_src_ref is None:
+            message_src_ref = src_ref
+        msg.message(severity, text, message_src_ref)
@@ -0,0 +1,145 @@
+from typing import Any, Dict, List, Union, TYPE_CHECKING
+import abc
+import json
+
+from systemrdl.node import AddressableNode, AddrmapNode, MemNode, RegNode, FieldNode
+
+from .exporter import Standard
+from . import compression
+
+if TYPE_CHECKING:
+    from .exporter import IPXACTExporter
+    from .snapshot import SnapshotCache
+
+
+class ExportSink(abc.ABC):
+    """
+    Base class of an output of :meth:`IPXACTExporter.export_multi`.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Parameters
+        ----------
+        path: str
+            Path of the output file.
+        """
+        self.path = path
+
+    @abc.abstractmethod
+    def write(self, exporter: 'IPXACTExporter', node: Union[AddrmapNode, MemNode], component_name: str, snapshots: 'SnapshotCache') -> None:
+        """
+        Write the output.
+
+        Parameters
+        ----------
+        exporter: IPXACTExporter
+            Exporter whose settings apply.
+        node: AddrmapNode
+            Top-level node to export.
+        component_name: str
+            IP-XACT component name.
+        snapshots: SnapshotCache
+            Snapshots of nodes that are shared by all outputs. Use these to
+            look up properties and children of nodes.
+        """
+
+
+class XMLSink(ExportSink):
+    """
+    Writes an IP-XACT XML file of a given standard.
+    """
+
+    def __init__(self, path: str, standard: Standard = Standard.IEEE_1685_2014) -> None:
+        """
+        Parameters
+        ----------
+        path: str
+            Path of the XML file. May select compression.
+        standard: :class:`Standard`
+            IP-XACT standard to emit.
+        """
+        super().__init__(path)
+        self.standard = standard
+
+    def write(self, exporter: 'IPXACTExporter', node: Union[AddrmapNode, MemNode], component_name: str, snapshots: 'SnapshotCache') -> None:
+        exporter.for_standard(self.standard, snapshots).export(node, self.path, component_name=component_name)
+
+
+class JSONSummarySink(ExportSink):
+    """
+    Writes a JSON summary of the address map: the absolute address and size
+    of every block, register file and register, and the bit range and access
+    of every field.
+
+    Arrays are not unrolled. They list their dimensions and stride, and the
+    address of their first element. Addresses within arrays assume that each
+    enclosing array is at index 0.
+
+    Like IP-XACT 2014, elements that are not present are included, marked
+    with ``"ispresent": false``.
+    """
+
+    def write(self, exporter: 'IPXACTExporter', node: Union[AddrmapNode, MemNode], component_name: str, snapshots: 'SnapshotCache') -> None:
+        snapshots = snapshots.view(False)
+        if isinstance(node, MemNode):
+            blocks = [self.summarize(snapshots, node)]
+        else:
+            blocks = [self.summarize(snapshots, child) for child in self.get_children(snapshots, node)]
+        summary = {
+            "vendor": exporter.vendor,
+            "library": exporter.library,
+            "name": component_name,
+            "version": exporter.version,
+            "blocks": blocks,
+        }
+
+        with compression.open_text(self.path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+            f.write("\n")
+
+    def get_children(self, snapshots: 'SnapshotCache', node: AddressableNode) -> List[AddressableNode]:
+        return [
+            child for child in snapshots.get(node).children()
+            if isinstance(child, AddressableNode)
+        ]
+
+    def summarize(self, snapshots: 'SnapshotCache', node: AddressableNode) -> Dict[str, Any]:
+        snap = snapshots.get(node)
+        d = {
+            "name": node.inst_name,
+            "path": node.get_path(),
+            "type": type(node.inst).__name__.lower(),
+            "address": node.raw_absolute_address,
+            "size": node.total_size,
+        } # type: Dict[str, Any]
+        if not snap.get_property("ispresent"):
+            d["ispresent"] = False
+        if node.is_array:
+            d["dimensions"] = node.array_dimensions
+            d["stride"] = node.array_stride
+
+        if isinstance(node, RegNode):
+            d["width"] = snap.get_property("regwidth")
+            d["fields"] = [
+                self.summarize_field(snapshots, child) for child in snap.children()
+                if isinstance(child, FieldNode)
+            ]
+        elif not isinstance(node, MemNode):
+            d["children"] = [self.summarize(snapshots, child) for child in self.get_children(snapshots, node)]
+        return d
+
+    def summarize_field(self, snapshots: 'SnapshotCache', node: FieldNode) -> Dict[str, Any]:
+        snap = snapshots.get(node)
+        d = {
+            "name": node.inst_name,
+            "lsb": node.lsb,
+            "msb": node.msb,
+            "sw": snap.get_property("sw").name,
+        } # type: Dict[str, Any]
+        reset = snap.get_property("reset")
+        if isinstance(reset, int):
+            d["reset"] = reset
+        if not snap.get_property("ispresent"):
+            d["ispresent"] = False
+        return d
@@ -0,0 +1,125 @@
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from systemrdl import component as comp
+from systemrdl.node import Node
+from systemrdl.rdltypes.references import PropertyReference
+
+
+class NodeSnapshot:
+    """
+    Resolves a node's properties and children on first use, and retains them
+    so that each is only looked up once per export.
+
+    Obtain snapshots from a :class:`SnapshotCache` so that resolved property
+    values are shared by every node of the same component instance, such as
+    the elements of an array.
+    """
+    __slots__ = ("node", "_properties", "_children", "_skip_not_present", "_cache")
+
+    def __init__(self, node: Node, properties: Dict[Hashable, Any], skip_not_present: bool, cache: Optional['SnapshotCache'] = None) -> None:
+        self.node = node
+        self._properties = properties
+        self._children = None # type: Optional[List[Node]]
+        self._skip_not_present = skip_not_present
+
+        # Cache that shares node snapshots, if any
+        self._cache = cache
+
+
+    def get_property(self, prop_name: str, **kwargs: Any) -> Any:
+        """
+        Same as :meth:`systemrdl.node.Node.get_property`
+        """
+        if kwargs:
+            key = (prop_name, tuple(sorted(kwargs.items()))) # type: Hashable
+        else:
+            key = prop_name
+
+        try:
+            return self._properties[key]
+        except KeyError:
+            pass
+
+        value = self.node.get_property(prop_name, **kwargs)
+
+        # References resolve relative to the node's position in the hierarchy,
+        # so they cannot be shared with other nodes of the same instance.
+        if not isinstance(value, (Node, PropertyReference)):
+            self._properties[key] = value
+        return value
+
+
+    def children(self) -> List[Node]:
+        """
+        Children of the node, excluding ones that are not present if the
+        snapshot was created to skip them.
+        """
+        if self._children is None:
+            if self._cache is not None and self._skip_not_present:
+                # Filter the shared list of all children, so that the same
+                # child nodes are visited regardless of skip_not_present
+                self._children = [
+                    child for child in self._cache.get(self.node, False).children()
+                    if self._cache.get(child, False).get_property("ispresent")
+                ]
+            else:
+                self._children = list(self.node.children(skip_not_present=self._skip_not_present))
+        return self._children
+
+
+class SnapshotCache:
+    """
+    Creates node snapshots, sharing resolved properties between all nodes of
+    the same component instance.
+
+    If ``share_nodes`` is set, each node's snapshot is also retained, along
+    with its children. Visiting the same child nodes again, for example to
+    export the same design several times, then reuses all of their
+    snapshots. This retains the entire traversed hierarchy in memory.
+    """
+
+    def __init__(self, skip_not_present: bool, share_nodes: bool = False) -> None:
+        self.skip_not_present = skip_not_present
+        self.share_nodes = share_nodes
+
+        # Resolved properties, keyed by id() of the component instance.
+        # The instance is retained so that its id() is not reused.
+        self._properties = {} # type: Dict[int, Tuple[comp.Component, Dict[Hashable, Any]]]
+
+        # Retained snapshots, keyed by id() of the node and skip_not_present.
+        # The snapshot retains its node so that its id() is not reused.
+        self._snapshots = {} # type: Dict[Tuple[int, bool], NodeSnapshot]
+
+
+    def view(self, skip_not_present: bool) -> 'SnapshotCache':
+        """
+        Returns a cache that shares everything resolved by this one, but that
+        may differ in whether children that are not present are skipped.
+        """
+        cache = SnapshotCache(skip_not_present, self.share_nodes)
+        cache._properties = self._properties
+        cache._snapshots = self._snapshots
+        return cache
+
+
+    def get(self, node: Node, skip_not_present: Optional[bool] = None) -> NodeSnapshot:
+        if skip_not_present is None:
+            skip_not_present = self.skip_not_present
+
+        if self.share_nodes:
+            key = (id(node), skip_not_present)
+            snap = self._snapshots.get(key, None)
+            if snap is None:
+                snap = NodeSnapshot(node, self._get_properties(node), skip_not_present, self)
+                self._snapshots[key] = snap
+            return snap
+
+        return NodeSnapshot(node, self._get_properties(node), skip_not_present)
+
+
+    def _get_properties(self, node: Node) -> Dict[Hashable, Any]:
+        entry = self._properties.get(id(node.inst), None)
+        if entry is None:
+            entry = (node.inst, {})
+            self._properties[id(node.inst)] = entry
+        return entry[1]
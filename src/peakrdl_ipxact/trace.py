@@ -0,0 +1,182 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+from systemrdl.node import Node
+
+from .importer import IPXACTImporter
+from .exporter import IPXACTExporter
+
+#: Describes the element that a traced method call operates on: (kind, name)
+Describe = Callable[..., Tuple[str, Optional[str]]]
+
+
+class Tracer:
+    """
+    Records a timeline of import or export operations in the Trace Event
+    Format, which can be viewed using `Perfetto <https://ui.perfetto.dev>`_ or
+    ``chrome://tracing``.
+
+    Tracing is opt-in. Importers and exporters are not affected at all unless
+    they are attached to a tracer using :meth:`attach`.
+
+    Events are appended to the output file as they are recorded. Worker
+    processes that were forked while the tracer was open write to the same
+    file, and appear as separate processes in the timeline.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Parameters
+        ----------
+        path: str
+            Path of the JSON trace file to write.
+        """
+        self.path = path
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_APPEND, 0o666)
+        self._owner_pid = os.getpid()
+        self._write("[\n")
+
+        # Enclosing spans of the current process: (kind, name)
+        self._stack = [] # type: List[Tuple[str, Optional[str]]]
+
+
+    def __enter__(self) -> 'Tracer':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+    def close(self) -> None:
+        """
+        Finish the trace file.
+        """
+        if self._fd < 0:
+            return
+        if os.getpid() == self._owner_pid:
+            # End with an event that does not need a trailing comma
+            self._write(json.dumps({
+                "name": "process_name", "ph": "M", "pid": os.getpid(),
+                "args": {"name": "peakrdl-ipxact"},
+            }) + "\n]\n")
+            os.close(self._fd)
+        self._fd = -1
+
+
+    def _write(self, text: str) -> None:
+        # Each event is written using a single system call. The file is opened
+        # in append mode, so events of several processes do not get mixed up.
+        os.write(self._fd, text.encode("utf-8"))
+
+
+    @contextlib.contextmanager
+    def span(self, label: str, kind: str, name: Optional[str], path: Optional[str] = None) -> Iterator[None]:
+        """
+        Record the time spent within the context as a span.
+
+        Parameters
+        ----------
+        label: str
+            Name of the span, such as the method being traced.
+        kind: str
+            Kind of element that is being processed.
+        name: str
+            Name of the element.
+        path: str
+            Hierarchical path of the element. If omitted, the path is derived
+            from the names of the enclosing spans.
+        """
+        if path is None:
+            segments = []
+            prev = None # type: Optional[Tuple[str, Optional[str]]]
+            for entry in self._stack + [(kind, name)]:
+                # Several spans can process the same element in turn
+                if entry != prev:
+                    segments.append(entry[1] or "?")
+                prev = entry
+            path = ".".join(segments)
+
+        self._stack.append((kind, name))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self._stack.pop()
+            self._write(json.dumps({
+                "name": label,
+                "cat": kind,
+                "ph": "X",
+                "ts": start * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": {"name": name, "path": path},
+            }) + ",\n")
+
+
+    def instrument(self, obj: Any, method_name: str, describe: Describe) -> None:
+        """
+        Wrap a method of an object so that each of its calls is recorded as a
+        span.
+
+        ``describe`` is called with the method's arguments, and returns the
+        kind and name of the element being processed.
+        """
+        method = getattr(obj, method_name)
+
+        @functools.wraps(method)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            kind, name = describe(*args, **kwargs)
+            path = None
+            if args and isinstance(args[-1], Node):
+                path = args[-1].get_path()
+            with self.span(method_name, kind, name, path):
+                return method(*args, **kwargs)
+
+        setattr(obj, method_name, wrapper)
+
+
+    def attach(self, obj: Union[IPXACTImporter, IPXACTExporter]) -> None:
+        """
+        Trace the processing of addressBlocks, registerFiles and registers by
+        an importer or exporter.
+        """
+        if isinstance(obj, IPXACTImporter):
+            for method_name, describe in _get_importer_methods(obj).items():
+                self.instrument(obj, method_name, describe)
+        elif isinstance(obj, IPXACTExporter):
+            for kind in ("addressBlock", "registerFile", "register"):
+                self.instrument(obj, "add_" + kind, _describe_node(kind))
+        else:
+            raise TypeError("Cannot trace object of type '%s'" % type(obj).__name__)
+
+
+def _get_importer_methods(importer: IPXACTImporter) -> Dict[str, Describe]:
+    def describe_element(kind: str) -> Describe:
+        def describe(el: Any, *_args: Any, **_kwargs: Any) -> Tuple[str, Optional[str]]:
+            return kind, importer.get_sanitized_element_name(el)
+        return describe
+
+    def describe_record(kind: str) -> Describe:
+        def describe(d: Dict[str, Any], *_args: Any, **_kwargs: Any) -> Tuple[str, Optional[str]]:
+            return kind, d.get('name', None)
+        return describe
+
+    methods = {} # type: Dict[str, Describe]
+    for kind in ("addressBlock", "registerFile", "register"):
+        methods["parse_" + kind] = describe_element(kind)
+        methods["decode_" + kind] = describe_element(kind)
+        methods["build_" + kind] = describe_record(kind)
+    return methods
+
+
+def _describe_node(kind: str) -> Describe:
+    def describe(_parent: Any, node: Node) -> Tuple[str, Optional[str]]:
+        return kind, node.inst_name
+    return describe
@@ -0,0 +1,129 @@
+from typing import Optional, Any, BinaryIO, Iterator, Tuple
+from xml.etree import ElementTree
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+#: Names of the supported XML parser backends
+BACKENDS = ("lxml", "etree")
+
+
+def get_backend(name: Optional[str] = None) -> str:
+    """
+    Returns the name of the XML parser backend to use.
+
+    If no name is given, lxml is used if it is installed, since its C parser
+    is considerably faster. Otherwise, the standard library's
+    :mod:`xml.etree.ElementTree` is used. Both produce identical import results.
+    """
+    if name is None:
+        if lxml_etree is not None:
+            return "lxml"
+        return "etree"
+    if name not in BACKENDS:
+        raise ValueError(
+            "Unknown XML backend '%s'. Expected one of: %s" % (name, ", ".join(BACKENDS))
+        )
+    if name == "lxml" and lxml_etree is None:
+        raise ImportError(
+            "The 'lxml' XML backend requires the 'lxml' package. "
+            "Install it using: pip install peakrdl-ipxact[lxml]"
+        )
+    return name
+
+
+def _lxml_options() -> Any:
+    # Comments and processing instructions are dropped, so that the tree only
+    # contains elements, like the standard library's parser produces.
+    # Like in the standard library, entities that are defined in the
+    # document's internal DTD subset are expanded, but external entities are
+    # never loaded.
+    if lxml_etree.LXML_VERSION >= (5,):
+        resolve_entities = "internal" # type: Any
+    else:
+        # Older versions can only expand all or no entities. External ones
+        # are blocked by a resolver instead.
+        resolve_entities = True
+    return {
+        "remove_comments": True,
+        "remove_pis": True,
+        "resolve_entities": resolve_entities,
+        "no_network": True,
+        "huge_tree": True,
+    }
+
+
+def _block_external_entities(parser: Any) -> Any:
+    if lxml_etree.LXML_VERSION >= (5,):
+        return parser
+
+    class NoExternalEntities(lxml_etree.Resolver):
+        # Replaces every external resource with an empty document
+        def resolve(self, system_url: str, public_id: str, context: Any) -> Any:
+            #pylint: disable=unused-argument
+            return self.resolve_string("", context)
+
+    parser.resolvers.add(NoExternalEntities())
+    return parser
+
+
+def parse(f: BinaryIO, backend: str) -> 'ElementTree.ElementTree[ElementTree.Element]':
+    """
+    Parse a complete document from a binary file object
+    """
+    if backend == "lxml":
+        parser = _block_external_entities(lxml_etree.XMLParser(**_lxml_options()))
+        return lxml_etree.parse(f, parser)
+    return ElementTree.parse(f)
+
+
+def iterparse(f: BinaryIO, backend: str) -> Iterator[Tuple[str, ElementTree.Element]]:
+    """
+    Incrementally parse a document from a binary file object.
+    Yields start and end events of elements.
+    """
+    if backend == "lxml":
+        parser = _block_external_entities(lxml_etree.iterparse(f, events=("start", "end"), **_lxml_options()))
+        return iter(parser)
+    return ElementTree.iterparse(f, events=("start", "end"))
+
+
+def to_etree(el: ElementTree.Element) -> ElementTree.Element:
+    """
+    Returns a standard library :mod:`xml.etree.ElementTree` copy of an lxml
+    element. Elements of the standard library are returned as-is.
+
+    Unlike those of lxml, standard library elements can be pickled, and they
+    are what user-provided hooks expect, regardless of the backend.
+    """
+    if lxml_etree is None or not isinstance(el, lxml_etree._Element): # pylint: disable=protected-access
+        return el
+    return ElementTree.fromstring(lxml_etree.tostring(el, with_tail=False))
+
+
+def sniff_root_tag(f: BinaryIO, max_size: int, chunk_size: int = 16384) -> Optional[str]:
+    """
+    Incrementally parse the start of a document, up to the start tag of its
+    root element. The XML declaration, comments, processing instructions
+    and a DOCTYPE may precede it.
+
+    Returns the root element's tag, including its namespace. None if the
+    document is not well-formed XML, or its root element does not start
+    within the first ``max_size`` bytes.
+    """
+    parser = ElementTree.XMLPullParser(events=("start",)) # type: Any
+    n_read = 0
+    try:
+        while n_read < max_size:
+            chunk = f.read(min(chunk_size, max_size - n_read))
+            if not chunk:
+                break
+            n_read += len(chunk)
+            parser.feed(chunk)
+            for _, el in parser.read_events():
+                return el.tag
+    except ElementTree.ParseError:
+        pass
+    return None
@@ -0,0 +1,149 @@
+from typing import TextIO, Union
+import io
+
+from xml.dom import minidom
+
+#: Complete nodes that can be written out directly
+LeafNode = Union[minidom.Element, minidom.Comment]
+
+class XMLStreamWriter:
+    """
+    Incrementally writes an XML document to a file.
+
+    Output is byte-identical to building the equivalent document with
+    :mod:`xml.dom.minidom` and serializing it with ``writexml()``, since all
+    text and attribute content is still rendered by minidom itself.
+    Only the structural elements that enclose large amounts of content are
+    replaced by write-through :class:`StreamElement` objects.
+    """
+
+    def __init__(self, f: TextIO, doc: minidom.Document, addindent: str, newl: str) -> None:
+        self.f = f
+
+        #: Document used as a factory for any leaf nodes
+        self.doc = doc
+
+        self.addindent = addindent
+        self.newl = newl
+
+    def write_declaration(self, encoding: str) -> None:
+        # An empty document serializes to nothing but the XML declaration
+        minidom.Document().writexml(self.f, newl=self.newl, encoding=encoding)
+
+    def write_node(self, node: LeafNode, indent: str) -> None:
+        node.writexml(self.f, indent, self.addindent, self.newl)
+
+    def create_root_element(self, tagName: str) -> 'StreamElement':
+        return StreamElement(self, tagName)
+
+    def create_fragment(self, indent: str) -> 'StreamFragment':
+        return StreamFragment(self, indent)
+
+
+class StreamElement:
+    """
+    Write-through stand-in for a :class:`minidom.Element`.
+
+    Any child that is appended is written out immediately. Children can either
+    be complete minidom elements, or other :class:`StreamElement` objects which
+    shall be closed before their next sibling is appended.
+
+    Text content is not supported since minidom writes a lone text child
+    inline, which cannot be known until the element is complete.
+
+    The element's start tag is held back until its first child arrives so that
+    childless elements are written as ``<tag/>``, exactly like minidom does.
+    """
+
+    def __init__(self, writer: XMLStreamWriter, tagName: str) -> None:
+        self.writer = writer
+        self.tagName = tagName
+
+        #: Indentation of this element. Assigned once appended to its parent
+        self.indent = ""
+
+        # Childless element that holds the tag name and attributes
+        self._shell = writer.doc.createElement(tagName)
+
+        self._started = False
+        self._closed = False
+
+    def setAttribute(self, attname: str, value: str) -> None:
+        if self._started:
+            raise RuntimeError("Cannot set attributes of <%s> after its contents were written" % self.tagName)
+        self._shell.setAttribute(attname, value)
+
+    def hasChildNodes(self) -> bool:
+        return self._started
+
+    def appendChild(self, node: Union[LeafNode, 'StreamElement']) -> Union[LeafNode, 'StreamElement']:
+        if self._closed:
+            raise RuntimeError("Cannot append to <%s> after it was closed" % self.tagName)
+
+        if isinstance(node, StreamElement):
+            self._start()
+            node.indent = self.indent + self.writer.addindent
+            return node
+
+        self._start()
+        self.writer.write_node(node, self.indent + self.writer.addindent)
+        return node
+
+    def append_raw(self, text: str) -> None:
+        """
+        Append text that was already serialized at this element's child
+        indentation level.
+        """
+        self._start()
+        self.writer.f.write(text)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+
+        if self._started:
+            self.writer.f.write("%s</%s>%s" % (self.indent, self.tagName, self.writer.newl))
+        else:
+            self.writer.write_node(self._shell, self.indent)
+
+    def _start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+
+        # Let minidom render the start tag and attributes of the empty shell
+        # element, then re-open it: '<tag attr="x"/>' --> '<tag attr="x">'
+        buf = io.StringIO()
+        self._shell.writexml(buf, self.indent, "", "")
+        self.writer.f.write(buf.getvalue()[:-2] + ">" + self.writer.newl)
+
+
+class StreamFragment(StreamElement):
+    """
+    Detached parent that only writes out its children, as if they were appended
+    to an element at the given indentation level.
+
+    Used to serialize portions of a document separately so that they can be
+    stitched into the final document later using
+    :meth:`StreamElement.append_raw`.
+    """
+
+    def __init__(self, writer: XMLStreamWriter, indent: str) -> None:
+        super().__init__(writer, "")
+        self.indent = indent
+        self._started = True
+
+    def close(self) -> None:
+        self._closed = True
+
+
+#: Any element that the exporter can append children to
+ParentElement = Union[minidom.Element, StreamElement]
+
+def close_element(el: ParentElement) -> None:
+    """
+    Finish writing a streamed element. No-op for regular DOM elements.
+    """
+    if isinstance(el, StreamElement):
+        el.close()
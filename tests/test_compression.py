@@ -0,0 +1,83 @@
+import os
+import gzip
+import unittest
+
+from peakrdl_ipxact import IPXACTExporter
+
+from .unittest_utils import IPXACTTestCase
+
+try:
+    import zstandard # pylint: disable=unused-import
+except ImportError:
+    HAS_ZSTD = False
+else:
+    HAS_ZSTD = True
+
+try:
+    from peakrdl_ipxact.__peakrdl__ import Importer
+except ImportError:
+    HAS_CLI = False
+else:
+    HAS_CLI = True
+
+class TestCompression(IPXACTTestCase):
+
+    def get_sources(self):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        return [
+            os.path.join(this_dir, "test_sources/accellera-generic_example.rdl"),
+            os.path.join(this_dir, "test_sources/nested.rdl"),
+        ]
+
+    def check_roundtrip(self, ext, **exporter_kwargs):
+        top = self.compile(self.get_sources())
+        ref_path = "%s.xml" % self.request.node.name
+        dut_path = "%s.xml%s" % (self.request.node.name, ext)
+
+        IPXACTExporter().export(top, ref_path, component_name="my_thing")
+        IPXACTExporter(**exporter_kwargs).export(top, dut_path, component_name="my_thing")
+
+        a = self.compile([ref_path], "my_thing__top")
+        b = self.compile([dut_path], "my_thing__top")
+        self.assert_equivalent(a, b)
+        b = self.compile([dut_path], "my_thing__top", streaming=True)
+        self.assert_equivalent(a, b)
+        return ref_path, dut_path
+
+    def test_gzip(self):
+        ref_path, dut_path = self.check_roundtrip(".gz")
+        with open(ref_path, "rb") as f:
+            ref = f.read()
+        with gzip.open(dut_path, "rb") as f:
+            self.assertEqual(f.read(), ref)
+
+        # Output is reproducible
+        with open(dut_path, "rb") as f:
+            first = f.read()
+        self.check_roundtrip(".gz", streaming=True)
+        with open(dut_path, "rb") as f:
+            self.assertEqual(f.read(), first)
+
+    def test_xz(self):
+        self.check_roundtrip(".xz")
+
+    @unittest.skipUnless(HAS_ZSTD, "zstandard is not installed")
+    def test_zstd(self):
+        self.check_roundtrip(".zst")
+
+    def test_incremental(self):
+        self.check_roundtrip(".gz", incremental=True)
+        dut_path = "%s.xml.gz" % self.request.node.name
+        os.utime(dut_path, (0, 0))
+        self.check_roundtrip(".gz", incremental=True)
+        self.assertEqual(os.stat(dut_path).st_mtime, 0)
+
+    @unittest.skipUnless(HAS_CLI, "peakrdl-cli is not installed")
+    def test_is_compatible(self):
+        _, dut_path = self.check_roundtrip(".gz")
+        self.assertTrue(Importer().is_compatible(dut_path))
+
+        path = "%s.tar.gz" % self.request.node.name
+        with gzip.open(path, "wb") as f:
+            f.write(b"<ipxact:component>")
+        self.assertFalse(Importer().is_compatible(path))
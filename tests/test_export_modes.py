@@ -0,0 +1,335 @@
+import os
+import json
+from unittest import mock
+from xml.dom import minidom
+
+from systemrdl import RDLCompiler, RDLCompileError
+from systemrdl.messages import MessagePrinter
+from systemrdl.node import AddrmapNode, MemNode
+from peakrdl_ipxact import IPXACTExporter, ExportSink, XMLSink, JSONSummarySink
+from peakrdl_ipxact.exporter import Standard
+from peakrdl_ipxact import manifest
+
+from .unittest_utils import IPXACTTestCase
+
+class RecordingPrinter(MessagePrinter):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def print_message(self, severity, text, src_ref):
+        self.messages.append((severity, text, src_ref.line if src_ref else None))
+
+
+class TestExportModes(IPXACTTestCase):
+
+    def get_sources(self):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        return [
+            os.path.join(this_dir, "test_sources/accellera-generic_example.rdl"),
+            os.path.join(this_dir, "test_sources/nested.rdl"),
+        ]
+
+    def get_repeated_sources(self):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        return [
+            os.path.join(this_dir, "test_sources/repeated.rdl"),
+        ]
+
+    def get_sharded_sources(self):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        return [
+            os.path.join(this_dir, "test_sources/sharded.rdl"),
+        ]
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def check_identical(self, std, sources=None, **kwargs):
+        top = self.compile(sources or self.get_sources())
+        ref_path = "%s_ref.xml" % self.request.node.name
+        dut_path = "%s.xml" % self.request.node.name
+
+        IPXACTExporter(standard=std).export(top, ref_path, component_name="my_thing")
+        IPXACTExporter(standard=std, **kwargs).export(top, dut_path, component_name="my_thing")
+
+        self.assertEqual(self.read(ref_path), self.read(dut_path))
+
+    def test_streaming_2014(self):
+        self.check_identical(Standard.IEEE_1685_2014, streaming=True)
+
+    def test_streaming_2009(self):
+        self.check_identical(Standard.IEEE_1685_2009, streaming=True)
+
+    def test_parallel_2014(self):
+        self.check_identical(Standard.IEEE_1685_2014, jobs=2)
+
+    def test_parallel_2009(self):
+        self.check_identical(Standard.IEEE_1685_2009, jobs=2)
+
+    def export_messages(self, **kwargs):
+        # Export a design that results in warnings and a fatal error, and
+        # return the reported messages
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        printer = RecordingPrinter()
+        rdlc = RDLCompiler(message_printer=printer)
+        rdlc.compile_file(os.path.join(this_dir, "test_sources/messages.rdl"))
+        root = rdlc.elaborate()
+        with self.assertRaises(RDLCompileError):
+            IPXACTExporter(**kwargs).export(root, "%s.xml" % self.request.node.name)
+        return printer.messages
+
+    def test_parallel_messages(self):
+        serial = self.export_messages()
+        self.assertEqual([line for _, _, line in serial], [12, 21, 25])
+        for _ in range(3):
+            self.assertEqual(self.export_messages(jobs=4), serial)
+
+    def batch_messages(self, jobs):
+        # Export each block of the design as a separate component, and return
+        # the reported messages
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        printer = RecordingPrinter()
+        rdlc = RDLCompiler(message_printer=printer)
+        rdlc.compile_file(os.path.join(this_dir, "test_sources/messages.rdl"))
+        nodes = list(rdlc.elaborate().top.children())
+        paths = ["%s_%s.xml" % (self.request.node.name, node.inst_name) for node in nodes]
+        with self.assertRaises(RDLCompileError):
+            IPXACTExporter().export_batch(nodes, paths, jobs=jobs)
+        return printer.messages
+
+    def test_batch_messages(self):
+        serial = self.batch_messages(jobs=1)
+        self.assertEqual([line for _, _, line in serial], [12, 21, 25])
+        for _ in range(3):
+            self.assertEqual(self.batch_messages(jobs=2), serial)
+
+    def test_cache_fragments(self):
+        for std in (Standard.IEEE_1685_2009, Standard.IEEE_1685_2014):
+            for sources in (self.get_sources(), self.get_repeated_sources()):
+                with self.subTest(std=std, sources=sources):
+                    self.check_identical(std, sources, cache_fragments=True)
+                    self.check_identical(std, sources, cache_fragments=True, streaming=True)
+
+    def test_incremental(self):
+        top = self.compile(self.get_sources())
+        ref_path = "%s_ref.xml" % self.request.node.name
+        dut_path = "%s.xml" % self.request.node.name
+        manifest_path = dut_path + ".manifest"
+        for path in (dut_path, manifest_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+        IPXACTExporter().export(top, ref_path, component_name="my_thing")
+        IPXACTExporter(incremental=True).export(top, dut_path, component_name="my_thing")
+        self.assertEqual(self.read(ref_path), self.read(dut_path))
+        self.assertTrue(os.path.exists(manifest_path))
+
+        # Unchanged. Output is not touched
+        os.utime(dut_path, (0, 0))
+        IPXACTExporter(incremental=True).export(top, dut_path, component_name="my_thing")
+        self.assertEqual(os.stat(dut_path).st_mtime, 0)
+
+        # Different settings produce the same output, so the file is still
+        # not rewritten
+        IPXACTExporter(incremental=True, streaming=True).export(top, dut_path, component_name="my_thing")
+        self.assertEqual(os.stat(dut_path).st_mtime, 0)
+
+        # Different settings that change the output
+        IPXACTExporter(incremental=True).export(top, dut_path, component_name="other_thing")
+        self.assertNotEqual(self.read(ref_path), self.read(dut_path))
+
+        # Output was modified by someone else
+        IPXACTExporter(incremental=True).export(top, dut_path, component_name="my_thing")
+        with open(dut_path, "ab") as f:
+            f.write(b"\n")
+        IPXACTExporter(incremental=True).export(top, dut_path, component_name="my_thing")
+        self.assertEqual(self.read(ref_path), self.read(dut_path))
+
+        # Model changed
+        top2 = self.compile(self.get_repeated_sources())
+        IPXACTExporter(incremental=True).export(top2, dut_path, component_name="my_thing")
+        self.assertNotEqual(self.read(ref_path), self.read(dut_path))
+
+    def test_incremental_no_read(self):
+        top = self.compile(self.get_sources())
+        dut_path = "%s.xml" % self.request.node.name
+        IPXACTExporter(incremental=True).export(top, dut_path, component_name="my_thing")
+
+        # The output was written too recently for its timestamp to be trusted,
+        # and a different timestamp is not trusted either. In both cases, its
+        # digest is checked and the manifest updated.
+        os.utime(dut_path, (0, 0))
+        with mock.patch.object(manifest, "file_digest", wraps=manifest.file_digest) as file_digest:
+            IPXACTExporter(incremental=True).export(top, dut_path, component_name="my_thing")
+            file_digest.assert_called_once_with(dut_path)
+
+        # Unchanged size and modification time. The output is not read.
+        with mock.patch.object(manifest, "file_digest", wraps=manifest.file_digest) as file_digest:
+            IPXACTExporter(incremental=True).export(top, dut_path, component_name="my_thing")
+            file_digest.assert_not_called()
+        self.assertEqual(os.stat(dut_path).st_mtime, 0)
+
+        # Modified contents are detected by their size, even if the
+        # modification time is restored
+        with open(dut_path, "ab") as f:
+            f.write(b"\n")
+        os.utime(dut_path, (0, 0))
+        IPXACTExporter(incremental=True).export(top, dut_path, component_name="my_thing")
+        self.assertNotEqual(os.stat(dut_path).st_mtime, 0)
+
+    def test_batch(self):
+        top = self.compile(self.get_sources())
+        nodes = [
+            child for child in top.top.children()
+            if isinstance(child, (AddrmapNode, MemNode))
+        ]
+        names = [node.inst_name for node in nodes]
+        ref_paths = ["%s_%s_ref.xml" % (self.request.node.name, name) for name in names]
+        dut_paths = ["%s_%s.xml" % (self.request.node.name, name) for name in names]
+        catalog_path = "%s_catalog.xml" % self.request.node.name
+
+        for node, path in zip(nodes, ref_paths):
+            IPXACTExporter().export(node, path)
+        IPXACTExporter().export_batch(nodes, dut_paths, jobs=2, catalog=catalog_path)
+
+        for ref_path, dut_path in zip(ref_paths, dut_paths):
+            self.assertEqual(self.read(ref_path), self.read(dut_path))
+
+        catalog = minidom.parse(catalog_path)
+        vlnvs = [
+            (el.getAttribute("name"), el.parentNode.getElementsByTagName("ipxact:name")[0].firstChild.data)
+            for el in catalog.getElementsByTagName("ipxact:vlnv")
+        ]
+        self.assertEqual(vlnvs, list(zip(names, dut_paths)))
+
+    def test_batch_catalog_2009(self):
+        top = self.compile(self.get_sources())
+        with self.assertRaises(ValueError):
+            IPXACTExporter(standard=Standard.IEEE_1685_2009).export_batch(
+                [top], ["%s.xml" % self.request.node.name], catalog="%s_catalog.xml" % self.request.node.name
+            )
+
+    def test_sharded(self):
+        top = self.compile(self.get_sharded_sources(), "sharded")
+        out_dir = "%s.out" % self.request.node.name
+
+        shards = IPXACTExporter().export_sharded(top, out_dir, jobs=2)
+        self.assertEqual(
+            [name for name, _ in shards],
+            ["group", "solo", "arr_0", "arr_1"]
+        )
+        ref_path = "%s_solo_ref.xml" % self.request.node.name
+        IPXACTExporter().export(top.top.get_child_by_name("solo"), ref_path)
+        self.assertEqual(self.read(ref_path), self.read(os.path.join(out_dir, "solo.xml")))
+
+        catalog = minidom.parse(os.path.join(out_dir, "catalog.xml"))
+        self.assertEqual(
+            [el.firstChild.data for el in catalog.getElementsByTagName("ipxact:name")[1:]],
+            ["group.xml", "solo.xml", "arr_0.xml", "arr_1.xml"]
+        )
+
+        # Large addrmaps that only contain other blocks are split further
+        shards = IPXACTExporter().export_sharded(
+            top, out_dir, max_shard_size=4, extension=".xml.gz", catalog=None
+        )
+        self.assertEqual(
+            shards,
+            [
+                ("group_a", os.path.join(out_dir, "group_a.xml.gz")),
+                ("group_b", os.path.join(out_dir, "group_b.xml.gz")),
+                ("solo", os.path.join(out_dir, "solo.xml.gz")),
+                ("arr_0", os.path.join(out_dir, "arr_0.xml.gz")),
+                ("arr_1", os.path.join(out_dir, "arr_1.xml.gz")),
+            ]
+        )
+        for _, path in shards:
+            self.assertTrue(os.path.exists(path))
+
+    def test_sharded_loose_registers(self):
+        top = self.compile(self.get_sharded_sources(), "loose")
+        out_dir = "%s.out" % self.request.node.name
+
+        # The top-level register is not discarded. The top node is exported
+        # as a whole instead.
+        shards = IPXACTExporter().export_sharded(top, out_dir)
+        self.assertEqual(shards, [("top", os.path.join(out_dir, "top.xml"))])
+        ref_path = "%s_ref.xml" % self.request.node.name
+        IPXACTExporter().export(top.top, ref_path)
+        self.assertEqual(self.read(ref_path), self.read(os.path.join(out_dir, "top.xml")))
+
+    def test_sharded_collisions(self):
+        top = self.compile(self.get_sharded_sources(), "collisions")
+        out_dir = "%s.out" % self.request.node.name
+
+        with self.assertRaisesRegex(ValueError, "Catalog name 'catalog' collides with shard 'Catalog'"):
+            IPXACTExporter().export_sharded(top, out_dir)
+        with self.assertRaisesRegex(ValueError, "Shard name 'a_B' collides with shard 'a_b'"):
+            IPXACTExporter().export_sharded(top, out_dir, max_shard_size=1, catalog=None)
+
+        shards = IPXACTExporter().export_sharded(top, out_dir, catalog=os.path.join(out_dir, "index.xml"))
+        self.assertEqual([name for name, _ in shards], ["a", "a_B", "Catalog"])
+
+    def test_multi_messages(self):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        printer = RecordingPrinter()
+        rdlc = RDLCompiler(message_printer=printer)
+        rdlc.compile_file(os.path.join(this_dir, "test_sources/bridge.rdl"))
+        root = rdlc.elaborate()
+
+        # Every output warns about the bridge, but it is only reported once
+        IPXACTExporter().export_multi(root, [
+            XMLSink("%s_%d.xml" % (self.request.node.name, std), std)
+            for std in (Standard.IEEE_1685_2009, Standard.IEEE_1685_2014)
+        ])
+        self.assertEqual([line for _, _, line in printer.messages], [2])
+
+        # Fatal errors stop the export
+        printer = RecordingPrinter()
+        rdlc = RDLCompiler(message_printer=printer)
+        rdlc.compile_file(os.path.join(this_dir, "test_sources/messages.rdl"))
+        root = rdlc.elaborate()
+        with self.assertRaises(RDLCompileError):
+            IPXACTExporter().export_multi(root, [
+                XMLSink("%s_%d.xml" % (self.request.node.name, std), std)
+                for std in (Standard.IEEE_1685_2009, Standard.IEEE_1685_2014)
+            ])
+        self.assertEqual([line for _, _, line in printer.messages], [12, 21, 25])
+
+    def test_export_sink_abstract(self):
+        with self.assertRaises(TypeError):
+            ExportSink("out.xml")
+
+    def test_multi(self):
+        top = self.compile(self.get_sources())
+        paths = {
+            std: "%s_%d.xml" % (self.request.node.name, std)
+            for std in (Standard.IEEE_1685_2009, Standard.IEEE_1685_2014)
+        }
+        summary_path = "%s_summary.json" % self.request.node.name
+
+        IPXACTExporter().export_multi(
+            top,
+            [XMLSink(path, std) for std, path in paths.items()] + [JSONSummarySink(summary_path)],
+            component_name="my_thing"
+        )
+
+        for std, path in paths.items():
+            ref_path = "%s_%d_ref.xml" % (self.request.node.name, std)
+            IPXACTExporter(standard=std).export(top, ref_path, component_name="my_thing")
+            self.assertEqual(self.read(ref_path), self.read(path))
+
+        with open(summary_path, "r", encoding="utf-8") as f:
+            summary = json.load(f)
+        self.assertEqual(summary["name"], "my_thing")
+        self.assertEqual(
+            [block["name"] for block in summary["blocks"]],
+            [child.inst_name for child in top.top.children()]
+        )
+        wrapped_srm = summary["blocks"][2]
+        reg1 = wrapped_srm["children"][-1]
+        node = top.find_by_path("top.wrapped_srm.reg1")
+        self.assertEqual(reg1["address"], node.raw_absolute_address)
+        self.assertEqual(reg1["dimensions"], node.array_dimensions)
+        self.assertEqual(len(reg1["fields"]), len(node.fields(skip_not_present=False)))
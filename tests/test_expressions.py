@@ -0,0 +1,114 @@
+import os
+import unittest
+
+from peakrdl_ipxact import ExpressionEvaluator, ExpressionError
+
+from .unittest_utils import IPXACTTestCase
+
+
+class TestExpressions(unittest.TestCase):
+
+    def test_literals(self):
+        e = ExpressionEvaluator()
+        cases = {
+            "123": 123,
+            " -456 ": -456,
+            "'b10": 2,
+            "'o77": 63,
+            "'d123": 123,
+            "'hff": 255,
+            "8'hFF": 255,
+            "32'sh_dead_beef": 0xdeadbeef,
+            "4K": 4096,
+            "2m": 2*1024*1024,
+            "#10": 16,
+            "0x10K": 16*1024,
+            "-0x1": -1,
+        }
+        for s, value in cases.items():
+            with self.subTest(s=s):
+                self.assertEqual(e.evaluate(s), value)
+
+    def test_arithmetic(self):
+        e = ExpressionEvaluator()
+        cases = {
+            "(1 + 2) * 3": 9,
+            "1 + 2 * 3": 7,
+            "2 ** 3 ** 2": 512,
+            "'h10 << 4 | 1": 0x101,
+            "7 / -2": -3,
+            "-7 % 2": -1,
+            "1 ? 2 : 0 ? 3 : 4": 2,
+            "3 > 2 && !(1 == 2)": 1,
+            "$clog2(33) + $pow(2, 4)": 22,
+        }
+        for s, value in cases.items():
+            with self.subTest(s=s):
+                self.assertEqual(e.evaluate(s), value)
+
+    def test_parameters(self):
+        e = ExpressionEvaluator({
+            "WIDTH": "32",
+            "uuid_width": "WIDTH",
+            "BYTES": "uuid_width / 8",
+            "SELF": "SELF + 1",
+        })
+        self.assertEqual(e.evaluate("BYTES * 2"), 8)
+        with self.assertRaisesRegex(ExpressionError, "undefined parameter 'DEPTH'"):
+            e.evaluate("DEPTH")
+        with self.assertRaisesRegex(ExpressionError, "'SELF' depends on its own value"):
+            e.evaluate("SELF")
+
+    def test_parameter_ids(self):
+        # IDs may contain '-' and '.', which are only read as part of a name if
+        # a parameter with that ID exists
+        e = ExpressionEvaluator({
+            "size-2k": "8",
+            "size-2k-max": "16",
+            "cfg.width": "4",
+            "size": "4096",
+        })
+        cases = {
+            "size-2k": 8,
+            "size-2k-1": 7,
+            "size-2k-max": 16,
+            "size - 2k": 2048,
+            "cfg.width * 2": 8,
+            "size-1k": 3072,
+            "2k": 2048,
+        }
+        for s, value in cases.items():
+            with self.subTest(s=s):
+                self.assertEqual(e.evaluate(s), value)
+        with self.assertRaisesRegex(ExpressionError, "undefined parameter 'size_2k'"):
+            e.evaluate("size_2k")
+
+    def test_invalid(self):
+        e = ExpressionEvaluator()
+        for s in ("", "1 +", "(1", "1 2", "'d1f", "'b2", "$sqrt(4)", "1 @ 2", "1 / 0"):
+            with self.subTest(s=s):
+                with self.assertRaises(ValueError):
+                    e.evaluate(s)
+
+
+class TestImportExpressions(IPXACTTestCase):
+
+    def test_parameters(self):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        xml_path = os.path.join(this_dir, "test_sources/parameters.xml")
+
+        for streaming in (False, True):
+            with self.subTest(streaming=streaming):
+                top = self.compile([xml_path], "params__mmap", streaming=streaming).top
+                regs = top.get_child_by_name("regs")
+                self.assertEqual(regs.absolute_address, 0x1100)
+                self.assertEqual(regs.size, 32)
+
+                chan = regs.get_child_by_name("chan")
+                self.assertEqual(chan.array_dimensions, [4])
+                self.assertEqual(chan.array_stride, 8)
+
+                level = chan.get_child_by_name("ctrl").get_child_by_name("level")
+                self.assertEqual(level.lsb, 29)
+                self.assertEqual(level.msb, 31)
+                self.assertEqual(level.get_property("reset"), 3)
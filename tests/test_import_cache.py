@@ -0,0 +1,75 @@
+import os
+import shutil
+
+from systemrdl import RDLCompiler
+
+from peakrdl_ipxact import IPXACTImporter, ImportCache
+
+from .unittest_utils import IPXACTTestCase, TestPrinter
+
+class TestImportCache(IPXACTTestCase):
+
+    def get_xml_source(self, name):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        return os.path.join(this_dir, "test_sources", name)
+
+    def get_cache_dir(self):
+        cache_dir = "%s.cache" % self.request.node.name
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        return cache_dir
+
+    def compile_cached(self, xml_path, top_name, cache, remap_state=None):
+        rdlc = RDLCompiler(message_printer=TestPrinter())
+        i = IPXACTImporter(rdlc, cache=cache)
+        i.import_file(xml_path, remap_state=remap_state)
+        return rdlc.elaborate(top_name, "top")
+
+    def list_entries(self, cache):
+        return sorted(f for f in os.listdir(cache.directory) if f.endswith(".pickle"))
+
+    def test_hit(self):
+        cache = ImportCache(self.get_cache_dir())
+        xml_path = self.get_xml_source("remap.xml")
+        ref = self.compile([xml_path], "remap__wide_mmap", remap_state="debug")
+
+        a = self.compile_cached(xml_path, "remap__wide_mmap", cache, "debug")
+        entries = self.list_entries(cache)
+        self.assertEqual(len(entries), 1)
+
+        b = self.compile_cached(xml_path, "remap__wide_mmap", cache, "debug")
+        self.assertEqual(self.list_entries(cache), entries)
+
+        self.assert_equivalent(ref, a)
+        self.assert_equivalent(ref, b)
+
+        # Different remap state results in a separate entry
+        self.compile_cached(xml_path, "remap__wide_mmap", cache)
+        self.assertEqual(len(self.list_entries(cache)), 2)
+
+    def test_corrupt_entry(self):
+        cache = ImportCache(self.get_cache_dir())
+        xml_path = self.get_xml_source("remap.xml")
+        self.compile_cached(xml_path, "remap__byte_mmap", cache)
+
+        entry, = self.list_entries(cache)
+        with open(os.path.join(cache.directory, entry), "wb") as f:
+            f.write(b"garbage")
+
+        ref = self.compile([xml_path], "remap__byte_mmap")
+        self.assert_equivalent(ref, self.compile_cached(xml_path, "remap__byte_mmap", cache))
+
+    def test_eviction(self):
+        cache = ImportCache(self.get_cache_dir(), max_size=0)
+        cache.store("a", list(range(100)))
+        cache.store("b", list(range(100)))
+        self.assertEqual(self.list_entries(cache), [])
+
+        cache.max_size = 10000
+        cache.store("a", list(range(100)))
+        os.utime(cache.get_entry_path("a"), (0, 0))
+        cache.store("b", list(range(100)))
+        cache.max_size = os.path.getsize(cache.get_entry_path("b"))
+        cache.evict()
+        self.assertEqual(self.list_entries(cache), ["b.pickle"])
+        self.assertEqual(cache.load("b"), list(range(100)))
+        self.assertIsNone(cache.load("a"))
@@ -0,0 +1,380 @@
+import os
+import re
+import gzip
+import glob
+import unittest
+import shutil
+from xml.etree import ElementTree
+
+from peakrdl_ipxact import IPXACTImporter, ImportCache
+from peakrdl_ipxact.exporter import Standard
+from peakrdl_ipxact import xml_backend
+from peakrdl_ipxact.importer import is_ipxact_file
+
+from .unittest_utils import IPXACTTestCase, TestPrinter
+
+from systemrdl import RDLCompiler, RDLCompileError
+from systemrdl.node import FieldNode
+
+class VendorNoteImporter(IPXACTImporter):
+    # Uses the text of each <vx:note> vendor extension as the description
+    def assign_note(self, vendorExtensions, component):
+        assert isinstance(vendorExtensions, ElementTree.Element)
+        note = vendorExtensions.find("{http://example.org/vx}note")
+        self.assign_property(component, "desc", "".join(note.itertext()))
+        return component
+
+    memoryMap_vendorExtensions = assign_note
+    addressBlock_vendorExtensions = assign_note
+    registerFile_vendorExtensions = assign_note
+    register_vendorExtensions = assign_note
+    field_vendorExtensions = assign_note
+
+class TestImportModes(IPXACTTestCase):
+
+    def get_rdl_sources(self):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        return [
+            os.path.join(this_dir, "test_sources/accellera-generic_example.rdl"),
+            os.path.join(this_dir, "test_sources/nested.rdl"),
+        ]
+
+    def get_xml_source(self, name):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        return os.path.join(this_dir, "test_sources", name)
+
+    def check_equivalent_import(self, xml_path, top_name, remap_state=None, **importer_kwargs):
+        a = self.compile([xml_path], top_name, remap_state=remap_state)
+        b = self.compile([xml_path], top_name, remap_state=remap_state, **importer_kwargs)
+        self.assert_equivalent(a, b)
+
+    def export_rdl(self, std):
+        xml_path = "%s.xml" % self.request.node.name
+        self.export(self.compile(self.get_rdl_sources()), xml_path, std)
+        return xml_path
+
+    def test_streaming_2014(self):
+        xml_path = self.export_rdl(Standard.IEEE_1685_2014)
+        self.check_equivalent_import(xml_path, "my_thing__top", streaming=True)
+
+    def test_streaming_2009(self):
+        xml_path = self.export_rdl(Standard.IEEE_1685_2009)
+        self.check_equivalent_import(xml_path, "my_thing__top", streaming=True)
+
+    def test_streaming_remap(self):
+        xml_path = self.get_xml_source("remap.xml")
+        for remap_state in (None, "debug"):
+            with self.subTest(remap_state=remap_state):
+                self.check_equivalent_import(xml_path, "remap__wide_mmap", remap_state, streaming=True)
+        self.check_equivalent_import(xml_path, "remap__byte_mmap", streaming=True)
+
+    @unittest.skipIf(xml_backend.lxml_etree is None, "lxml is not installed")
+    def test_xml_backends(self):
+        # Comments and processing instructions must not affect the result
+        with open(self.get_xml_source("remap.xml"), "r", encoding="utf-8") as f:
+            xml = f.read()
+        xml = re.sub(r"(</[^>]+>)", r"\1<!-- comment --><?pi data?>", xml)
+        xml = xml.replace(">regs<", ">re<!-- comment -->gs<")
+        xml_path = "%s.xml" % self.request.node.name
+        with open(xml_path, "w", encoding="utf-8") as f:
+            f.write(xml)
+
+        for streaming in (False, True):
+            for top_name in ("remap__wide_mmap", "remap__byte_mmap"):
+                with self.subTest(streaming=streaming, top_name=top_name):
+                    etree = self.compile([xml_path], top_name, xml_backend="etree", streaming=streaming)
+                    lxml = self.compile([xml_path], top_name, xml_backend="lxml", streaming=streaming)
+                    self.assert_equivalent(etree, lxml)
+
+    def import_contents(self, xml_path, **importer_kwargs):
+        # Returns the path, addresses and text properties of each node of each
+        # imported memoryMap
+        rdlc = RDLCompiler(message_printer=TestPrinter())
+        IPXACTImporter(rdlc, **importer_kwargs).import_file(xml_path)
+        result = {}
+        for name in sorted(rdlc.root.comp_defs):
+            if name.count("__") != 1:
+                # addressBlock definition
+                continue
+            top = rdlc.elaborate(name, "top").top
+            result[name] = [
+                (
+                    node.get_path(),
+                    (node.lsb, node.msb) if isinstance(node, FieldNode) else (node.absolute_address, node.size),
+                    node.get_property("name"), node.get_property("desc"),
+                )
+                for node in [top] + list(top.descendants(unroll=True))
+            ]
+        return result
+
+    @unittest.skipIf(xml_backend.lxml_etree is None, "lxml is not installed")
+    def test_xml_backend_fixtures(self):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        xml_paths = sorted(glob.glob(os.path.join(this_dir, "test_sources", "*.xml")))
+        self.assertIn(self.get_xml_source("entities.xml"), xml_paths)
+        for xml_path in xml_paths:
+            for streaming in (False, True):
+                with self.subTest(xml_path=os.path.basename(xml_path), streaming=streaming):
+                    etree = self.import_contents(xml_path, xml_backend="etree", streaming=streaming)
+                    lxml = self.import_contents(xml_path, xml_backend="lxml", streaming=streaming)
+                    self.assertTrue(etree)
+                    self.assertEqual(etree, lxml)
+
+        # Entities of the internal DTD subset are expanded
+        contents = self.import_contents(self.get_xml_source("entities.xml"), xml_backend="lxml")
+        _, blk, ctrl, en = contents["entities__mmap"]
+        self.assertEqual(blk[3], "Hello entity & \u263a")
+        self.assertEqual(ctrl[2], "Control Hello entity")
+        self.assertEqual(en[1], (0, 7))
+        self.assertEqual(en[3], "Before Hello entity after")
+
+    def get_notes(self, rdlc):
+        top = rdlc.elaborate("vext__mmap", "top").top
+        return [
+            (node.get_path(), node.get_property("desc"))
+            for node in [top] + list(top.descendants())
+            if node.get_property("desc") is not None
+        ]
+
+    def test_vendorExtensions(self):
+        xml_path = self.get_xml_source("vendor_extensions.xml")
+        expected = [
+            ("top", "memoryMap note"),
+            ("top.blk_a", "addressBlock note"),
+            ("top.blk_a.ctrl", "register note"),
+            ("top.blk_a.ctrl.en", "field note"),
+            ("top.blk_a.chan", "registerFile note"),
+            ("top.blk_b.data.value", "other field note"),
+        ]
+        cache_dir = "%s.cache" % self.request.node.name
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        cache = ImportCache(cache_dir)
+
+        backends = ["etree"]
+        if xml_backend.lxml_etree is not None:
+            backends.append("lxml")
+        for backend in backends:
+            # The second cached import is a hit
+            for importer_kwargs in ({}, {"streaming": True}, {"jobs": 2}, {"cache": cache}, {"cache": cache}):
+                with self.subTest(backend=backend, **importer_kwargs):
+                    rdlc = RDLCompiler(message_printer=TestPrinter())
+                    VendorNoteImporter(rdlc, xml_backend=backend, **importer_kwargs).import_file(xml_path)
+                    self.assertEqual(self.get_notes(rdlc), expected)
+
+            with self.subTest(backend=backend, import_files=True):
+                rdlc = RDLCompiler(message_printer=TestPrinter())
+                VendorNoteImporter(rdlc, xml_backend=backend).import_files(
+                    [self.get_xml_source("remap.xml"), xml_path], jobs=2
+                )
+                self.assertEqual(self.get_notes(rdlc), expected)
+
+    def test_is_ipxact_file(self):
+        with open(self.get_xml_source("remap.xml"), "r", encoding="utf-8") as f:
+            xml = f.read()
+        decl, body = xml.split("\n", 1)
+        root_end = body.index(">") + 1
+        cases = [
+            (xml, True),
+            # The root element's start tag is enough
+            (decl + "\n" + body[:root_end], True),
+            (decl + "\n<!-- <notipxact> -->\n<?pi data?>\n<!DOCTYPE component>\n" + body, True),
+            # Namespace prefixes do not matter
+            (xml.replace("ipxact:", "x:").replace("xmlns:ipxact", "xmlns:x"), True),
+            (xml.replace("ipxact:component", "ipxact:catalog"), False),
+            ("<root><ipxact:component/></root>", False),
+            ("<ipxact:component>", False),
+            ("not xml", False),
+            ("", False),
+        ]
+        for i, (text, expected) in enumerate(cases):
+            path = "%s_%d.xml.gz" % (self.request.node.name, i)
+            with gzip.open(path, "wt", encoding="utf-8") as f:
+                f.write(text)
+            with self.subTest(i=i):
+                self.assertEqual(is_ipxact_file(path), expected)
+
+    def import_filtered(self, remap_state=None, **importer_kwargs):
+        # Returns the names of the imported memoryMaps, and their addressBlocks
+        rdlc = RDLCompiler(message_printer=TestPrinter())
+        IPXACTImporter(rdlc, **importer_kwargs).import_file(self.get_xml_source("remap.xml"), remap_state)
+        result = {}
+        for name in rdlc.root.comp_defs:
+            if name.count("__") != 1:
+                # addressBlock definition
+                continue
+            top = rdlc.elaborate(name, "top").top
+            result[name] = [child.inst_name for child in top.children()]
+        return result
+
+    def test_filters(self):
+        cases = [
+            ({}, {"remap__wide_mmap": ["regs", "dbg"], "remap__byte_mmap": ["ram"]}),
+            ({"memory_maps": ["byte*"]}, {"remap__byte_mmap": ["ram"]}),
+            ({"memory_maps": ["nothing", "wide_mmap"]}, {"remap__wide_mmap": ["regs", "dbg"]}),
+            ({"address_blocks": ["d?g"]}, {"remap__wide_mmap": ["dbg"]}),
+            ({"address_blocks": ["dbg", "ram"]}, {"remap__wide_mmap": ["dbg"], "remap__byte_mmap": ["ram"]}),
+            # Addresses are in bytes. wide_mmap has 16-bit addressable units.
+            ({"address_range": (0x2f, 0x81)}, {"remap__wide_mmap": ["regs", "dbg"]}),
+            ({"address_range": (0x30, 0x80)}, {}),
+            ({"address_range": (0x10ff, 0x2000)}, {"remap__byte_mmap": ["ram"]}),
+            ({"memory_maps": ["wide_mmap"], "address_range": (0, 0x1000)}, {"remap__wide_mmap": ["regs", "dbg"]}),
+        ]
+        for streaming in (False, True):
+            for importer_kwargs, expected in cases:
+                with self.subTest(streaming=streaming, **importer_kwargs):
+                    result = self.import_filtered("debug", streaming=streaming, **importer_kwargs)
+                    self.assertEqual(result, expected)
+
+    def test_importer_options(self):
+        rdlc = RDLCompiler(message_printer=TestPrinter())
+        with self.assertRaises(TypeError):
+            IPXACTImporter(rdlc, True)
+        with self.assertRaisesRegex(TypeError, "unexpected keyword argument 'stream'"):
+            IPXACTImporter(rdlc, stream=True)
+
+    def test_import_files(self):
+        xml_paths = [
+            self.get_xml_source("remap.xml"),
+            self.export_rdl(Standard.IEEE_1685_2014),
+        ]
+        for top_name in ("remap__wide_mmap", "remap__byte_mmap", "my_thing__top"):
+            with self.subTest(top_name=top_name):
+                serial = self.compile(xml_paths, top_name)
+
+                rdlc = RDLCompiler(message_printer=TestPrinter())
+                IPXACTImporter(rdlc).import_files(xml_paths, jobs=2)
+                self.assert_equivalent(serial, rdlc.elaborate(top_name, "top"))
+
+    def test_import_files_error(self):
+        bad_path = "%s.xml" % self.request.node.name
+        with open(bad_path, "w", encoding="utf-8") as f:
+            f.write('<ipxact:catalog xmlns:ipxact="http://www.accellera.org/XMLSchema/IPXACT/1685-2014"/>')
+
+        rdlc = RDLCompiler(message_printer=TestPrinter())
+        with self.assertRaises(RDLCompileError):
+            IPXACTImporter(rdlc).import_files([self.get_xml_source("remap.xml"), bad_path], jobs=2)
+
+    def test_parallel_2014(self):
+        xml_path = self.export_rdl(Standard.IEEE_1685_2014)
+        self.check_equivalent_import(xml_path, "my_thing__top", jobs=2)
+
+    def test_parallel_remap(self):
+        xml_path = self.get_xml_source("remap.xml")
+        for remap_state in (None, "debug"):
+            with self.subTest(remap_state=remap_state):
+                self.check_equivalent_import(xml_path, "remap__wide_mmap", remap_state, jobs=2)
+        self.check_equivalent_import(xml_path, "remap__byte_mmap", jobs=2)
+
+    def test_share_definitions(self):
+        xml_path = self.export_rdl(Standard.IEEE_1685_2014)
+        self.check_equivalent_import(xml_path, "my_thing__top", share_definitions=True)
+
+        # head and tail registers of each fifo_port are structurally identical
+        top = self.compile([xml_path], "my_thing__top", share_definitions=True)
+        head = top.find_by_path("top.srm1.fifo_port.head")
+        tail = top.find_by_path("top.srm2.fifo_port.tail")
+        self.assertIs(head.inst.original_def, tail.inst.original_def)
+        self.assertEqual(tail.type_name, "head")
+
+        xml_path = self.get_xml_source("remap.xml")
+        self.check_equivalent_import(xml_path, "remap__wide_mmap", "debug", share_definitions=True)
+
+    def import_enum(self, enumeratedValues):
+        # Import a field with the given <enumeratedValues> contents, and return
+        # its members as (name, value, displayName, description) tuples
+        xml = (
+            '<ipxact:component xmlns:ipxact="http://www.accellera.org/XMLSchema/IPXACT/1685-2014">'
+            '<ipxact:vendor>v</ipxact:vendor><ipxact:library>l</ipxact:library>'
+            '<ipxact:name>enum</ipxact:name><ipxact:version>1</ipxact:version>'
+            '<ipxact:memoryMaps><ipxact:memoryMap><ipxact:name>mmap</ipxact:name>'
+            '<ipxact:addressBlock><ipxact:name>blk</ipxact:name>'
+            '<ipxact:baseAddress>0</ipxact:baseAddress><ipxact:range>4</ipxact:range><ipxact:width>32</ipxact:width>'
+            '<ipxact:register><ipxact:name>r</ipxact:name><ipxact:addressOffset>0</ipxact:addressOffset><ipxact:size>32</ipxact:size>'
+            '<ipxact:field><ipxact:name>f</ipxact:name><ipxact:bitOffset>0</ipxact:bitOffset><ipxact:bitWidth>4</ipxact:bitWidth>'
+            '<ipxact:enumeratedValues>%s</ipxact:enumeratedValues>'
+            '</ipxact:field></ipxact:register></ipxact:addressBlock>'
+            '</ipxact:memoryMap></ipxact:memoryMaps></ipxact:component>'
+        ) % enumeratedValues
+        xml_path = "%s.xml" % self.request.node.name
+        with open(xml_path, "w", encoding="utf-8") as f:
+            f.write(xml)
+        field = self.compile([xml_path], "enum__mmap").find_by_path("top.blk.r.f")
+        return [
+            (member.name, member.value, member.rdl_name, member.rdl_desc)
+            for member in field.get_property("encode")
+        ]
+
+    def test_enumeratedValues(self):
+        cases = [
+            (
+                "<ipxact:enumeratedValue><ipxact:name> IDLE </ipxact:name><ipxact:value>0</ipxact:value></ipxact:enumeratedValue>"
+                "<ipxact:enumeratedValue>"
+                "<ipxact:name>BUSY</ipxact:name><ipxact:displayName> Busy </ipxact:displayName>"
+                "<ipxact:description> Doing work </ipxact:description><ipxact:value>'h3</ipxact:value>"
+                "</ipxact:enumeratedValue>",
+                [("IDLE", 0, None, None), ("BUSY", 3, "Busy", " Doing work ")],
+            ),
+            # Names are sanitized
+            (
+                "<ipxact:enumeratedValue><ipxact:name>MODE-A.b:c</ipxact:name><ipxact:value>1</ipxact:value></ipxact:enumeratedValue>",
+                [("MODE_A_b_c", 1, None, None)],
+            ),
+            # Unknown tags are ignored, in enumeratedValues and enumeratedValue
+            (
+                "<ipxact:vendorExtensions/>"
+                "<ipxact:enumeratedValue>"
+                "<ipxact:name>A</ipxact:name><ipxact:usage>read</ipxact:usage><ipxact:value>1</ipxact:value>"
+                "<ipxact:vendorExtensions><ipxact:name>B</ipxact:name><ipxact:value>2</ipxact:value></ipxact:vendorExtensions>"
+                "</ipxact:enumeratedValue>"
+                "<enumeratedValue><name>C</name><value>3</value></enumeratedValue>",
+                [("A", 1, None, None)],
+            ),
+            # Of duplicate tags, the first name and the last value are used
+            (
+                "<ipxact:enumeratedValue>"
+                "<ipxact:name>A</ipxact:name><ipxact:name>B</ipxact:name>"
+                "<ipxact:value>1</ipxact:value><ipxact:value>2</ipxact:value>"
+                "</ipxact:enumeratedValue>",
+                [("A", 2, None, None)],
+            ),
+            # Members with duplicate names or values are discarded
+            (
+                "<ipxact:enumeratedValue><ipxact:name>A</ipxact:name><ipxact:value>1</ipxact:value></ipxact:enumeratedValue>"
+                "<ipxact:enumeratedValue><ipxact:name>B</ipxact:name><ipxact:value>1</ipxact:value></ipxact:enumeratedValue>"
+                "<ipxact:enumeratedValue><ipxact:name>A</ipxact:name><ipxact:value>2</ipxact:value></ipxact:enumeratedValue>",
+                [("A", 1, None, None)],
+            ),
+        ]
+        for i, (enumeratedValues, expected) in enumerate(cases):
+            with self.subTest(i=i):
+                self.assertEqual(self.import_enum(enumeratedValues), expected)
+
+        missing = [
+            "<ipxact:enumeratedValue><ipxact:value>1</ipxact:value></ipxact:enumeratedValue>",
+            "<ipxact:enumeratedValue><ipxact:name> </ipxact:name><ipxact:value>1</ipxact:value></ipxact:enumeratedValue>",
+            "<ipxact:enumeratedValue><ipxact:name>A</ipxact:name></ipxact:enumeratedValue>",
+        ]
+        for i, enumeratedValues in enumerate(missing):
+            with self.subTest(missing=i):
+                with self.assertRaises(RDLCompileError):
+                    self.import_enum(enumeratedValues)
+
+    def test_enum_interning(self):
+        xml_path = self.export_rdl(Standard.IEEE_1685_2014)
+        paths = ("top.srm1.link_status.port0", "top.srm1.link_status.port3", "top.srm2.link_status.port1")
+
+        # By default, each field has its own enum type
+        top = self.compile([xml_path], "my_thing__top")
+        enums = [top.find_by_path(path).get_property("encode") for path in paths]
+        self.assertEqual(
+            [enum_type.type_name for enum_type in enums],
+            ["port0_enum_t", "port3_enum_t", "port1_enum_t"]
+        )
+        self.assertEqual(len(set(enums)), 3)
+
+        top = self.compile([xml_path], "my_thing__top", intern_enums=True)
+        enums = {top.find_by_path(path).get_property("encode") for path in paths}
+        self.assertEqual(len(enums), 1)
+        enum_type = enums.pop()
+        self.assertEqual(enum_type.type_name, "port0_enum_t")
+        self.assertEqual(enum_type["active"].value, 10)
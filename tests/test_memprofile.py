@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+import tracemalloc
+
+from systemrdl import RDLCompiler
+
+from peakrdl_ipxact import MemoryProfiler, profile_import, profile_export
+from peakrdl_ipxact.__peakrdl__ import Importer
+
+from .unittest_utils import IPXACTTestCase, TestPrinter
+
+class TestMemoryProfile(IPXACTTestCase):
+
+    def get_sources(self):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        return [
+            os.path.join(this_dir, "test_sources/accellera-generic_example.rdl"),
+            os.path.join(this_dir, "test_sources/nested.rdl"),
+        ]
+
+    def check_profile(self, profiler, phases):
+        self.assertFalse(tracemalloc.is_tracing())
+        d = profiler.as_dict()
+        self.assertEqual(set(d["memory"]["phases"].keys()), phases)
+        for phase in d["memory"]["phases"].values():
+            self.assertGreater(phase["peak"], 0)
+            self.assertLessEqual(phase["peak"], d["memory"]["peak"])
+        self.assertGreater(d["memory"]["bytes_per_element"]["registers"], 0)
+        self.assertGreater(d["memory"]["bytes_per_element"]["fields"], 0)
+        self.assertTrue(d["memory"]["top_allocations"])
+
+    def test_export(self):
+        top = self.compile(self.get_sources())
+        path = "%s.xml" % self.request.node.name
+        profiler = profile_export(top, path, component_name="my_thing")
+        self.check_profile(profiler, {"build", "serialize", "write"})
+        self.assertEqual(profiler.counts["memoryMaps"], 1)
+
+    def test_import(self):
+        top = self.compile(self.get_sources())
+        path = "%s.xml" % self.request.node.name
+        profile_export(top, path, component_name="my_thing")
+
+        rdlc = RDLCompiler(message_printer=TestPrinter())
+        profiler = profile_import(rdlc, path)
+        self.check_profile(profiler, {"parse", "flatten", "build"})
+
+    def test_plugin_import(self):
+        # Tracing stops once the last input file is imported
+        top = self.compile(self.get_sources())
+        paths = ["%s_%d.xml" % (self.request.node.name, n) for n in range(2)]
+        for n, path in enumerate(paths):
+            profile_export(top, path, component_name="my_thing_%d" % n)
+
+        importer = Importer()
+        parser = argparse.ArgumentParser()
+        parser.add_argument("input_files", nargs="+")
+        importer.add_importer_arguments(parser)
+        profile_path = "%s.memprofile.json" % self.request.node.name
+        options = parser.parse_args(paths + ["--import-memory-profile", profile_path])
+
+        rdlc = RDLCompiler(message_printer=TestPrinter())
+        importer.do_import(rdlc, options, paths[0])
+        self.assertTrue(tracemalloc.is_tracing())
+        importer.do_import(rdlc, options, paths[1])
+        self.check_profile(importer._metrics, {"parse", "flatten", "build"})
+        self.assertEqual(importer._metrics.counts["memoryMaps"], 2)
+        with open(profile_path, encoding="utf-8") as f:
+            self.assertTrue(json.load(f)["memory"]["top_allocations"])
+
+    def test_not_tracing(self):
+        # Phases are still timed if tracing was not started
+        profiler = MemoryProfiler()
+        with profiler.phase("a"):
+            pass
+        self.assertIn("a", profiler.times)
+        self.assertEqual(profiler.as_dict()["memory"]["phases"], {})
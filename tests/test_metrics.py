@@ -0,0 +1,81 @@
+import os
+import tempfile
+
+from peakrdl_ipxact import IPXACTExporter, ImportCache, Metrics
+from peakrdl_ipxact.exporter import Standard
+
+from .unittest_utils import IPXACTTestCase
+
+class TestMetrics(IPXACTTestCase):
+
+    def get_sources(self):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        return [
+            os.path.join(this_dir, "test_sources/accellera-generic_example.rdl"),
+            os.path.join(this_dir, "test_sources/nested.rdl"),
+        ]
+
+    def export_metrics(self, top, **kwargs):
+        metrics = Metrics()
+        path = "%s.xml" % self.request.node.name
+        IPXACTExporter(metrics=metrics, **kwargs).export(top, path, component_name="my_thing")
+        return metrics
+
+    def import_metrics(self, path, **kwargs):
+        metrics = Metrics()
+        self.compile([path], "my_thing__top", metrics=metrics, **kwargs)
+        return metrics
+
+    def test_export(self):
+        top = self.compile(self.get_sources())
+        ref = self.export_metrics(top)
+        self.assertEqual(set(ref.times.keys()), {"build", "serialize", "write"})
+        self.assertEqual(ref.counts["memoryMaps"], 1)
+        for name in ("addressBlocks", "registerFiles", "registers", "fields", "enums"):
+            self.assertGreater(ref.counts[name], 0)
+
+        for kwargs in [
+            {"streaming": True},
+            {"jobs": 2},
+            {"cache_fragments": True},
+            {"cache_fragments": True, "streaming": True},
+        ]:
+            with self.subTest(**kwargs):
+                metrics = self.export_metrics(top, **kwargs)
+                self.assertEqual(ref.counts, metrics.counts)
+
+        # 2009 does not support isPresent, so those elements are not exported
+        metrics = self.export_metrics(top, standard=Standard.IEEE_1685_2009)
+        self.assertLess(metrics.counts["registers"], ref.counts["registers"])
+
+    def test_import(self):
+        top = self.compile(self.get_sources())
+        path = "%s.xml" % self.request.node.name
+        IPXACTExporter().export(top, path, component_name="my_thing")
+
+        ref = self.import_metrics(path)
+        self.assertEqual(set(ref.times.keys()), {"parse", "flatten", "build"})
+        for name in ("memoryMaps", "addressBlocks", "registerFiles", "registers", "fields", "enums"):
+            self.assertGreater(ref.counts[name], 0)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for kwargs in [
+                {"streaming": True},
+                {"jobs": 2},
+                {"cache": ImportCache(cache_dir)},
+                {"cache": ImportCache(cache_dir)}, # cache hit
+            ]:
+                with self.subTest(**kwargs):
+                    metrics = self.import_metrics(path, **kwargs)
+                    self.assertEqual(ref.counts, metrics.counts)
+
+    def test_nested_phases(self):
+        metrics = Metrics()
+        with metrics.phase("a"):
+            with metrics.phase("b"):
+                pass
+        self.assertEqual(set(metrics.times.keys()), {"a", "b"})
+        other = Metrics()
+        other.merge(metrics.as_dict())
+        other.merge(metrics.as_dict())
+        self.assertAlmostEqual(other.times["a"], 2 * metrics.times["a"])
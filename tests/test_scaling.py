@@ -0,0 +1,200 @@
+import os
+import gc
+import sys
+import math
+import unittest
+
+from systemrdl import RDLCompiler
+
+from peakrdl_ipxact import IPXACTExporter, IPXACTImporter, Metrics
+
+from benchmarks.generators import ModelSpec, generate_model
+
+from .unittest_utils import TestPrinter
+
+# Timing checks are sensitive to the load of the machine, so they only run if
+# explicitly enabled by setting this to 1
+ENABLED = os.environ.get("PEAKRDL_IPXACT_SCALING", "0") == "1"
+
+# Largest model size of the timing checks, in fields. This takes a long time,
+# mostly to compile the synthetic models. Set to e.g. 16384 for a quick check.
+MAX_FIELDS = int(os.environ.get("PEAKRDL_IPXACT_SCALING_MAX_FIELDS", 1024*1024))
+
+# Each address block has 32 registers with 8 fields each
+FIELDS_PER_BLOCK = 256
+
+# Model shapes that exercise different parts of the importer and exporter
+SHAPES = {
+    "flat": {},
+    "regfiles": {"regfile_depth": 2},
+    "enums": {"enums": True},
+    "arrays": {"array_size": 4},
+}
+
+# Highest scaling exponent of times that is still considered roughly linear
+MAX_EXPONENT = 1.5
+
+# Highest scaling exponent of operation counts. These are deterministic, so
+# the limit can be much closer to linear.
+MAX_OPS_EXPONENT = 1.1
+
+# (blocks, registers per block) of each model size of the operation counts.
+# Both grow, so that work that is quadratic in either is detected.
+OPS_SIZES = [(1, 8), (2, 16), (4, 32)]
+
+# Phases that take less time than this at the largest size are too noisy to
+# fit an exponent to
+MIN_PHASE_TIME = 0.005
+
+REPEAT = 3
+
+
+def get_sizes():
+    sizes = []
+    n_fields = 1024
+    while n_fields <= MAX_FIELDS:
+        sizes.append(n_fields)
+        n_fields *= 4
+    return sizes
+
+
+def fit_exponent(sizes, times):
+    """
+    Least-squares slope of log(time) over log(size). Also applies to any
+    other measure of work.
+    """
+    xs = [math.log(n) for n in sizes]
+    ys = [math.log(t) for t in times]
+    x_mean = sum(xs) / len(xs)
+    y_mean = sum(ys) / len(ys)
+    num = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys))
+    den = sum((x - x_mean) ** 2 for x in xs)
+    return num / den
+
+
+def best_phase_times(func):
+    """
+    Returns the fastest time of each phase, over several runs.
+
+    Garbage collection is disabled while timing. Its pauses grow with the
+    number of live objects, which would hide the scaling of the code itself.
+    """
+    best = {}
+    for _ in range(REPEAT):
+        metrics = Metrics()
+        gc.collect()
+        gc.disable()
+        try:
+            func(metrics)
+        finally:
+            gc.enable()
+        for phase, seconds in metrics.times.items():
+            best[phase] = min(best.get(phase, seconds), seconds)
+    return best
+
+
+def count_operations(func):
+    """
+    Returns the number of Python source lines that are executed by func.
+
+    Unlike its duration, this is deterministic, and does not depend on the
+    machine or its load.
+    """
+    n = 0
+
+    def trace(frame, event, arg):
+        nonlocal n
+        if event == "line":
+            n += 1
+        return trace
+
+    prev_trace = sys.gettrace()
+    sys.settrace(trace)
+    try:
+        func()
+    finally:
+        sys.settrace(prev_trace)
+    return n
+
+
+class TestOperationScaling(unittest.TestCase):
+    """
+    Checks that the amount of work per element stays constant as models grow
+    """
+
+    def setUp(self):
+        self.tmp_path = "%s.xml" % self.id().split(".")[-1]
+
+    def test_operation_scaling(self):
+        for shape, shape_kwargs in SHAPES.items():
+            sizes = []
+            export_ops = []
+            import_ops = []
+            for blocks, registers in OPS_SIZES:
+                spec = ModelSpec(blocks=blocks, registers=registers, fields=4, **shape_kwargs)
+                root = generate_model(spec)
+
+                def do_export():
+                    IPXACTExporter().export(root, self.tmp_path, component_name="bench")
+
+                def do_import():
+                    rdlc = RDLCompiler(message_printer=TestPrinter())
+                    IPXACTImporter(rdlc).import_file(self.tmp_path)
+
+                sizes.append(spec.n_exported_fields)
+                export_ops.append(count_operations(do_export))
+                import_ops.append(count_operations(do_import))
+
+            for phase, ops in (("export", export_ops), ("import", import_ops)):
+                with self.subTest(shape=shape, phase=phase):
+                    exponent = fit_exponent(sizes, ops)
+                    self.assertLess(
+                        exponent, MAX_OPS_EXPONENT,
+                        "%s of '%s' models scales with exponent %.2f. Operations: %s" % (phase, shape, exponent, ops)
+                    )
+
+
+@unittest.skipUnless(ENABLED, "Set PEAKRDL_IPXACT_SCALING=1 to run scaling checks")
+class TestScaling(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_path = "%s.xml" % self.id().split(".")[-1]
+
+    def check_scaling(self, sizes, timings):
+        for phase in timings[0]:
+            times = [timing[phase] for timing in timings]
+            if times[-1] < MIN_PHASE_TIME:
+                continue
+            exponent = fit_exponent(sizes, times)
+            with self.subTest(phase=phase):
+                self.assertLess(
+                    exponent, MAX_EXPONENT,
+                    "Phase '%s' scales with exponent %.2f. Times: %s" % (phase, exponent, times)
+                )
+
+    def test_scaling(self):
+        sizes = get_sizes()
+        if len(sizes) < 2:
+            self.skipTest("At least two model sizes are required")
+
+        for shape, shape_kwargs in SHAPES.items():
+            export_timings = []
+            import_timings = []
+            for n_fields in sizes:
+                spec = ModelSpec(blocks=n_fields // FIELDS_PER_BLOCK, registers=32, fields=8, **shape_kwargs)
+                root = generate_model(spec)
+
+                def do_export(metrics):
+                    IPXACTExporter(metrics=metrics).export(root, self.tmp_path, component_name="bench")
+
+                def do_import(metrics):
+                    rdlc = RDLCompiler(message_printer=TestPrinter())
+                    IPXACTImporter(rdlc, metrics=metrics).import_file(self.tmp_path)
+
+                export_timings.append(best_phase_times(do_export))
+                import_timings.append(best_phase_times(do_import))
+
+            with self.subTest(shape=shape, phase="export"):
+                self.check_scaling(sizes, export_timings)
+            with self.subTest(shape=shape, phase="import"):
+                self.check_scaling(sizes, import_timings)
@@ -0,0 +1,59 @@
+import os
+
+from systemrdl.node import RegNode
+from peakrdl_ipxact.snapshot import SnapshotCache
+
+from .unittest_utils import IPXACTTestCase
+
+class TestSnapshot(IPXACTTestCase):
+
+    def test_snapshot(self):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        top = self.compile([os.path.join(this_dir, "test_sources/repeated.rdl")])
+        c_arr = top.find_by_path("top.c_arr")
+        snapshots = SnapshotCache(skip_not_present=False)
+
+        a = snapshots.get(top.find_by_path("top.c_arr[0]"))
+        b = snapshots.get(top.find_by_path("top.c_arr[3]"))
+
+        for prop in ("name", "desc", "ispresent", "regwidth"):
+            self.assertEqual(a.get_property(prop), c_arr.get_property(prop))
+        self.assertIsNone(a.get_property("name", default=None))
+
+        # Array elements share resolved properties
+        self.assertEqual(set(b._properties.keys()), {"name", ("name", (("default", None),)), "desc", "ispresent", "regwidth"})
+
+        # Children are resolved once
+        self.assertIs(a.children(), a.children())
+        self.assertEqual(
+            [child.inst_name for child in a.children()],
+            [child.inst_name for child in c_arr.children()]
+        )
+        self.assertIsInstance(a.children()[0].parent, RegNode)
+
+    def test_shared_nodes(self):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        top = self.compile([
+            os.path.join(this_dir, "test_sources/accellera-generic_example.rdl"),
+            os.path.join(this_dir, "test_sources/nested.rdl"),
+        ])
+        snapshots = SnapshotCache(skip_not_present=False, share_nodes=True)
+        skipping = snapshots.view(skip_not_present=True)
+
+        node = top.find_by_path("top.wrapped_srm")
+        self.assertIs(snapshots.get(node), snapshots.get(node))
+
+        # Both views visit the same child nodes, but only one skips the ones
+        # that are not present
+        all_children = snapshots.get(node).children()
+        present_children = skipping.get(node).children()
+        for child in present_children:
+            self.assertTrue(any(child is other for other in all_children))
+        self.assertEqual(
+            [child.inst_name for child in present_children],
+            [child.inst_name for child in node.children(skip_not_present=True)]
+        )
+        self.assertEqual(
+            [child.inst_name for child in all_children],
+            [child.inst_name for child in node.children(skip_not_present=False)]
+        )
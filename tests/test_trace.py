@@ -0,0 +1,67 @@
+import os
+import json
+
+from systemrdl import RDLCompiler
+
+from peakrdl_ipxact import IPXACTExporter, IPXACTImporter, Tracer
+
+from .unittest_utils import IPXACTTestCase, TestPrinter
+
+class TestTrace(IPXACTTestCase):
+
+    def get_sources(self):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        return [
+            os.path.join(this_dir, "test_sources/accellera-generic_example.rdl"),
+            os.path.join(this_dir, "test_sources/nested.rdl"),
+        ]
+
+    def read_trace(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            events = json.load(f)
+        return [event for event in events if event["ph"] == "X"]
+
+    def test_export(self):
+        top = self.compile(self.get_sources())
+        xml_path = "%s.xml" % self.request.node.name
+        trace_path = "%s.trace.json" % self.request.node.name
+
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                x = IPXACTExporter(jobs=jobs)
+                with Tracer(trace_path) as tracer:
+                    tracer.attach(x)
+                    x.export(top, xml_path, component_name="my_thing")
+
+                spans = self.read_trace(trace_path)
+                self.assertEqual(
+                    {span["name"] for span in spans},
+                    {"add_addressBlock", "add_registerFile", "add_register"}
+                )
+                paths = {span["args"]["path"] for span in spans if span["cat"] == "register"}
+                self.assertIn("top.wrapped_srm.srma.fifo_port[].head", paths)
+
+    def test_import(self):
+        top = self.compile(self.get_sources())
+        xml_path = "%s.xml" % self.request.node.name
+        trace_path = "%s.trace.json" % self.request.node.name
+        IPXACTExporter().export(top, xml_path, component_name="my_thing")
+
+        rdlc = RDLCompiler(message_printer=TestPrinter())
+        i = IPXACTImporter(rdlc)
+        with Tracer(trace_path) as tracer:
+            tracer.attach(i)
+            i.import_file(xml_path)
+
+        spans = self.read_trace(trace_path)
+        self.assertEqual(
+            {span["name"] for span in spans},
+            {
+                "decode_addressBlock", "decode_registerFile", "decode_register",
+                "build_addressBlock", "build_registerFile", "build_register",
+            }
+        )
+        for span in spans:
+            self.assertEqual(span["args"]["path"].split(".")[-1], span["args"]["name"])
+        paths = {span["args"]["path"] for span in spans if span["cat"] == "register"}
+        self.assertIn("wrapped_srm.srma.fifo_port.head", paths)
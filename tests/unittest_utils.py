@@ -6,7 +6,7 @@ import pytest
 
 from systemrdl import RDLCompiler
 from systemrdl.messages import MessagePrinter
-from systemrdl.node import Node, RegNode, FieldNode, MemNode
+from systemrdl.node import Node, RegNode, FieldNode, MemNode, AddrmapNode, RegfileNode
 from peakrdl_ipxact import IPXACTImporter, IPXACTExporter
 from peakrdl_ipxact.exporter import Standard
 
@@ -28,17 +28,17 @@ class IPXACTTestCase(unittest.TestCase):
     def _load_request(self, request):
         self.request = request
 
-    def compile(self, files, top_name=None):
+    def compile(self, files, top_name=None, remap_state=None, **importer_kwargs):
         rdlc = RDLCompiler(
             message_printer=TestPrinter()
         )
-        ipxact = IPXACTImporter(rdlc)
+        ipxact = IPXACTImporter(rdlc, **importer_kwargs)
 
         for file in files:
             if file.endswith(".rdl"):
                 rdlc.compile_file(file)
-            elif file.endswith(".xml"):
-                ipxact.import_file(file)
+            elif file.endswith((".xml", ".xml.gz", ".xml.xz", ".xml.zst")):
+                ipxact.import_file(file, remap_state=remap_state)
         return rdlc.elaborate(top_name, "top")
 
     def compare_nodes(self, a: Node, b: Node):
@@ -62,6 +62,17 @@ class IPXACTTestCase(unittest.TestCase):
             print(prop, a, b)
             self.assertEqual(a.get_property(prop), b.get_property(prop))
 
+    def assert_equivalent(self, a, b):
+        # Compare two imported register models, node by node
+        node_types = (RegNode, FieldNode, MemNode, AddrmapNode, RegfileNode)
+        a_nodes = [node for node in a.descendants(unroll=True, skip_not_present=False) if isinstance(node, node_types)]
+        b_nodes = [node for node in b.descendants(unroll=True, skip_not_present=False) if isinstance(node, node_types)]
+        self.assertEqual(len(a_nodes), len(b_nodes))
+        for node_a, node_b in zip(a_nodes, b_nodes):
+            self.compare_nodes(node_a, node_b)
+            if isinstance(node_a, (RegNode, MemNode, AddrmapNode, RegfileNode)):
+                self.assertEqual(node_a.absolute_address, node_b.absolute_address)
+
     def export(self, node, file, std):
         ipxact = IPXACTExporter(standard=std)
         ipxact.export(node, file, component_name="my_thing")